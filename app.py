@@ -3,21 +3,42 @@ from datetime import datetime
 from typing import Optional, List, Dict
 
 import streamlit as st
-import pandas as pd
-import requests
-from sqlalchemy import create_engine, text
 
 # ===================== Config inicial =====================
+# Antes dos demais imports: o navegador recebe a página logo que o processo sobe (primeira pintura)
 st.set_page_config(page_title="Submissões – Industrial & EBC II (2º/2025)", layout="wide")
 
+from sqlalchemy import text
+
+# pandas, requests/msal (SharePoint) e os subsistemas só do admin (exportações, importações, galeria, PDFs)
+# são importados no primeiro uso: login e tela do aluno não pagam por eles
+from modules.config import load_config, set_config
+from modules.dashboard import check_counters, read_counters, rebuild_counters, totals as counter_totals
+from modules.evaluations import save_evaluation, workbench_page
+from modules.downloads import build_bundle, human_size, submission_files
+from modules import dal
+from modules.db import DB_URL, get_engine, exec_sql, write_tx
+from modules.groups import backfill_member_ids, student_context
+from modules.janitor import ensure_janitor
+from modules.jobs import enqueue_upload, ensure_worker_pool, job_counts, list_jobs, retry_failed
+from modules.migrations import bootstrap
+from modules import perf
+from modules.quota import MB, QuotaExceeded, UploadAllowance, group_usage, usage_by_group
+from modules.sharepoint import SharePointSettings, upload_file
+from modules.storage import store_stream
+from modules.themes import reserve_theme, RESERVED, ALREADY_OURS, GROUP_HAS_THEME, TAKEN
+
+# Tempo do rerun por seção (modules/perf.py); sem APP_PERF=1/toggle do admin, só testa uma flag
+perf.rerun_start()
+
 DATA_DIR   = "data"
 UPLOAD_DIR = "uploads"
 PUBLIC_DIR = "public"
 for p in (DATA_DIR, UPLOAD_DIR, PUBLIC_DIR):
     os.makedirs(p, exist_ok=True)
 
-DB_URL = f"sqlite:///{os.path.join(DATA_DIR, 'app.db')}"
-engine = create_engine(DB_URL, future=True)
+# Engine único por processo (WAL, busy_timeout, pool) – ver modules/db.py
+engine = get_engine(DB_URL)
 
 # Defaults (podem ser sobrescritos por secrets)
 APP_TERM           = st.secrets.get("app", {}).get("TERM", "2025/2")
@@ -37,283 +58,264 @@ SEED_PROFESSORS = [
 ]
 
 # ===================== DB bootstrap/migrações =====================
-def _add_col(conn, table, coldef):
-    try:
-        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {coldef}")
-    except Exception:
-        pass
+# Migrações versionadas (sql/NNNN_*.sql) + sementes: uma vez por processo, não a cada rerun
+bootstrap(engine,
+          config_defaults={
+              "TERM": APP_TERM,
+              "MIN_GROUP": MIN_GROUP,
+              "MAX_GROUP": MAX_GROUP,
+              "RESERVE_DEADLINE": RESERVE_DEADLINE,
+              "PUBLISH_MIN_SCORE": PUBLISH_MIN_SCORE,
+              "MAX_GROUP_TOTAL_MB": MAX_GROUP_TOTAL_MB,
+          },
+          professors=SEED_PROFESSORS,
+          themes_path=os.path.join(DATA_DIR, "themes_2025_2.json"),
+          # 0011: integrantes que o SQL não ligou pelo nome exato (acentos/maiúsculas), uma vez só
+          post_migration={11: backfill_member_ids})
 
-with engine.begin() as conn:
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS students(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ra TEXT UNIQUE NOT NULL,
-        name TEXT NOT NULL,
-        email TEXT,
-        turma TEXT,
-        course_code TEXT,
-        active INTEGER DEFAULT 1
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS professors(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        role TEXT,
-        pin TEXT,
-        discipline_code TEXT,
-        approved INTEGER DEFAULT 0,
-        created_at TEXT
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS disciplines(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        code TEXT UNIQUE,
-        name TEXT NOT NULL
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS offerings(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        discipline_id INTEGER NOT NULL,
-        term TEXT,
-        class_name TEXT,
-        PRIMARY KEY(discipline_id, term, class_name)
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS enrollments(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id INTEGER NOT NULL,
-        offering_id INTEGER NOT NULL,
-        UNIQUE(student_id, offering_id)
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS groups(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        code TEXT UNIQUE,
-        turma TEXT,
-        course_code TEXT DEFAULT 'JOINT',
-        created_by TEXT,
-        created_at TEXT
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS group_members(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        group_id INTEGER NOT NULL,
-        student_name TEXT NOT NULL
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS themes(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        number INTEGER,
-        title TEXT UNIQUE NOT NULL,
-        category TEXT,
-        status TEXT CHECK (status IN ('livre','reservado')) DEFAULT 'livre',
-        reserved_by TEXT,
-        reserved_at TEXT,
-        released_by TEXT,
-        released_at TEXT
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS submissions(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        group_code TEXT,
-        theme_title TEXT,
-        report_path TEXT,
-        slides_path TEXT,
-        zip_path TEXT,
-        media_link TEXT,
-        media_file_path TEXT,
-        consent INTEGER DEFAULT 0,
-        submitted_by TEXT,
-        submitted_at TEXT,
-        approved INTEGER DEFAULT 0
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS evaluations(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        submission_id INTEGER NOT NULL,
-        instructor_id INTEGER NOT NULL,
-        discipline_code TEXT NOT NULL,
-        score_report REAL,
-        score_slides REAL,
-        score_media REAL,
-        overall_score REAL,
-        liked INTEGER DEFAULT 0,
-        c_report TEXT,
-        c_slides TEXT,
-        c_media TEXT,
-        c_overall TEXT,
-        created_at TEXT,
-        UNIQUE(submission_id, instructor_id, discipline_code)
-    );
-    """)
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS config(
-        key TEXT PRIMARY KEY,
-        value TEXT
-    );
-    """)
-    # Adiciona colunas novas caso não existam
-    _add_col(conn, "professors", "approved INTEGER DEFAULT 0")
-    _add_col(conn, "professors", "created_at TEXT")
-    # Semeia valores padrão na tabela config
-    def _set_default(k, v):
-        conn.execute(text("INSERT OR IGNORE INTO config(key,value) VALUES(:k,:v)"), {"k": k, "v": v})
-    _set_default("TERM", APP_TERM)
-    _set_default("MIN_GROUP", str(MIN_GROUP))
-    _set_default("MAX_GROUP", str(MAX_GROUP))
-    _set_default("RESERVE_DEADLINE", RESERVE_DEADLINE)
-    _set_default("PUBLISH_MIN_SCORE", str(PUBLISH_MIN_SCORE))
-    _set_default("MAX_GROUP_TOTAL_MB", str(MAX_GROUP_TOTAL_MB))
-    # Semeia contas de professores
-    for name, email, role, pin, approved, disc in SEED_PROFESSORS:
-        conn.execute(text("""
-            INSERT OR IGNORE INTO professors(name,email,role,pin,approved,discipline_code,created_at)
-            VALUES(:name, :email, :role, :pin, :approved, :disc, :created_at)
-        """), {
-            "name": name,
-            "email": email,
-            "role": role,
-            "pin": pin,
-            "approved": approved,
-            "disc": disc,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-    # Semeia disciplinas (IND, EBCII)
-    conn.execute(text("INSERT OR IGNORE INTO disciplines(code,name) VALUES('IND','Economia Industrial')"))
-    conn.execute(text("INSERT OR IGNORE INTO disciplines(code,name) VALUES('EBCII','Economia Brasileira II')"))
+# Carrega valores de config do banco (objeto tipado, recarregado só quando o admin altera)
+CFG = load_config(engine)
+TERM = CFG.term
+MIN_GROUP = CFG.min_group
+MAX_GROUP = CFG.max_group
+RESERVE_DEADLINE = CFG.reserve_deadline
+PUBLISH_MIN_SCORE = CFG.publish_min_score
+MAX_GROUP_TOTAL_MB = CFG.max_group_total_mb
+
+# ===================== Integração com SharePoint (Graph API) =====================
+# Backups vão para a fila upload_jobs; um pool de workers por processo drena com retry/backoff
+SP_SETTINGS = SharePointSettings.from_secrets(st.secrets)
+UPLOAD_POOL = None
+if SP_SETTINGS.configured:
+    UPLOAD_POOL = ensure_worker_pool(engine, lambda local_path, remote_name, session:
+                                     upload_file(SP_SETTINGS, local_path, remote_name, engine=engine, session=session))
+# Arquivos órfãos (submissão que falhou, objeto sem referência) e reservas de quota esquecidas: um thread por processo
+JANITOR = ensure_janitor(engine, UPLOAD_DIR)
 
-# Funções auxiliares de banco de dados
-def get_df(sql: str, **params) -> pd.DataFrame:
-    with engine.begin() as conn:
-        return pd.read_sql(text(sql), conn, params=params)
+# ===================== Funções auxiliares de negócio =====================
+def store_submission_files(group_code: str, uploads, allowance: UploadAllowance):
+    # uploads: (tipo, arquivo do file_uploader ou None, extensão padrão). Quota reservada antes de gravar: o tamanho
+    # declarado de uma vez e, no streaming, bloco a bloco; passar do limite interrompe no primeiro bloco excedente
+    allowance.reserve(sum(up.size for _, up, _ in uploads if up))
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    stored = {}
+    for kind, up, default_ext in uploads:
+        if up:
+            ext = os.path.splitext(up.name)[1] or default_ext
+            stored[kind] = (store_stream(up, ext, UPLOAD_DIR, on_chunk=allowance.take), f"{group_code}_{kind}_{timestamp}{ext}")
+    return stored
 
-def exec_sql(sql: str, **params):
-    with engine.begin() as conn:
-        conn.execute(text(sql), params)
+def reservation_message(res) -> str:
+    if res.status == RESERVED:
+        return f"Tema **{res.title}** reservado com sucesso!"
+    if res.status == ALREADY_OURS:
+        return f"O tema **{res.title}** já está reservado para o seu grupo."
+    if res.status == GROUP_HAS_THEME:
+        return f"Seu grupo já reservou o tema **{res.group_theme}** (um tema por grupo)."
+    if res.status == TAKEN:
+        return f"O tema **{res.title}** acabou de ser reservado por outro grupo ({res.holder}). Escolha outro."
+    return f"Tema **{res.title}** não encontrado."
 
-# Carrega valores de config do banco (pode ter sido atualizado)
-TERM = get_df("SELECT value FROM config WHERE key='TERM'")["value"].iloc[0]
-MIN_GROUP = int(get_df("SELECT value FROM config WHERE key='MIN_GROUP'")["value"].iloc[0])
-MAX_GROUP = int(get_df("SELECT value FROM config WHERE key='MAX_GROUP'")["value"].iloc[0])
-RESERVE_DEADLINE = get_df("SELECT value FROM config WHERE key='RESERVE_DEADLINE'")["value"].iloc[0]
-PUBLISH_MIN_SCORE = float(get_df("SELECT value FROM config WHERE key='PUBLISH_MIN_SCORE'")["value"].iloc[0])
-MAX_GROUP_TOTAL_MB = int(get_df("SELECT value FROM config WHERE key='MAX_GROUP_TOTAL_MB'")["value"].iloc[0])
+def _set_download(key: str, value: Optional[tuple]):
+    st.session_state[key] = value
 
-# ===================== Carrega temas de arquivo JSON (se existir) =====================
-themes_json_path = os.path.join(DATA_DIR, "themes_2025_2.json")
-if os.path.exists(themes_json_path):
-    df_themes = get_df("SELECT id FROM themes LIMIT 1")
-    if df_themes.empty:
-        try:
-            with open(themes_json_path, "r", encoding="utf-8") as f:
-                themes_list = json.load(f)
-        except Exception:
-            themes_list = []
-        if themes_list:
-            for i, it in enumerate(themes_list, start=1):
-                number = it.get("number") or i
-                title = it.get("title")
-                category = it.get("category") or "Outro"
-                if title:
-                    exec_sql("""
-                        INSERT OR IGNORE INTO themes(number, title, category, status)
-                        VALUES(:num, :title, :cat, 'livre')
-                    """, num=number, title=title, cat=category)
+def lazy_downloads(files, submission_id: int, group_code: str, key_prefix: str):
+    # Só nome e tamanho vão para a página; o arquivo é lido e registrado no servidor de mídia depois do clique
+    # em "Preparar", num único rerun: o clique em "Baixar" ou qualquer outra interação que redesenhe este bloco
+    # (fragmento incluído) desarma. O download sai pelo endpoint de mídia do Streamlit (aceita Range).
+    ready_key = f"dl_ready_{key_prefix}"
+    ready = None
+    armed = st.session_state.get(ready_key)   # (tipo, já exibido)
+    if armed is not None:
+        ready, shown = armed
+        if shown:
+            ready = None
+        st.session_state[ready_key] = None if shown else (ready, True)
+    for f in files:
+        if ready == f.kind:
+            with open(f.path, 'rb') as fh:
+                st.download_button(f"Baixar {f.label} ({human_size(f.size)})", fh, file_name=f.name, mime=f.mime,
+                                   key=f"{key_prefix}_{f.kind}_dl", type="primary",
+                                   on_click=_set_download, args=(ready_key, None))
+        else:
+            st.button(f"Preparar {f.label} ({human_size(f.size)})", key=f"{key_prefix}_{f.kind}",
+                      on_click=_set_download, args=(ready_key, (f.kind, False)))
+    if len(files) > 1:
+        # Pacote com todos os arquivos, montado uma vez por submissão e reaproveitado (uploads/bundles)
+        if ready == "bundle":
+            with st.spinner("Montando pacote..."):
+                bundle = build_bundle(submission_id, files)
+            with open(bundle, 'rb') as fh:
+                st.download_button(f"Baixar tudo (ZIP, {human_size(os.path.getsize(bundle))})", fh,
+                                   file_name=f"{group_code}_submissao.zip", mime="application/zip",
+                                   key=f"{key_prefix}_bundle_dl", type="primary",
+                                   on_click=_set_download, args=(ready_key, None))
+        else:
+            st.button(f"Preparar tudo em ZIP ({human_size(sum(f.size for f in files))})", key=f"{key_prefix}_bundle",
+                      on_click=_set_download, args=(ready_key, ("bundle", False)))
 
-# ===================== Integração com SharePoint (Graph API) =====================
-import msal
+# Workbench de avaliação: fragmento (navegar, paginar e salvar não reexecutam o app inteiro);
+# a página vem de workbench_page (3 consultas em conjunto, em cache até mudar o dado)
+# (campo, coluna da nota, coluna do comentário, rótulo da nota, rótulo do comentário)
+EVAL_FIELDS = (
+    ("report", "score_report", "c_report", "Nota – Relatório Escrito (0-10)", "Comentários – Relatório"),
+    ("slides", "score_slides", "c_slides", "Nota – Slides/Apresentação (0-10)", "Comentários – Slides/Apresentação"),
+    ("media", "score_media", "c_media", "Nota – Vídeo (0-10)", "Comentários – Vídeo"),
+    ("overall", "overall_score", "c_overall", "Nota Geral (0-10)", "Comentários Gerais"),
+)
 
-def graph_token() -> Optional[str]:
-    aad = st.secrets.get("aad") or st.secrets
-    tenant = aad.get("TENANT_ID"); client_id = aad.get("CLIENT_ID"); secret = aad.get("CLIENT_SECRET")
-    if not (tenant and client_id and secret):
-        return None
-    app = msal.ConfidentialClientApplication(client_id, authority=f"https://login.microsoftonline.com/{tenant}", client_credential=secret)
-    scopes = ["https://graph.microsoft.com/.default"]
-    try:
-        result = app.acquire_token_for_client(scopes=scopes)
-        return result.get("access_token")
-    except Exception:
-        return None
+def _wb_move(page: int, pos: int):
+    st.session_state["wb_page"] = page
+    st.session_state["select_group_eval"] = pos
 
-def upload_to_sharepoint(local_path: str, remote_name: str) -> bool:
-    token = graph_token()
-    if not token:
-        return False
-    sp = st.secrets.get("sharepoint") or st.secrets
-    site_url = sp.get("SP_SITE_URL") or sp.get("SITE_URL")
-    drive_name = sp.get("SP_DRIVE_NAME") or sp.get("DRIVE_NAME")
-    base_folder = sp.get("SP_BASE_FOLDER") or sp.get("BASE_FOLDER", "")
-    site_id = sp.get("SITE_ID"); drive_id = sp.get("DRIVE_ID")
-    # Obtém IDs do site e drive se não fornecidos
-    if not site_id or not drive_id:
-        if site_url and drive_name:
-            try:
-                host = site_url.split("//")[1].split("/")[0]
-                site_path = site_url.split(host)[-1]
-                resp_site = requests.get(f"https://graph.microsoft.com/v1.0/sites/{host}:{site_path}", headers={"Authorization": f"Bearer {token}"})
-                if resp_site.status_code == 200:
-                    site_data = resp_site.json()
-                    site_id = site_data.get("id")
-                if site_id:
-                    resp_drives = requests.get(f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives", headers={"Authorization": f"Bearer {token}"})
-                    if resp_drives.status_code == 200:
-                        drives_data = resp_drives.json().get("value", [])
-                        for d in drives_data:
-                            if d.get("name") == drive_name:
-                                drive_id = d.get("id")
-                                break
-            except Exception:
-                site_id = None; drive_id = None
-        if site_id and drive_id:
-            exec_sql("INSERT OR REPLACE INTO config(key,value) VALUES('SITE_ID', :sid)", sid=site_id)
-            exec_sql("INSERT OR REPLACE INTO config(key,value) VALUES('DRIVE_ID', :did)", did=drive_id)
-    else:
-        df_site = get_df("SELECT value FROM config WHERE key='SITE_ID'")
-        df_drive = get_df("SELECT value FROM config WHERE key='DRIVE_ID'")
-        if df_site.empty or df_drive.empty:
-            exec_sql("INSERT OR REPLACE INTO config(key,value) VALUES('SITE_ID', :sid)", sid=site_id)
-            exec_sql("INSERT OR REPLACE INTO config(key,value) VALUES('DRIVE_ID', :did)", did=drive_id)
-    if not site_id or not drive_id:
-        return False
-    folder_path = base_folder.strip("/")
-    target_path = f"{folder_path}/{remote_name}" if folder_path else remote_name
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root:/{target_path}:/content"
-    try:
-        with open(local_path, "rb") as f:
-            resp = requests.put(url, headers={"Authorization": f"Bearer {token}"}, data=f)
-        return resp.status_code in (200, 201)
-    except Exception:
-        return False
+def _wb_save(sub_id: int, page: int, pos: int, n_items: int, pages: int, advance: bool):
+    scores = {f: st.session_state[f"ev_{f}_{sub_id}"] for f, *_ in EVAL_FIELDS}
+    comments = {f: st.session_state[f"evc_{f}_{sub_id}"] for f, *_ in EVAL_FIELDS}
+    save_evaluation(engine, sub_id, auth['id'], auth['disc'], scores, comments)
+    st.session_state["wb_flash"] = "Avaliação salva com sucesso!"
+    if advance:
+        if pos + 1 < n_items:
+            _wb_move(page, pos + 1)
+        elif page + 1 < pages:
+            _wb_move(page + 1, 0)
 
-# ===================== Funções auxiliares de negócio =====================
-def get_student_group(student_name: str) -> Optional[str]:
-    df = get_df("""
-        SELECT g.code FROM groups g 
-        JOIN group_members gm ON gm.group_id = g.id 
-        WHERE gm.student_name = :name
-    """, name=student_name)
-    if df.empty:
-        return None
-    return df['code'].iloc[0]
+@st.fragment
+@perf.timed("fragmento Avaliações")
+def evaluation_workbench(turma: Optional[str]):
+    wb = workbench_page(engine, turma, st.session_state.get("wb_page", 0))
+    if not wb.items:
+        st.write("Nenhuma submissão encontrada.")
+        return
+    if wb.pages > 1:
+        c_prev, c_info, c_next = st.columns([1, 3, 1])
+        c_prev.button("◀ Anterior", disabled=wb.page == 0, on_click=_wb_move, args=(wb.page - 1, 0), key="wb_prev")
+        c_info.write(f"Página {wb.page + 1} de {wb.pages} ({wb.total} submissões)")
+        c_next.button("Próxima ▶", disabled=wb.page + 1 >= wb.pages, on_click=_wb_move, args=(wb.page + 1, 0), key="wb_next")
+    if st.session_state.get("select_group_eval", 0) >= len(wb.items):
+        st.session_state["select_group_eval"] = 0
+    evaluated = {sid for sid, evs in wb.evaluations.items() if any(e.instructor_id == auth['id'] for e in evs)}
+    pos = st.selectbox("Selecione um Grupo:", range(len(wb.items)), key="select_group_eval",
+                       format_func=lambda i: ("✅ " if wb.items[i].id in evaluated else "") +
+                                             f"Grupo {wb.items[i].group_code} – {wb.items[i].theme_title}")
+    item = wb.items[pos]
+    sub_id = item.id
+    if "wb_flash" in st.session_state:
+        st.success(st.session_state.pop("wb_flash"))
+    st.write(f"**Grupo {item.group_code} – Tema:** {item.theme_title}")
+    st.write(f"**Enviado em:** {item.submitted_at}")
+    if item.members:
+        st.write(f"**Integrantes:** {', '.join(item.members)}")
+    st.write("**Arquivos:**")
+    lazy_downloads(submission_files(item, item.group_code), sub_id, item.group_code, key_prefix=f"doc_{sub_id}")
+    if item.media_link:
+        st.write(f"[Vídeo]({item.media_link})")
+    st.markdown("---")
+    st.write("### Avaliação:")
+    mine = wb.mine(sub_id, auth['id'])
+    # Formulário: mexer nas notas não dispara rerun; só "Salvar" grava (e "Salvar e próximo" já abre o seguinte)
+    with st.form(f"eval_form_{sub_id}"):
+        for f, score_col, _, label, _ in EVAL_FIELDS:
+            st.slider(label, 0.0, 10.0, float(getattr(mine, score_col) or 0.0) if mine else 0.0, 0.5, key=f"ev_{f}_{sub_id}")
+        for f, _, comment_col, _, label in EVAL_FIELDS:
+            st.text_area(label, (getattr(mine, comment_col) or "") if mine else "", key=f"evc_{f}_{sub_id}")
+        c_save, c_next = st.columns(2)
+        args = (sub_id, wb.page, pos, len(wb.items), wb.pages)
+        c_save.form_submit_button("Salvar Avaliação", on_click=_wb_save, args=args + (False,))
+        c_next.form_submit_button("Salvar e próximo", type="primary", on_click=_wb_save, args=args + (True,))
+    others = wb.others(sub_id, auth['id'])
+    if others:
+        st.write("### Notas de outros docentes:")
+        for ev in others:
+            st.write(f"**{ev.instructor_name} ({ev.discipline_code}):** Nota Geral = {ev.overall_score}")
+            if ev.c_overall:
+                st.write(f"💬 {ev.c_overall}")
 
-def group_member_count(group_code: str) -> int:
-    df = get_df("""
-        SELECT COUNT(*) as count FROM group_members gm 
-        JOIN groups g ON gm.group_id = g.id 
-        WHERE g.code = :gc
-    """, gc=group_code)
-    return int(df['count'].iloc[0]) if not df.empty else 0
+# Relatórios exportáveis: nada é consultado até o pedido; o arquivo é gerado em segundo plano, em blocos,
+# e fica em cache (data/exports) até alguma tabela do relatório mudar
+def _export_clicked(report_key: str, fmt: str):
+    from modules.exports import request_export
+    request_export(engine, report_key, fmt)
+    st.session_state[f"export_armed_{report_key}"] = fmt
+
+def _export_downloaded(report_key: str):
+    st.session_state.pop(f"export_armed_{report_key}", None)
+
+@perf.timed("fragmento Exportações")
+def _export_panel_body():
+    from modules.exports import FORMATS, REPORTS, available_formats, current_export
+    formats = available_formats()
+    fmt = st.radio("Formato", formats, format_func=lambda f: FORMATS[f].label, horizontal=True, key="export_fmt")
+    running = False
+    for key, report in REPORTS.items():
+        job = current_export(engine, key, fmt)
+        armed = st.session_state.get(f"export_armed_{key}") == fmt
+        if job is not None and job.status == "gerando":
+            running = True
+            st.info(f"Gerando {report.title} ({FORMATS[fmt].label})… {job.rows} linhas")
+        elif job is not None and job.status == "erro":
+            st.error(f"Falha ao gerar {report.title}: {job.error}")
+            st.button(f"Tentar de novo – {report.title}", key=f"export_{key}", on_click=_export_clicked, args=(key, fmt))
+        elif job is not None and armed:
+            with open(job.path, 'rb') as fh:
+                st.download_button(f"Baixar {FORMATS[fmt].label} – {report.title}", fh,
+                                   file_name=f"{report.file_stem}{FORMATS[fmt].ext}", mime=FORMATS[fmt].mime,
+                                   key=f"export_dl_{key}", type="primary", on_click=_export_downloaded, args=(key,))
+        else:
+            cached = " (pronto)" if job is not None else ""
+            st.button(f"Gerar {FORMATS[fmt].label} – {report.title}{cached}", key=f"export_{key}",
+                      on_click=_export_clicked, args=(key, fmt))
+    if "xlsx" not in formats:
+        st.caption("Excel indisponível: instale openpyxl.")
+    # O fragmento se atualiza sozinho enquanto houver geração; ligar/desligar o timer pede um rerun completo
+    if running != st.session_state.get("export_polling", False):
+        st.session_state["export_polling"] = running
+        st.rerun()
+
+def export_panel():
+    polling = st.session_state.get("export_polling", False)
+    st.fragment(run_every=1.0 if polling else None)(_export_panel_body)()
+
+# Métricas (ring buffer do processo): a coleta vale para todas as sessões enquanto ligada
+PERF_COLUMNS = {"profile": "Perfil", "section": "Seção", "kind": "Tipo", "sql": "SQL", "n": "N", "p50_ms": "p50 (ms)",
+                "p95_ms": "p95 (ms)", "max_ms": "máx (ms)", "total_ms": "total (ms)", "avg_rows": "linhas (média)",
+                "cache_hit": "do cache", "ts": "Quando", "ms": "ms", "rows": "linhas", "params": "Parâmetros"}
+
+def _perf_table(rows: List[Dict], first: List[str]):
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    df = df[first + [c for c in df.columns if c not in first]]
+    st.dataframe(df.rename(columns=PERF_COLUMNS), hide_index=True, use_container_width=True)
+
+def performance_panel():
+    st.toggle("Coletar métricas (consultas e tempo de cada seção do rerun)", value=perf.enabled(),
+              key="perf_on", on_change=lambda: perf.set_enabled(st.session_state["perf_on"]))
+    st.caption(f"Últimos {perf.RING_SIZE} eventos de cada tipo; consulta lenta: ≥ {perf.SLOW_QUERY_MS:.0f} ms "
+               "(também vai para o log).")
+    m = perf.stats()
+    if not (m["reruns"] or m["sections"] or m["queries"]):
+        st.info("Nenhuma métrica coletada ainda." + ("" if perf.enabled() else " Ligue a coleta acima."))
+        return
+    if m["reruns"]:
+        st.write("#### Rerun completo")
+        _perf_table(m["reruns"], ["profile"])
+    if m["sections"]:
+        st.write("#### Por seção")
+        _perf_table(m["sections"], ["section"])
+    if m["queries"]:
+        st.write("#### Por consulta (get_df / dal / exec_sql)")
+        _perf_table(m["queries"], ["kind", "sql"])
+    if m["slow"]:
+        st.write("#### Consultas lentas")
+        _perf_table(m["slow"], ["ts", "ms"])
+    c_json, c_csv, c_clear = st.columns(3)
+    for col, fmt in ((c_json, "json"), (c_csv, "csv")):
+        if col.button(f"Exportar {fmt.upper()}", key=f"perf_export_{fmt}"):
+            st.success(f"Métricas salvas em {perf.export(fmt)}")
+    if c_clear.button("Limpar métricas", key="perf_reset"):
+        perf.reset()
+        st.rerun()
+
+perf.checkpoint("bootstrap")
 
 # ===================== Autenticação (Login) =====================
 if 'auth' not in st.session_state:
@@ -332,23 +334,24 @@ if auth['who'] == 'anon':
             if not ra:
                 st.sidebar.error("Por favor, insira seu RA.")
             else:
-                df_student = get_df("SELECT id, ra, name, email, turma FROM students WHERE ra=:ra AND active=1", ra=ra)
-                if df_student.empty:
+                student = dal.one("SELECT id, ra, name, email, turma FROM students WHERE ra=:ra AND active=1", ra=ra)
+                if student is None:
                     st.sidebar.error("RA não encontrado. Solicite inclusão ao docente.")
                 else:
-                    student = df_student.iloc[0]
+                    student_email = student.email
                     # Atualiza email se fornecido e não houver no cadastro
-                    if (student['email'] is None or student['email'] == "") and email_input:
-                        exec_sql("UPDATE students SET email=:em WHERE id=:id", em=email_input.strip(), id=int(student['id']))
-                        student['email'] = email_input.strip()
+                    if (student_email is None or student_email == "") and email_input:
+                        exec_sql("UPDATE students SET email=:em WHERE id=:id", em=email_input.strip(), id=int(student.id))
+                        student_email = email_input.strip()
                     st.session_state['auth'] = {
                         "who": "aluno",
-                        "id": int(student['id']),
-                        "ra": student['ra'],
-                        "name": student['name'],
-                        "email": student['email'] or email_input.strip(),
-                        "turma": student['turma']
+                        "id": int(student.id),
+                        "ra": student.ra,
+                        "name": student.name,
+                        "email": student_email or email_input.strip(),
+                        "turma": student.turma
                     }
+                    student_context(engine, int(student.id))   # já deixa o contexto do aluno em cache
                     st.rerun()
     else:  # Docente
         email_doc = st.sidebar.text_input("E-mail institucional")
@@ -358,57 +361,49 @@ if auth['who'] == 'anon':
             if not email_norm:
                 st.sidebar.error("Por favor, insira seu e-mail.")
             else:
-                df_prof = get_df("""
+                prof = dal.one("""
                     SELECT id, name, email, role, pin, approved, discipline_code 
                     FROM professors WHERE lower(email)=lower(:e)
                 """, e=email_norm)
-                if df_prof.empty:
+                if prof is None:
                     st.sidebar.error("Conta de docente não encontrada. Cadastre na aba Admin.")
                 else:
-                    prof = df_prof.iloc[0]
-                    if int(prof['approved'] or 0) != 1:
+                    if int(prof.approved or 0) != 1:
                         st.sidebar.warning("Conta de docente pendente de aprovação.")
-                    elif (pin_input or "") != (prof['pin'] or ""):
+                    elif (pin_input or "") != (prof.pin or ""):
                         st.sidebar.error("PIN inválido.")
                     else:
                         st.session_state['auth'] = {
                             "who": "docente",
-                            "id": int(prof['id']),
-                            "name": prof['name'],
-                            "email": prof['email'],
-                            "role": prof['role'],
-                            "disc": prof['discipline_code']
+                            "id": int(prof.id),
+                            "name": prof.name,
+                            "email": prof.email,
+                            "role": prof.role,
+                            "disc": prof.discipline_code
                         }
                         st.rerun()
+    perf.checkpoint("login")
 else:
     # Usuário logado
     if auth['who'] == 'aluno':
         st.write(f"# Bem-vindo, {auth['name']}!")
-        group_code = get_student_group(auth['name'])
+        ctx = student_context(engine, auth['id'])
+        group_code = ctx.group_code
         if not group_code:
             st.warning("Você ainda não está em um grupo. Consulte o docente para definir seu grupo.")
         else:
-            # Informações do grupo do aluno
-            df_group_theme = get_df("SELECT theme_title, submitted_at, submitted_by FROM submissions WHERE group_code = :gc", gc=group_code)
-            theme_reserved = None
-            if not df_group_theme.empty:
-                theme_reserved = df_group_theme['theme_title'].iloc[0] or None
+            # Informações do grupo do aluno (contexto em cache, renovado só quando grupo/tema/submissão mudam)
+            theme_reserved = ctx.theme
             st.write(f"**Grupo:** {group_code}" + (f" – Tema reservado: {theme_reserved}" if theme_reserved else ""))
-            df_members = get_df("""
-                SELECT student_name FROM group_members gm 
-                JOIN groups g ON gm.group_id = g.id 
-                WHERE g.code = :gc
-            """, gc=group_code)
-            if not df_members.empty:
-                members_list = df_members['student_name'].tolist()
-                st.write(f"**Membros do grupo:** {', '.join(members_list)}")
+            if ctx.members:
+                st.write(f"**Membros do grupo:** {', '.join(ctx.members)}")
             # Reserva de tema
             st.subheader("Reserva de Tema")
-            df_themes_avail = get_df("SELECT title, category FROM themes WHERE status='livre'")
-            if df_themes_avail.empty:
+            selected_theme = None
+            theme_options = [r.title for r in dal.all("SELECT title, category FROM themes WHERE status='livre'")]
+            if not theme_options:
                 st.info("Todos os temas já foram reservados.")
             else:
-                theme_options = df_themes_avail['title'].tolist()
                 selected_theme = st.selectbox("Escolha um tema disponível:", ["(selecione)"] + theme_options, key="theme_select_student")
                 deadline_dt = None
                 try:
@@ -417,42 +412,33 @@ else:
                     pass
                 if st.button("Reservar Tema"):
                     if selected_theme and selected_theme != "(selecione)":
-                        count = group_member_count(group_code)
+                        count = ctx.member_count
                         now = datetime.now()
                         if count < 5 and deadline_dt and now < deadline_dt:
                             st.error(f"Grupos com menos de 5 alunos só podem reservar temas após {deadline_dt.strftime('%d/%m/%Y')}.")
                         else:
-                            exec_sql("UPDATE themes SET status='reservado', reserved_by=:gc, reserved_at=:ts WHERE title=:t AND status='livre'",
-                                    gc=group_code, ts=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), t=selected_theme)
-                            theme_reserved = selected_theme
-                            st.success(f"Tema **{selected_theme}** reservado com sucesso!")
-                            st.rerun()
+                            # Compare-and-swap: só um grupo ganha o tema, e a mensagem diz quem
+                            res = reserve_theme(engine, group_code, selected_theme)
+                            if res.ok:
+                                theme_reserved = res.title
+                                st.success(reservation_message(res))
+                                st.rerun()
+                            else:
+                                st.error(reservation_message(res))
             # Submissão dos entregáveis
             st.subheader("Submissão dos Entregáveis")
-            if not df_group_theme.empty:
-                sub_info = df_group_theme.iloc[0]
-                st.info(f"Este grupo já submeteu o trabalho em {sub_info['submitted_at']} (por {sub_info['submitted_by']}).")
+            if ctx.submission:
+                files = ctx.submission
+                st.info(f"Este grupo já submeteu o trabalho em {files.submitted_at} (por {files.submitted_by}).")
                 st.write("Arquivos enviados:")
-                df_files = get_df("SELECT report_path, slides_path, zip_path, media_link, media_file_path FROM submissions WHERE group_code=:gc", gc=group_code)
-                if not df_files.empty:
-                    files = df_files.iloc[0]
-                    if files['report_path']:
-                        with open(files['report_path'], 'rb') as f:
-                            st.download_button("Baixar Relatório", f, file_name=os.path.basename(files['report_path']))
-                    if files['slides_path']:
-                        with open(files['slides_path'], 'rb') as f:
-                            st.download_button("Baixar Slides", f, file_name=os.path.basename(files['slides_path']))
-                    if files['zip_path']:
-                        with open(files['zip_path'], 'rb') as f:
-                            st.download_button("Baixar Materiais Adicionais", f, file_name=os.path.basename(files['zip_path']))
-                    if files['media_file_path']:
-                        with open(files['media_file_path'], 'rb') as f:
-                            st.download_button("Baixar Mídia", f, file_name=os.path.basename(files['media_file_path']))
-                    if files['media_link']:
-                        st.write(f"[Link do Vídeo]({files['media_link']})")
+                lazy_downloads(submission_files(files, group_code), files.id, group_code, key_prefix=f"aluno_{files.id}")
+                if files.media_link:
+                    st.write(f"[Link do Vídeo]({files.media_link})")
                 st.write("Caso precise atualizar a submissão, entre em contato com o docente.")
             else:
                 st.write("Envie os arquivos para cada entregável:")
+                used_bytes, uploading_bytes = group_usage(engine, group_code)
+                st.caption(f"Espaço do grupo: {human_size(used_bytes + uploading_bytes)} de {MAX_GROUP_TOTAL_MB} MB")
                 report_file = st.file_uploader("Relatório (PDF)", type=["pdf"])
                 slides_file = st.file_uploader("Apresentação (PPTX ou PDF)", type=["pptx", "pdf"])
                 bundle_file = st.file_uploader("Materiais adicionais (ZIP)", type=["zip"])
@@ -469,192 +455,94 @@ else:
                         if theme_reserved is None and (selected_theme is None or selected_theme == "" or selected_theme == "(selecione)"):
                             st.error("É necessário selecionar/reservar um tema antes da submissão.")
                         else:
-                            # Salva arquivos localmente
-                            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                            report_path = slides_path = zip_path = media_file_path = ""
-                            if report_file:
-                                report_fname = f"{group_code}_relatorio_{timestamp}.pdf"
-                                report_path = os.path.join(UPLOAD_DIR, report_fname)
-                                with open(report_path, "wb") as f:
-                                    f.write(report_file.getbuffer())
-                            if slides_file:
-                                ext = os.path.splitext(slides_file.name)[1] or ".pptx"
-                                slides_fname = f"{group_code}_slides_{timestamp}{ext}"
-                                slides_path = os.path.join(UPLOAD_DIR, slides_fname)
-                                with open(slides_path, "wb") as f:
-                                    f.write(slides_file.getbuffer())
-                            if bundle_file:
-                                zip_fname = f"{group_code}_material_{timestamp}.zip"
-                                zip_path = os.path.join(UPLOAD_DIR, zip_fname)
-                                with open(zip_path, "wb") as f:
-                                    f.write(bundle_file.getbuffer())
-                            media_link_str = media_link.strip()
-                            if media_upload:
-                                ext = os.path.splitext(media_upload.name)[1] or ".mp4"
-                                media_fname = f"{group_code}_media_{timestamp}{ext}"
-                                media_file_path = os.path.join(UPLOAD_DIR, media_fname)
-                                with open(media_file_path, "wb") as f:
-                                    f.write(media_upload.getbuffer())
-                            exec_sql("""
-                                INSERT INTO submissions(group_code, theme_title, report_path, slides_path, zip_path, media_link, media_file_path, consent, submitted_by, submitted_at)
-                                VALUES(:gc, :theme, :rp, :sp, :zp, :ml, :mf, :cons, :by, :at)
-                            """, gc=group_code,
-                                   theme=(selected_theme if selected_theme and selected_theme != "(selecione)" else theme_reserved) or "",
-                                   rp=report_path, sp=slides_path, zp=zip_path,
-                                   ml=media_link_str, mf=media_file_path,
-                                   cons=1 if consent else 0, by=auth['name'], at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                            if selected_theme and selected_theme not in (None, "", "(selecione)"):
-                                exec_sql("UPDATE themes SET status='reservado', reserved_by=:gc, reserved_at=:ts WHERE title=:t",
-                                        gc=group_code, ts=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), t=selected_theme)
-                            st.success("Trabalho submetido com sucesso!")
-                            # Upload para SharePoint (backup)
-                            if report_path:
-                                upload_to_sharepoint(report_path, os.path.basename(report_path))
-                            if slides_path:
-                                upload_to_sharepoint(slides_path, os.path.basename(slides_path))
-                            if zip_path:
-                                upload_to_sharepoint(zip_path, os.path.basename(zip_path))
-                            if media_file_path:
-                                upload_to_sharepoint(media_file_path, os.path.basename(media_file_path))
-                            st.rerun()
+                            # Salva arquivos localmente (streaming em blocos, endereçado por SHA-256) dentro da quota do grupo
+                            allowance = UploadAllowance(engine, group_code, MAX_GROUP_TOTAL_MB * MB)
+                            try:
+                                stored = store_submission_files(group_code, (("relatorio", report_file, ".pdf"), ("slides", slides_file, ".pptx"),
+                                                                             ("material", bundle_file, ".zip"), ("media", media_upload, ".mp4")), allowance)
+                            except QuotaExceeded as e:
+                                st.error(f"Limite de armazenamento do grupo ({MAX_GROUP_TOTAL_MB} MB) excedido: {human_size(e.used_bytes)} em uso, "
+                                         f"o envio precisa de mais {human_size(e.requested_bytes)}. Reduza os arquivos (ex.: vídeo por link).")
+                            else:
+                                rep = stored.get("relatorio", (None, None))[0]
+                                sld = stored.get("slides", (None, None))[0]
+                                zpf = stored.get("material", (None, None))[0]
+                                med = stored.get("media", (None, None))[0]
+                                media_link_str = media_link.strip()
+                                # Reserva do tema (se ainda não houver), submissão e jobs de backup na mesma transação:
+                                # tema tomado por outro grupo cancela tudo; nenhum arquivo fica sem job
+                                sub_theme = theme_reserved or selected_theme
+                                res = None
+                                sub_new_id = None
+                                with write_tx() as conn:
+                                    if not theme_reserved:
+                                        res = reserve_theme(engine, group_code, sub_theme, conn=conn)
+                                        # Grupo que reservou outro tema em outra sessão submete com o tema dele
+                                        sub_theme = res.group_theme if res.ok or res.status == GROUP_HAS_THEME else None
+                                    if sub_theme:
+                                        sub_new_id = conn.execute(text("""
+                                            INSERT INTO submissions(group_code, theme_title, report_path, slides_path, zip_path, media_link, media_file_path, consent, submitted_by, submitted_at,
+                                                                    report_size, report_sha256, slides_size, slides_sha256, zip_size, zip_sha256, media_size, media_sha256)
+                                            VALUES(:gc, :theme, :rp, :sp, :zp, :ml, :mf, :cons, :by, :at,
+                                                   :rs, :rh, :ss, :sh, :zs, :zh, :ms, :mh)
+                                        """), dict(gc=group_code, theme=sub_theme,
+                                               rp=rep.path if rep else "", sp=sld.path if sld else "", zp=zpf.path if zpf else "",
+                                               ml=media_link_str, mf=med.path if med else "",
+                                               cons=1 if consent else 0, by=auth['name'], at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                               rs=rep.size if rep else None, rh=rep.sha256 if rep else None,
+                                               ss=sld.size if sld else None, sh=sld.sha256 if sld else None,
+                                               zs=zpf.size if zpf else None, zh=zpf.sha256 if zpf else None,
+                                               ms=med.size if med else None, mh=med.sha256 if med else None)).lastrowid
+                                        if SP_SETTINGS.configured:
+                                            for stored_file, remote_name in stored.values():
+                                                enqueue_upload(engine, stored_file.path, remote_name, submission_id=sub_new_id, conn=conn)
+                                        # Reserva sai e os bytes entram em committed (trigger) no mesmo commit da submissão
+                                        allowance.release(conn=conn)
+                                if sub_new_id is None:
+                                    st.error(reservation_message(res) + " A submissão não foi gravada.")
+                                else:
+                                    allowance.released()   # commit feito: a reserva já saiu do ledger
+                                    if UPLOAD_POOL:
+                                        UPLOAD_POOL.wake()
+                                    st.success("Trabalho submetido com sucesso!")
+                                    st.rerun()
+                            finally:
+                                allowance.release()   # submissão não gravada (tema tomado, erro): devolve a reserva
+        perf.checkpoint("aluno")
     elif auth['who'] == 'docente':
+        import pandas as pd   # tabelas das telas de docente
         is_admin = (auth.get('role') == 'admin')
         st.write(f"# Olá, Prof. {auth['name']}!")
         tabs = ["Avaliações", "Dashboard"]
         if is_admin:
-            tabs.append("Admin")
+            tabs += ["Admin", "Desempenho"]
         tab_sel = st.tabs(tabs)
         # Aba Avaliações
-        with tab_sel[0]:
+        with tab_sel[0], perf.section("aba Avaliações"):
             st.subheader("Avaliação dos Trabalhos")
-            df_subs = get_df("SELECT id, group_code, theme_title, submitted_at FROM submissions ORDER BY group_code")
-            if df_subs.empty:
-                st.write("Nenhuma submissão realizada ainda.")
-            else:
-                class_options = []
-                df_classes = get_df("SELECT DISTINCT turma FROM groups")
-                if not df_classes.empty:
-                    class_list = [c for c in df_classes['turma'] if c]
-                    if class_list:
-                        class_options = ["Todas"] + sorted(class_list)
-                selected_class = None
-                if class_options:
-                    selected_class = st.selectbox("Turma", class_options, key="class_filter_avaliacao")
-                if is_admin:
-                    disc_options = ["Todas", "IND", "EBCII"]
-                    selected_disc = st.selectbox("Disciplina", disc_options, key="disc_filter_avaliacao")
-                else:
-                    selected_disc = auth['disc']
-                filtered_subs = df_subs
-                if selected_class and selected_class != "Todas":
-                    filtered_subs = get_df("""
-                        SELECT s.id, s.group_code, s.theme_title, s.submitted_at 
-                        FROM submissions s JOIN groups g ON s.group_code = g.code 
-                        WHERE g.turma = :turma
-                        ORDER BY s.group_code
-                    """, turma=selected_class)
-                if selected_disc and selected_disc not in ("Todas", "JOINT"):
-                    # Em projeto integrado, não filtramos submissões por disciplina (todas são conjuntas)
-                    pass
-                submission_list = [f"Grupo {row['group_code']} – {row['theme_title']}" for _, row in filtered_subs.iterrows()]
-                if not submission_list:
-                    st.write("Nenhuma submissão encontrada.")
-                else:
-                    selected_index = st.selectbox("Selecione um Grupo:", range(len(submission_list)), format_func=lambda i: submission_list[i], key="select_group_eval")
-                    sub_id = int(filtered_subs.iloc[selected_index]['id'])
-                    group_code = filtered_subs.iloc[selected_index]['group_code']
-                    theme_title = filtered_subs.iloc[selected_index]['theme_title']
-                    submitted_at = filtered_subs.iloc[selected_index]['submitted_at']
-                    st.write(f"**Grupo {group_code} – Tema:** {theme_title}")
-                    st.write(f"**Enviado em:** {submitted_at}")
-                    df_members = get_df("""
-                        SELECT gm.student_name FROM group_members gm 
-                        JOIN groups g ON gm.group_id = g.id 
-                        WHERE g.code = :gc
-                    """, gc=group_code)
-                    if not df_members.empty:
-                        st.write(f"**Integrantes:** {', '.join(df_members['student_name'])}")
-                    df_files = get_df("SELECT report_path, slides_path, zip_path, media_link, media_file_path FROM submissions WHERE id=:id", id=sub_id)
-                    if not df_files.empty:
-                        files = df_files.iloc[0]
-                        st.write("**Arquivos:**")
-                        if files['report_path']:
-                            with open(files['report_path'], 'rb') as f:
-                                st.download_button("Relatório", f, file_name=os.path.basename(files['report_path']), key=f"down_rep_{sub_id}")
-                        if files['slides_path']:
-                            with open(files['slides_path'], 'rb') as f:
-                                st.download_button("Slides", f, file_name=os.path.basename(files['slides_path']), key=f"down_sld_{sub_id}")
-                        if files['zip_path']:
-                            with open(files['zip_path'], 'rb') as f:
-                                st.download_button("Material Adicional", f, file_name=os.path.basename(files['zip_path']), key=f"down_zip_{sub_id}")
-                        if files['media_file_path']:
-                            with open(files['media_file_path'], 'rb') as f:
-                                st.download_button("Mídia", f, file_name=os.path.basename(files['media_file_path']), key=f"down_media_{sub_id}")
-                        if files['media_link']:
-                            st.write(f"[Vídeo]({files['media_link']})")
-                    st.markdown("---")
-                    st.write("### Avaliação:")
-                    df_eval = get_df("""
-                        SELECT score_report, score_slides, score_media, overall_score, c_report, c_slides, c_media, c_overall 
-                        FROM evaluations 
-                        WHERE submission_id=:sid AND instructor_id=:iid
-                    """, sid=sub_id, iid=auth['id'])
-                    existing_eval = None if df_eval.empty else df_eval.iloc[0]
-                    score_report = st.slider("Nota – Relatório Escrito (0-10)", 0.0, 10.0, float(existing_eval['score_report']) if existing_eval is not None else 0.0, 0.5)
-                    score_slides = st.slider("Nota – Slides/Apresentação (0-10)", 0.0, 10.0, float(existing_eval['score_slides']) if existing_eval is not None else 0.0, 0.5)
-                    score_media = st.slider("Nota – Vídeo (0-10)", 0.0, 10.0, float(existing_eval['score_media']) if existing_eval is not None else 0.0, 0.5)
-                    overall_score = st.slider("Nota Geral (0-10)", 0.0, 10.0, float(existing_eval['overall_score']) if existing_eval is not None else 0.0, 0.5)
-                    c_report = st.text_area("Comentários – Relatório", existing_eval['c_report'] if existing_eval is not None else "")
-                    c_slides = st.text_area("Comentários – Slides/Apresentação", existing_eval['c_slides'] if existing_eval is not None else "")
-                    c_media = st.text_area("Comentários – Vídeo", existing_eval['c_media'] if existing_eval is not None else "")
-                    c_overall = st.text_area("Comentários Gerais", existing_eval['c_overall'] if existing_eval is not None else "")
-                    df_other_evals = get_df("""
-                        SELECT p.name, e.discipline_code, e.overall_score, e.c_overall 
-                        FROM evaluations e JOIN professors p ON e.instructor_id = p.id 
-                        WHERE e.submission_id = :sid AND e.instructor_id != :iid
-                    """, sid=sub_id, iid=auth['id'])
-                    if not df_other_evals.empty:
-                        st.write("### Notas de outros docentes:")
-                        for _, ev in df_other_evals.iterrows():
-                            st.write(f"**{ev['name']} ({ev['discipline_code']}):** Nota Geral = {ev['overall_score']}")
-                            if ev['c_overall']:
-                                st.write(f"💬 {ev['c_overall']}")
-                    if st.button("Salvar Avaliação", key=f"save_eval_{sub_id}"):
-                        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        if existing_eval is None:
-                            exec_sql("""
-                                INSERT INTO evaluations(submission_id, instructor_id, discipline_code, score_report, score_slides, score_media, overall_score, liked, c_report, c_slides, c_media, c_overall, created_at) 
-                                VALUES(:sid, :iid, :disc, :sr, :ss, :sm, :os, 0, :cr, :cs, :cm, :co, :at)
-                            """, sid=sub_id, iid=auth['id'], disc=auth['disc'],
-                                   sr=score_report, ss=score_slides, sm=score_media, os=overall_score,
-                                   cr=c_report.strip(), cs=c_slides.strip(), cm=c_media.strip(), co=c_overall.strip(), at=now_str)
-                        else:
-                            exec_sql("""
-                                UPDATE evaluations 
-                                SET score_report=:sr, score_slides=:ss, score_media=:sm, overall_score=:os,
-                                    c_report=:cr, c_slides=:cs, c_media=:cm, c_overall=:co, created_at=:at
-                                WHERE submission_id=:sid AND instructor_id=:iid
-                            """, sr=score_report, ss=score_slides, sm=score_media, os=overall_score,
-                                   cr=c_report.strip(), cs=c_slides.strip(), cm=c_media.strip(), co=c_overall.strip(),
-                                   at=now_str, sid=sub_id, iid=auth['id'])
-                        st.success("Avaliação salva com sucesso!")
+            class_options = []
+            class_list = [r.turma for r in dal.all("SELECT DISTINCT turma FROM groups") if r.turma]
+            if class_list:
+                class_options = ["Todas"] + sorted(class_list)
+            selected_class = None
+            if class_options:
+                selected_class = st.selectbox("Turma", class_options, key="class_filter_avaliacao",
+                                              on_change=_wb_move, args=(0, 0))
+            if is_admin:
+                disc_options = ["Todas", "IND", "EBCII"]
+                # Em projeto integrado, não filtramos submissões por disciplina (todas são conjuntas)
+                selected_disc = st.selectbox("Disciplina", disc_options, key="disc_filter_avaliacao")
+            evaluation_workbench(selected_class if selected_class and selected_class != "Todas" else None)
         # Aba Dashboard
-        with tab_sel[1]:
+        with tab_sel[1], perf.section("aba Dashboard"):
             st.subheader("Painel de Acompanhamento")
-            df_total_groups = get_df("SELECT COUNT(*) as total FROM groups")
-            total_groups = int(df_total_groups['total'][0]) if not df_total_groups.empty else 0
-            df_reserved = get_df("SELECT COUNT(DISTINCT reserved_by) as reserved FROM themes WHERE status='reservado'")
-            reserved_count = int(df_reserved['reserved'][0]) if not df_reserved.empty else 0
-            df_submitted = get_df("SELECT COUNT(DISTINCT group_code) as submitted FROM submissions")
-            submitted_count = int(df_submitted['submitted'][0]) if not df_submitted.empty else 0
-            df_evaluated = get_df("""
-                SELECT s.group_code 
-                FROM submissions s 
-                JOIN evaluations e ON s.id = e.submission_id 
-                GROUP BY s.group_code 
-                HAVING COUNT(DISTINCT e.discipline_code) >= 2
-            """)
-            evaluated_count = len(df_evaluated) if not df_evaluated.empty else 0
+            # Contadores mantidos por triggers (migração 0008): uma leitura de tabela pequena por rerun
+            df_counters = read_counters()
+            counters = counter_totals(df_counters)
+            total_groups = counters["groups"]
+            reserved_count = counters["reserved"]
+            submitted_count = counters["submitted"]
+            evaluated_count = counters["evaluated"]
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Grupos formados", total_groups)
             col2.metric("Temas reservados", reserved_count)
@@ -666,10 +554,49 @@ else:
                 st.write(f"**Grupos com tema mas não submetido:** {reserved_count - submitted_count}")
             if evaluated_count < submitted_count:
                 st.write(f"**Submissões pendentes de avaliação:** {submitted_count - evaluated_count}")
+            df_turmas = df_counters[(df_counters["turma"] != "*") & (df_counters["groups"] > 0)]
+            if len(df_turmas) > 1 or (len(df_turmas) == 1 and df_turmas["turma"].iloc[0] != ""):
+                st.write("### Por turma")
+                st.dataframe(df_turmas.replace({"turma": {"": "(sem turma)"}}).rename(columns={
+                    "turma": "Turma", "groups": "Grupos", "reserved": "Com tema",
+                    "submitted": "Submetidos", "evaluated": "Avaliados"}), hide_index=True)
+            if is_admin:
+                c_chk, c_rebuild = st.columns(2)
+                if c_chk.button("Verificar contadores"):
+                    diffs = check_counters(engine)
+                    if diffs:
+                        st.warning(f"{len(diffs)} divergência(s) entre os contadores e o recálculo.")
+                        st.dataframe(pd.DataFrame(diffs), hide_index=True)
+                    else:
+                        st.success("Contadores consistentes.")
+                if c_rebuild.button("Reconstruir contadores"):
+                    rebuild_counters(engine)
+                    st.success("Contadores reconstruídos.")
+                    st.rerun()
+            st.write("### Backups no SharePoint")
+            if not SP_SETTINGS.configured:
+                st.caption("SharePoint não configurado (secrets).")
+            jobs_count = job_counts(engine)
+            colj1, colj2, colj3, colj4 = st.columns(4)
+            colj1.metric("Na fila", jobs_count["pendente"])
+            colj2.metric("Enviando", jobs_count["enviando"])
+            colj3.metric("Concluídos", jobs_count["concluido"])
+            colj4.metric("Falharam", jobs_count["falhou"])
+            if jobs_count["pendente"] or jobs_count["enviando"] or jobs_count["falhou"]:
+                st.dataframe(pd.DataFrame(list_jobs(engine)), hide_index=True, use_container_width=True)
+            if is_admin and jobs_count["falhou"] and st.button("Reenviar backups com falha"):
+                retry_failed(engine)
+                if UPLOAD_POOL:
+                    UPLOAD_POOL.wake()
+                st.rerun()
         # Aba Admin (para admin)
         if is_admin:
-            with tab_sel[2]:
+            with tab_sel[2], perf.section("aba Admin"):
                 st.subheader("Administração")
+                from modules.feedback import bundle_feedback, feedback_files, generate_feedback
+                from modules.gallery import publication_candidates, publish_gallery, set_approved
+                from modules.import_csv import import_students_csv, read_roster_csv
+                from modules.import_txt import import_txt_files
                 st.write("### Gerenciar Temas")
                 with st.form(key="add_theme_form"):
                     col1, col2 = st.columns([3, 2])
@@ -739,105 +666,137 @@ else:
                                 st.success(f"Docente {name} adicionado.")
                             except Exception:
                                 st.error("Erro ao adicionar docente. Verifique se o e-mail já está cadastrado.")
-                df_pending = get_df("SELECT name, email FROM professors WHERE approved=0")
-                if not df_pending.empty:
+                pending = dal.all("SELECT name, email FROM professors WHERE approved=0")
+                if pending:
                     st.write("### Docentes pendentes de aprovação:")
-                    for _, row in df_pending.iterrows():
-                        pname = row['name']; pemail = row['email']
+                    for pname, pemail in pending:
                         if st.button(f"Aprovar {pname} ({pemail})", key=f"approve_{pemail}"):
                             exec_sql("UPDATE professors SET approved=1 WHERE email=:email", email=pemail)
                             st.success(f"Docente {pname} aprovado.")
                             st.rerun()
+                st.write("### Configuração")
+                with st.form(key="config_form"):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        cfg_term = st.text_input("Semestre", value=CFG.term)
+                        cfg_deadline = st.text_input("Prazo de reserva (ISO)", value=CFG.reserve_deadline)
+                    with col2:
+                        cfg_min = st.number_input("Mín. alunos por grupo", min_value=1, value=CFG.min_group, step=1)
+                        cfg_max = st.number_input("Máx. alunos por grupo", min_value=1, value=CFG.max_group, step=1)
+                    with col3:
+                        cfg_score = st.number_input("Nota mínima p/ publicação", min_value=0.0, max_value=10.0, value=CFG.publish_min_score, step=0.5)
+                        cfg_mb = st.number_input("Limite por grupo (MB)", min_value=1, value=CFG.max_group_total_mb, step=10)
+                    if st.form_submit_button("Salvar Configuração"):
+                        try:
+                            datetime.fromisoformat(cfg_deadline.strip())
+                        except ValueError:
+                            st.error("Prazo de reserva inválido (use AAAA-MM-DDTHH:MM:SS).")
+                        else:
+                            for k, v in (("TERM", cfg_term.strip()), ("RESERVE_DEADLINE", cfg_deadline.strip()),
+                                         ("MIN_GROUP", int(cfg_min)), ("MAX_GROUP", int(cfg_max)),
+                                         ("PUBLISH_MIN_SCORE", float(cfg_score)), ("MAX_GROUP_TOTAL_MB", int(cfg_mb))):
+                                set_config(engine, k, v)
+                            st.success("Configuração atualizada.")
+                            st.rerun()
+                st.write("### Armazenamento")
+                # Ledger por grupo (modules/quota.py) e limpeza de órfãos em uploads/ (modules/janitor.py)
+                usage = usage_by_group(engine)
+                if usage:
+                    st.dataframe(pd.DataFrame([{"Grupo": u["group"], "Usado (MB)": round(u["committed"] / MB, 1),
+                                                "Enviando (MB)": round(u["reserved"] / MB, 1),
+                                                "Limite (MB)": MAX_GROUP_TOTAL_MB} for u in usage]),
+                                 hide_index=True, use_container_width=True)
+                if JANITOR.last_run:
+                    last = JANITOR.last_report
+                    st.caption(f"Última limpeza: {datetime.fromtimestamp(JANITOR.last_run):%d/%m %H:%M} – "
+                               f"{len(last.orphans)} órfão(s), {human_size(last.reclaimed_bytes)} liberados.")
+                if JANITOR.last_error:
+                    st.warning(f"Falha na última limpeza automática: {JANITOR.last_error}")
+                c_check, c_clean = st.columns(2)
+                janitor_dry = c_check.button("Verificar arquivos órfãos")
+                janitor_run = c_clean.button("Limpar arquivos órfãos agora")
+                if janitor_dry or janitor_run:
+                    jr = JANITOR.run_once(dry_run=janitor_dry)
+                    verb = "seriam removidos" if jr.dry_run else "removidos"
+                    st.success(f"{jr.scanned} arquivo(s) em uploads/: {len(jr.orphans)} órfão(s), {jr.partials_removed} envio(s) "
+                               f"interrompido(s) e {jr.bundles_removed} pacote(s) sem submissão {verb} "
+                               f"({human_size(jr.reclaimed_bytes)}).")
+                    if not jr.dry_run and (jr.ledger_fixed or jr.reservations_expired or jr.sizes_backfilled):
+                        st.info(f"Ledger: {jr.ledger_fixed} grupo(s) corrigido(s), {jr.reservations_expired} reserva(s) vencida(s), "
+                                f"{jr.sizes_backfilled} tamanho(s) de arquivo antigo(s) preenchido(s).")
+                st.write("### Galeria Pública")
+                # Candidatas: consentimento dos autores + média >= nota mínima; o admin escolhe o que publicar
+                candidates = publication_candidates(engine, CFG.publish_min_score)
+                if not candidates:
+                    st.write(f"Nenhuma submissão com consentimento e média ≥ {CFG.publish_min_score}.")
+                else:
+                    labels = {c['id']: f"{c['group']} – {c['theme']} (média {c['score']})" for c in candidates}
+                    with st.form("gallery_form"):
+                        chosen = st.multiselect("Aprovadas para publicação", list(labels), format_func=labels.get,
+                                                default=[c['id'] for c in candidates if c['approved']])
+                        c_save, c_build = st.columns(2)
+                        save_only = c_save.form_submit_button("Salvar aprovações")
+                        build = c_build.form_submit_button("Salvar e gerar galeria", type="primary")
+                    if save_only or build:
+                        set_approved(engine, list(labels), chosen)
+                        st.success("Aprovações salvas.")
+                    if build:
+                        with st.spinner("Gerando galeria..."):
+                            res = publish_gallery(engine, CFG.publish_min_score)
+                        st.success(f"Galeria em public/: {res.items} trabalhos, {res.pages_written} página(s) gravada(s), "
+                                   f"{res.pages_unchanged} sem mudança, {res.cards_rendered} cartão(ões) renderizado(s).")
+                st.write("### Feedback em PDF")
+                # Um PDF por grupo com as avaliações de todos os docentes (IND e EBCII); grupos sem mudança são pulados
+                if st.button("Gerar PDFs de feedback"):
+                    with st.spinner("Gerando PDFs..."):
+                        fb = generate_feedback(engine)
+                    st.success(f"{len(fb.written)} PDF(s) gerado(s), {len(fb.unchanged)} sem mudança nas avaliações.")
+                    for group, error in fb.failed.items():
+                        st.error(f"Falha no PDF do grupo {group}: {error}")
+                    current = feedback_files(engine)
+                    st.session_state['feedback_zip'] = bundle_feedback(current) if current else None
+                fb_zip = st.session_state.get('feedback_zip')
+                if fb_zip and os.path.exists(fb_zip):
+                    with open(fb_zip, 'rb') as fh:
+                        st.download_button(f"Baixar PDFs de feedback (ZIP, {human_size(os.path.getsize(fb_zip))})", fh,
+                                           file_name="feedback_grupos.zip", mime="application/zip",
+                                           on_click=_set_download, args=('feedback_zip', None))
                 st.write("### Relatórios Exportáveis")
-                # Relatório por Grupo
-                df_groups = get_df("""
-                    SELECT g.code AS Grupo, 
-                           COALESCE(s.theme_title, '') AS Tema, 
-                           GROUP_CONCAT(gm.student_name, ', ') AS Integrantes,
-                           CASE WHEN s.id IS NOT NULL THEN 'Sim' ELSE 'Não' END AS Submeteu,
-                           MAX(CASE WHEN e.discipline_code='IND' THEN e.overall_score END) AS Nota_Industrial,
-                           MAX(CASE WHEN e.discipline_code='EBCII' THEN e.overall_score END) AS Nota_EBCII
-                    FROM groups g 
-                    LEFT JOIN group_members gm ON gm.group_id = g.id
-                    LEFT JOIN submissions s ON s.group_code = g.code
-                    LEFT JOIN evaluations e ON e.submission_id = s.id
-                    GROUP BY g.code
-                """)
-                csv_groups = df_groups.to_csv(index=False).encode("utf-8")
-                st.download_button("Baixar CSV – Por Grupo", data=csv_groups, file_name="relatorio_grupos.csv", mime="text/csv")
-                # Relatório por Aluno
-                df_students = get_df("""
-                    SELECT st.ra AS RA, st.name AS Nome, g.code AS Grupo, COALESCE(s.theme_title, '') AS Tema,
-                           CASE WHEN s.id IS NOT NULL THEN 'Sim' ELSE 'Não' END AS Submeteu,
-                           (SELECT e.overall_score FROM evaluations e JOIN professors pr ON e.instructor_id=pr.id 
-                            WHERE e.submission_id = s.id AND pr.discipline_code='IND' LIMIT 1) AS Nota_Industrial,
-                           (SELECT e.overall_score FROM evaluations e JOIN professors pr ON e.instructor_id=pr.id 
-                            WHERE e.submission_id = s.id AND pr.discipline_code='EBCII' LIMIT 1) AS Nota_EBCII
-                    FROM students st
-                    LEFT JOIN group_members gm ON gm.student_name = st.name
-                    LEFT JOIN groups g ON gm.group_id = g.id
-                    LEFT JOIN submissions s ON s.group_code = g.code
-                """)
-                csv_students = df_students.to_csv(index=False).encode("utf-8")
-                st.download_button("Baixar CSV – Por Aluno", data=csv_students, file_name="relatorio_alunos.csv", mime="text/csv")
-                # Relatório por Docente
-                df_profs = get_df("""
-                    SELECT p.name AS Docente, p.discipline_code AS Disciplina, s.group_code AS Grupo, s.theme_title AS Tema,
-                           e.overall_score AS Nota_Atribuida, e.c_overall AS Comentario
-                    FROM evaluations e 
-                    JOIN professors p ON e.instructor_id = p.id
-                    JOIN submissions s ON e.submission_id = s.id
-                    ORDER BY p.name, s.group_code
-                """)
-                csv_profs = df_profs.to_csv(index=False).encode("utf-8")
-                st.download_button("Baixar CSV – Por Docente", data=csv_profs, file_name="relatorio_docentes.csv", mime="text/csv")
+                export_panel()
                 # Importação em lote (opcional)
                 st.write("### Importar Dados em Lote")
                 up_themes = st.file_uploader("Importar Temas (JSON)", type=["json"])
                 if up_themes is not None:
                     try:
                         themes_data = json.load(up_themes)
-                        added = 0
-                        for item in themes_data:
-                            title = item.get('title')
-                            category = item.get('category', 'Outro')
-                            if title:
-                                exec_sql("INSERT OR IGNORE INTO themes(number, title, category, status) VALUES(NULL, :t, :c, 'livre')", t=title, c=category)
-                                added += 1
+                        # Uma transação para o arquivo todo; conta só os temas novos (INSERT OR IGNORE)
+                        added = dal.bulk_execute("INSERT OR IGNORE INTO themes(number, title, category, status) VALUES(NULL, :t, :c, 'livre')",
+                                                 [{"t": item.get('title'), "c": item.get('category', 'Outro')}
+                                                  for item in themes_data if item.get('title')])
                         st.success(f"{added} temas importados.")
                     except Exception:
                         st.error("JSON inválido.")
                 up_csv = st.file_uploader("Importar Alunos (CSV)", type=["csv"])
                 if up_csv is not None and st.button("Processar CSV"):
                     try:
-                        df_csv = pd.read_csv(up_csv)
-                        count = 0
-                        for _, row in df_csv.iterrows():
-                            ra = str(row.get('ra') or row.get('RA') or "").strip()
-                            name = str(row.get('name') or row.get('Nome') or row.get('nome') or "").strip()
-                            email = str(row.get('email') or row.get('Email') or "").strip()
-                            turma = str(row.get('turma') or row.get('Turma') or "").strip()
-                            if ra and name:
-                                exec_sql("INSERT OR IGNORE INTO students(ra, name, email, turma, course_code, active) VALUES(:ra, :name, :email, :turma, NULL, 1)",
-                                        ra=ra, name=name, email=email, turma=turma)
-                                count += 1
-                        st.success(f"{count} alunos importados via CSV.")
+                        res = import_students_csv(engine, read_roster_csv(up_csv))
+                        st.success(f"CSV processado: {res.inserted} novos, {res.updated} atualizados, {res.skipped} ignorados.")
                     except Exception:
                         st.error("Erro ao ler o CSV.")
                 up_txts = st.file_uploader("Importar Alunos (TXT PUC)", type=["txt"], accept_multiple_files=True)
-                if up_txts:
-                    total_added = 0
-                    for txt in up_txts:
-                        try:
-                            content = txt.read().decode("latin-1")
-                        except Exception:
-                            content = txt.read().decode("utf-8", errors="ignore")
-                        matches = re.findall(r"\b(RA\d{8})\b\s+([^\n\r]+)", content)
-                        for ra, nm in matches:
-                            ra_num = ra.replace("RA", "")
-                            name_clean = nm.strip()
-                            if ra_num and name_clean:
-                                exec_sql("INSERT OR IGNORE INTO students(ra, name, email, turma, course_code, active) VALUES(:ra, :name, '', NULL, NULL, 1)",
-                                        ra=ra_num, name=name_clean)
-                                total_added += 1
-                    st.success(f"{total_added} alunos importados dos TXT(s).")
+                if up_txts and st.button("Processar TXT"):
+                    res = import_txt_files(engine, [(f.name, f) for f in up_txts], TERM, imported_by=auth['name'])
+                    novos = sum(len(d.new_students) for d in res.offerings.values())
+                    matriculas = sum(len(d.new_students) + len(d.enrolled) + len(d.reactivated) for d in res.offerings.values())
+                    st.success(f"{res.count('importado')} arquivo(s) importado(s): {novos} alunos novos, {matriculas} matrículas novas/reativadas.")
+                    if res.count("já importado") or res.count("repetido"):
+                        st.info(f"{res.count('já importado') + res.count('repetido')} arquivo(s) ignorado(s) – mesmo conteúdo já importado.")
+                    st.dataframe(pd.DataFrame([{"Arquivo": f.name, "Situação": f.status, "Disciplina": f.disciplina,
+                                                "Turma": f.turma, "Alunos": f.students, "Erro": f.error} for f in res.files]),
+                                 hide_index=True)
+        # Aba Desempenho (para admin)
+        if is_admin:
+            with tab_sel[3], perf.section("aba Desempenho"):
+                performance_panel()
+
+perf.rerun_end(auth['who'] if auth['who'] != 'docente' else auth.get('role', 'docente'))
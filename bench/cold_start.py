@@ -0,0 +1,111 @@
+# Partida a frio: primeira execução do app.py num processo novo (como depois de um deploy/restart do container),
+# por perfil (anônimo na tela de login, aluno, docente admin), e quais dependências pesadas foram carregadas.
+# O streamlit já vem importado (o servidor sobe antes do script); mede-se o script: imports do app + bootstrap +
+# primeira renderização. --ref compara com outra versão do repositório (git archive), no mesmo banco sintético.
+#   python -m bench.cold_start [--repeat 5] [--ref HEAD~1]
+import argparse, json, os, shutil, subprocess, sys, tempfile, time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "pyarrow", "requests", "msal", "jinja2", "fpdf", "concurrent.futures.process")
+PROFILES = ("anônimo", "aluno", "admin")
+
+# Roda no processo filho: argv = pasta do app, JSON do auth (ou "null")
+CHILD = r"""
+import json, os, sys, time
+app_dir, auth = sys.argv[1], json.loads(sys.argv[2])
+os.chdir(app_dir)
+sys.path.insert(0, app_dir)
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+at = AppTest.from_file("app.py", default_timeout=120)
+if auth:
+    at.session_state["auth"] = auth
+t0 = time.perf_counter()
+at.run()
+ms = (time.perf_counter() - t0) * 1000
+if at.exception:
+    raise SystemExit(f"erro no app: {at.exception[0].value}")
+print(json.dumps({"ms": ms, "modules": len(set(sys.modules) - before),
+                  "loaded": sorted(m for m in %r if m in sys.modules)}))
+""" % (HEAVY,)
+
+def copy_tree(dest: str, ref: Optional[str] = None) -> str:
+    # Árvore de trabalho atual (sem .git/dados locais) ou uma versão do git
+    if ref:
+        os.makedirs(dest)
+        archive = subprocess.run(["git", "archive", ref], cwd=ROOT, check=True, capture_output=True).stdout
+        subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+    else:
+        shutil.copytree(ROOT, dest, ignore=shutil.ignore_patterns(".git", "__pycache__", "uploads", "public", "*.db",
+                                                                   "*.db-wal", "*.db-shm", "perf", "bench", "exports"))
+    return dest
+
+def measure(app_dir: str, db_url: str, auth: Optional[Dict], repeat: int) -> List[Dict]:
+    # Um processo novo por amostra
+    env = dict(os.environ, APP_DB_URL=db_url, PYTHONDONTWRITEBYTECODE="1")
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", CHILD, app_dir, json.dumps(auth)], env=env,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falhou")
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        sample["process_ms"] = (time.perf_counter() - t0) * 1000
+        out.append(sample)
+    return out
+
+def sessions(engine) -> Dict[str, Optional[Dict]]:
+    # auth de cada perfil no banco sintético (aluno com grupo, docente admin)
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        sid, ra, name, turma = conn.execute(text("""SELECT s.id, s.ra, s.name, s.turma FROM group_members gm
+                                                    JOIN students s ON s.id = gm.student_id ORDER BY gm.id LIMIT 1""")).one()
+        pid, email, disc = conn.execute(text("SELECT id, email, discipline_code FROM professors WHERE role = 'admin' LIMIT 1")).one()
+    return {"anônimo": None,
+            "aluno": {"who": "aluno", "id": sid, "ra": ra, "name": name, "email": "", "turma": turma},
+            "admin": {"who": "docente", "id": pid, "name": "Benchmark", "email": email, "role": "admin", "disc": disc}}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5, help="processos novos por perfil")
+    ap.add_argument("--ref", default=None, help="outra versão (commit/tag) para comparar com a árvore atual")
+    ap.add_argument("--students", type=int, default=3000)
+    ap.add_argument("--groups", type=int, default=600)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_cold_")
+    db_url = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    os.environ["APP_DB_URL"] = db_url
+    from bench.e2e import summarize
+    from bench.synthdata import populate
+    from modules.db import get_engine
+    engine = get_engine()
+    populate(engine, students=args.students, groups=args.groups, upload_dir=os.path.join(tmp, "uploads"))
+    auths = sessions(engine)
+
+    trees = {"atual": copy_tree(os.path.join(tmp, "atual"))}
+    if args.ref:
+        trees[args.ref] = copy_tree(os.path.join(tmp, "ref"), args.ref)
+    results = {}
+    for label, app_dir in trees.items():
+        print(f"== {label}")
+        for profile in PROFILES:
+            samples = measure(app_dir, db_url, auths[profile], args.repeat)
+            s = summarize([x["ms"] for x in samples])
+            proc = summarize([x["process_ms"] for x in samples])
+            results[(label, profile)] = s
+            print(f"   {profile:<9} primeira execução p50={s['p50_ms']:7.0f} ms p95={s['p95_ms']:7.0f} ms  "
+                  f"processo p50={proc['p50_ms']:7.0f} ms  módulos={samples[-1]['modules']:<5} "
+                  f"carregados: {', '.join(samples[-1]['loaded']) or '-'}")
+    if args.ref:
+        print("== diferença (p50 da primeira execução)")
+        for profile in PROFILES:
+            old, new = results[(args.ref, profile)]["p50_ms"], results[("atual", profile)]["p50_ms"]
+            print(f"   {profile:<9} {old:7.0f} -> {new:7.0f} ms  {new / old - 1:+.1%}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# Consultas de um valor/uma linha: get_df + .iloc[0] (DataFrame) contra dal.scalar/one/all (tuplas), servidas
+# pelo cache e indo ao banco (cache desligado); e N exec_sql contra um dal.bulk_execute.
+#   python -m bench.dal_overhead --calls 5000
+import argparse, os, sys, tempfile, time
+
+def _per_call_us(fn, calls: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        best = min(best, time.perf_counter() - t0)
+    return best / calls * 1e6
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=5000)
+    ap.add_argument("--rows", type=int, default=500, help="linhas no caso de escrita em lote")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_dal_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from modules import dal, db
+    from modules.db import exec_sql, get_df, get_engine
+    from modules.migrations import run_migrations
+    run_migrations(get_engine())
+    dal.bulk_execute("INSERT INTO groups(code, turma, created_by, created_at) VALUES(:c, :t, 'bench', 'now')",
+                     [{"c": f"G{i:03d}", "t": f"MA{i % 6}"} for i in range(300)])
+
+    count_sql = "SELECT COUNT(*) AS count FROM groups WHERE turma = :t"
+    row_sql = "SELECT id, code, turma FROM groups WHERE code = :c"
+    list_sql = "SELECT DISTINCT turma FROM groups"
+    cases = [
+        ("COUNT(*)", lambda i: int(get_df(count_sql, t="MA1")["count"].iloc[0]),
+                     lambda i: dal.scalar(count_sql, t="MA1")),
+        ("uma linha", lambda i: get_df(row_sql, c="G042").iloc[0]["turma"],
+                      lambda i: dal.one(row_sql, c="G042").turma),
+        ("lista curta", lambda i: [t for t in get_df(list_sql)["turma"] if t],
+                        lambda i: [r.turma for r in dal.all(list_sql) if r.turma]),
+    ]
+    print(f"{'':<24} {'get_df':>12} {'dal':>12} {'diferença':>10}")
+    for cache_on in (True, False):
+        db.QUERY_CACHE_ENABLED = cache_on
+        calls = args.calls if cache_on else args.calls // 5
+        for label, old, new in cases:
+            old(-1); new(-1)   # aquece (cache, pool, import do pandas)
+            t_old, t_new = _per_call_us(old, calls), _per_call_us(new, calls)
+            print(f"{label + (' (cache)' if cache_on else ' (banco)'):<24} {t_old:9.1f} µs {t_new:9.1f} µs "
+                  f"{(t_new - t_old) / t_old * 100:+9.1f}%")
+
+    sql = "INSERT INTO themes(number, title, category, status) VALUES(NULL, :t, 'Bench', 'livre')"
+    t0 = time.perf_counter()
+    for i in range(args.rows):
+        exec_sql(sql, t=f"loop {i}")
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    dal.bulk_execute(sql, [{"t": f"lote {i}"} for i in range(args.rows)])
+    t_bulk = time.perf_counter() - t0
+    print(f"{args.rows} inserções: exec_sql em laço {t_loop * 1000:.1f} ms, bulk_execute {t_bulk * 1000:.1f} ms "
+          f"({t_loop / t_bulk:.0f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Martela o engine compartilhado a partir de muitas threads (leitura + escrita misturadas),
+# como várias sessões do Streamlit submetendo ao mesmo tempo.
+#   python -m bench.db_concurrency --threads 32 --ops 200
+import argparse, os, sys, tempfile, threading, time
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--ops", type=int, default=200, help="operações por thread")
+    ap.add_argument("--write-ratio", type=float, default=0.3)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_db_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from modules.db import get_engine, get_df, exec_sql
+    from modules.migrations import run_migrations
+
+    engine = get_engine()
+    run_migrations(engine)
+    exec_sql("INSERT INTO groups(code, turma, created_at) VALUES('G00', 'MA6', 'now')")
+
+    errors, latencies = [], []
+    lock = threading.Lock()
+    start_evt = threading.Event()
+
+    def worker(n):
+        start_evt.wait()
+        every = max(1, int(round(1 / args.write_ratio))) if args.write_ratio > 0 else 0
+        for i in range(args.ops):
+            t0 = time.perf_counter()
+            try:
+                if every and i % every == 0:
+                    exec_sql("INSERT INTO submissions(group_code, theme_title, submitted_by, submitted_at) VALUES(:gc, :t, :by, :at)",
+                             gc=f"G{n:03d}", t=f"tema {i}", by=f"thread {n}", at="now")
+                else:
+                    get_df("SELECT COUNT(*) AS n FROM submissions WHERE group_code=:gc", gc=f"G{n:03d}")
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    start_evt.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    writes = int(get_df("SELECT COUNT(*) AS n FROM submissions")["n"].iloc[0])
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"threads={args.threads} ops={len(latencies)} elapsed={elapsed:.2f}s "
+          f"throughput={len(latencies) / elapsed:.0f} ops/s p50={p(.5):.1f}ms p95={p(.95):.1f}ms p99={p(.99):.1f}ms")
+    print(f"linhas gravadas={writes} erros={len(errors)}")
+    for e in errors[:5]:
+        print("  ", e)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# Benchmark de ponta a ponta sobre um banco sintético (bench/synthdata.py, semente fixa): bootstrap, login do
+# aluno, reserva de tema, avaliação, painel, as três exportações CSV, importações TXT/CSV e o rerun completo do
+# app (AppTest) como docente admin e como aluno. Resultado em JSON (p50/p95 por etapa + versão/ambiente);
+# --baseline compara com um JSON anterior e sai com erro se alguma etapa piorou além de --threshold.
+# A partida a frio (processo novo, bench/cold_start.py) também entra, por perfil.
+#   python -m bench.e2e --students 3000 --groups 600 [--repeat 30] [--out e2e.json] [--baseline anterior.json]
+import argparse, io, json, math, os, platform, random, shutil, sqlite3, subprocess, sys, tempfile, time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from bench import cold_start
+from bench.siga_txt import siga_export
+from bench.synthdata import CONFIG_DEFAULTS, TERM, THEMES_PATH, populate, professors
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOISE_MS = 1.0   # diferença absoluta abaixo disso não conta como regressão
+
+def _pct(values: List[float], p: float) -> float:
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    s = sorted(samples)
+    return {"n": len(s), "p50_ms": round(_pct(s, 50), 3), "p95_ms": round(_pct(s, 95), 3),
+            "mean_ms": round(sum(s) / len(s), 3), "min_ms": round(s[0], 3), "max_ms": round(s[-1], 3)}
+
+def measure(fn: Callable[[int], None], n: int, setup: Optional[Callable[[int], object]] = None) -> List[float]:
+    # setup(i) prepara a iteração fora da medição; o que devolver vai para fn
+    out = []
+    for i in range(n):
+        arg = setup(i) if setup else i
+        t0 = time.perf_counter()
+        fn(arg)
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+def _git_rev() -> str:
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                      stderr=subprocess.DEVNULL).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL) != 0
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    # Compara p50 etapa a etapa; devolve as etapas que pioraram além do limite (e do ruído)
+    regressions = []
+    print(f"\ncomparação com {baseline['meta']['version']} ({baseline['meta']['started_at']}), limite +{threshold:.0%}")
+    for step, cur in current["steps"].items():
+        old = baseline["steps"].get(step)
+        if old is None:
+            print(f"  {step:<34} {cur['p50_ms']:10.2f} ms   (nova)")
+            continue
+        delta = cur["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0.0
+        worse = delta > threshold and cur["p50_ms"] - old["p50_ms"] > NOISE_MS
+        if worse:
+            regressions.append(step)
+        print(f"  {step:<34} {old['p50_ms']:10.2f} -> {cur['p50_ms']:10.2f} ms  {delta:+7.1%}{'  REGRESSÃO' if worse else ''}")
+    return regressions
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=3000)
+    ap.add_argument("--groups", type=int, default=600)
+    ap.add_argument("--professors", type=int, default=8)
+    ap.add_argument("--file-kb", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=30, help="iterações das etapas rápidas")
+    ap.add_argument("--repeat-heavy", type=int, default=5, help="iterações de bootstrap, exportações, importações e reruns")
+    ap.add_argument("--no-app", action="store_true", help="pula o rerun completo do app (AppTest)")
+    ap.add_argument("--out", default=None, help="JSON de saída (padrão: data/bench/e2e_<versão>.json)")
+    ap.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparar")
+    ap.add_argument("--threshold", type=float, default=0.2, help="piora relativa do p50 tolerada (0.2 = 20%%)")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from modules.db import get_engine, get_query_cache
+    from modules.dashboard import read_counters, totals
+    from modules.evaluations import save_evaluation
+    from modules.exports import REPORTS, write_export
+    from modules.groups import student_context
+    from modules.import_csv import import_students_csv, read_roster_csv
+    from modules.import_txt import import_txt_files
+    from modules.jobs import job_counts, list_jobs
+    from modules.migrations import bootstrap
+    from modules.db import get_df, write_tx
+    from modules.themes import reserve_theme
+    from sqlalchemy import text
+
+    rnd = random.Random(args.seed)
+    started = datetime.now()
+    steps: Dict[str, Dict] = {}
+
+    def record(name: str, samples: List[float]) -> None:
+        steps[name] = summarize(samples)
+        s = steps[name]
+        print(f"  {name:<34} n={s['n']:<3} p50={s['p50_ms']:9.2f} ms  p95={s['p95_ms']:9.2f} ms")
+
+    print(f"pasta de trabalho: {tmp}")
+    # Bootstrap de um banco vazio (migrações + sementes); cada iteração num arquivo novo
+    record("bootstrap (banco novo)", measure(
+        lambda eng: bootstrap(eng, CONFIG_DEFAULTS, professors(args.professors), THEMES_PATH),
+        args.repeat_heavy, setup=lambda i: get_engine(f"sqlite:///{os.path.join(tmp, f'boot{i}.db')}")))
+
+    engine = get_engine()
+    upload_dir = os.path.join(tmp, "uploads")
+    t0 = time.perf_counter()
+    dataset = populate(engine, students=args.students, groups=args.groups, n_professors=args.professors,
+                       file_kb=args.file_kb, upload_dir=upload_dir, seed=args.seed)
+    record("gerar dados sintéticos", [(time.perf_counter() - t0) * 1000])
+    cache = get_query_cache(engine)
+
+    with engine.connect() as conn:
+        members = conn.execute(text("SELECT s.ra, s.id FROM group_members gm JOIN students s ON s.id = gm.student_id")).all()
+        free_groups = list(conn.execute(text("""SELECT g.code FROM groups g WHERE NOT EXISTS
+                                                 (SELECT 1 FROM themes t WHERE t.reserved_by = g.code)""")).scalars())
+        free_themes = list(conn.execute(text("SELECT title FROM themes WHERE status = 'livre'")).scalars())
+        sub_ids = list(conn.execute(text("SELECT id FROM submissions")).scalars())
+        profs = conn.execute(text("SELECT id, discipline_code, role FROM professors WHERE approved = 1")).all()
+        students = conn.execute(text("SELECT ra, name, turma FROM students ORDER BY id")).all()
+
+    # Login do aluno: mesma leitura do formulário + contexto (grupo, membros, tema, submissão)
+    def login(ra_id):
+        ra, sid = ra_id
+        df = get_df("SELECT id, ra, name, email, turma FROM students WHERE ra=:ra AND active=1", ra=ra)
+        assert not df.empty
+        student_context(engine, sid)
+    record("login do aluno", measure(login, args.repeat, setup=lambda i: rnd.choice(members)))
+
+    # Reserva de tema (compare-and-swap) por um grupo sem tema; a liberação fica fora da medição
+    def release(title):
+        with write_tx(engine) as conn:
+            conn.execute(text("UPDATE themes SET status='livre', reserved_by=NULL, reserved_at=NULL WHERE title=:t"), {"t": title})
+    def reserve(pair):
+        assert reserve_theme(engine, *pair).ok
+    pairs = [(rnd.choice(free_groups), rnd.choice(free_themes)) for _ in range(args.repeat)] if free_groups and free_themes else []
+    samples = []
+    for pair in pairs:
+        samples += measure(reserve, 1, setup=lambda i: pair)
+        release(pair[1])
+    if samples:
+        record("reserva de tema", samples)
+
+    # Avaliação: UPSERT de um docente numa submissão qualquer
+    def evaluate(job):
+        sid, (pid, disc, _) = job
+        sc = {k: round(rnd.uniform(5, 10), 1) for k in ("report", "slides", "media", "overall")}
+        save_evaluation(engine, sid, pid, disc, sc, {"overall": "Avaliação do benchmark."})
+    if sub_ids:
+        record("salvar avaliação", measure(evaluate, args.repeat, setup=lambda i: (rnd.choice(sub_ids), rnd.choice(profs))))
+
+    # Painel do docente sem cache (como o primeiro rerun depois de uma escrita)
+    def dashboard(_):
+        totals(read_counters())
+        job_counts(engine)
+        list_jobs(engine)
+    record("painel (sem cache)", measure(dashboard, args.repeat, setup=lambda i: cache and cache.clear()))
+    record("painel (em cache)", measure(dashboard, args.repeat))
+
+    # Exportações CSV: pasta nova a cada iteração (senão o arquivo da versão atual é reaproveitado)
+    for key, report in REPORTS.items():
+        out_dirs = [os.path.join(tmp, "exports", f"{key}{i}") for i in range(args.repeat_heavy)]
+        record(f"exportação CSV – {report.title}", measure(lambda d: write_export(engine, key, "csv", export_dir=d),
+                                                             args.repeat_heavy, setup=lambda i: out_dirs[i]))
+
+    # Importações: metade da pauta já conhecida (turma existente), metade nova; conteúdo novo a cada iteração
+    turmas = sorted({t for _, _, t in students})
+    def txt_files(i):
+        known = [(f"RA{ra}", name) for ra, name, t in students if t == turmas[i % len(turmas)]][:200]
+        new = [(f"RA{90000000 + i * 1000 + j:08d}", f"ALUNO NOVO {i} {j}") for j in range(len(known))]
+        content = siga_export(turmas[i % len(turmas)].replace("ECO-", ""), "IND" if i % 2 == 0 else "EBCII",
+                              students=known + new)
+        return [(f"pauta_{i}.txt", io.BytesIO(content.encode("latin-1")))]
+    record("importação TXT (pauta de 400)", measure(
+        lambda files: import_txt_files(engine, files, TERM, imported_by="bench", workers=1, upload_dir=upload_dir),
+        args.repeat_heavy, setup=txt_files))
+    def roster_csv(i):
+        lines = ["RA,Nome,email,Turma"]
+        lines += [f"{ra},{name}{' ALTERADO' if j % 10 == 0 else ''},,{t}" for j, (ra, name, t) in enumerate(students[:1000])]
+        lines += [f"{80000000 + i * 1000 + j:08d},Aluno CSV {i} {j},,{turmas[0]}" for j in range(200)]
+        return read_roster_csv(io.StringIO("\n".join(lines) + "\n"))
+    record("importação CSV (1200 linhas)", measure(lambda df: import_students_csv(engine, df),
+                                                   args.repeat_heavy, setup=roster_csv))
+
+    # Rerun completo do app: o script inteiro, todas as abas (a primeira execução inclui imports/compilação)
+    if not args.no_app:
+        try:
+            from streamlit.testing.v1 import AppTest
+        except ImportError:
+            print("  streamlit indisponível: rerun do app não medido")
+        else:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                admin = next(p for p in profs if p[2] == "admin")
+                ra, sid = members[0]
+                with engine.connect() as conn:
+                    name, turma = conn.execute(text("SELECT name, turma FROM students WHERE id=:i"), {"i": sid}).one()
+                sessions = {
+                    "rerun do app – docente admin": {"who": "docente", "id": admin[0], "name": "Benchmark",
+                                                     "email": "docente00@pucsp.br", "role": "admin", "disc": admin[1]},
+                    "rerun do app – aluno": {"who": "aluno", "id": sid, "ra": ra, "name": name, "email": "", "turma": turma},
+                }
+                for label, auth in sessions.items():
+                    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+                    at.session_state["auth"] = auth
+                    def rerun(_):
+                        at.run()
+                        if at.exception:
+                            raise RuntimeError(at.exception[0].value)
+                    record(label, measure(rerun, args.repeat_heavy))
+            finally:
+                os.chdir(cwd)
+            # Processo novo a cada amostra: imports do app + bootstrap + primeira renderização
+            app_dir = cold_start.copy_tree(os.path.join(tmp, "app"))
+            for profile, auth in cold_start.sessions(engine).items():
+                samples = cold_start.measure(app_dir, os.environ["APP_DB_URL"], auth, args.repeat_heavy)
+                record(f"partida a frio – {profile}", [x["ms"] for x in samples])
+
+    result = {
+        "meta": {"version": _git_rev(), "started_at": started.isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "args": vars(args)},
+        "dataset": asdict(dataset),
+        "steps": steps,
+    }
+    out = args.out or os.path.join("data", "bench", f"e2e_{result['meta']['version']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    print(f"resultado: {out}")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} etapa(s) pioraram: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# PDFs de feedback por grupo (modules/feedback.generate_feedback): lote no próprio processo x pool de processos,
+# e nova geração sem mudança (tudo pulado) / com uma avaliação alterada (só aquele grupo).
+#   python -m bench.feedback_pdfs --groups 200 --workers 4
+import argparse, os, sqlite3, sys, tempfile, time
+
+def _seed(db_path: str, n_groups: int) -> None:
+    comment = "Boa delimitação do mercado e uso adequado dos indicadores de concentração. "
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO professors(name, email, discipline_code, approved) VALUES(?, ?, ?, 1)",
+                         [("DOCENTE IND", "ind@bench", "IND"), ("DOCENTE EBC", "ebc@bench", "EBCII"),
+                          ("DOCENTE IND 2", "ind2@bench", "IND")])
+        profs = conn.execute("SELECT id, discipline_code FROM professors WHERE email LIKE '%@bench'").fetchall()
+        for i in range(n_groups):
+            code = f"G{i:04d}"
+            gid = conn.execute("INSERT INTO groups(code, turma, created_at) VALUES(?, ?, 'now')", (code, f"T{i % 4}")).lastrowid
+            conn.executemany("INSERT INTO group_members(group_id, student_name) VALUES(?, ?)",
+                             [(gid, f"ALUNO {i}-{k}") for k in range(5)])
+            sid = conn.execute("INSERT INTO submissions(group_code, theme_title, submitted_at) VALUES(?, ?, '2025-11-20')",
+                               (code, f"Tema {i}: concentração e poder de mercado")).lastrowid
+            conn.executemany("""INSERT INTO evaluations(submission_id, instructor_id, discipline_code, score_report, score_slides,
+                                score_media, overall_score, c_report, c_slides, c_media, c_overall, created_at)
+                                VALUES(?, ?, ?, 8, 7.5, 9, 8.2, ?, ?, ?, ?, 'now')""",
+                             [(sid, pid, disc, comment * 4, comment, comment * 2, comment * 3) for pid, disc in profs])
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--groups", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_feedback_")
+    db_path = os.path.join(tmp, "app.db")
+    os.environ["APP_DB_URL"] = f"sqlite:///{db_path}"
+    from modules.db import get_engine
+    from modules.feedback import PARALLEL_MIN_GROUPS, generate_feedback
+    from modules.migrations import run_migrations
+
+    engine = get_engine()
+    run_migrations(engine)
+    _seed(db_path, args.groups)
+    ok = True
+
+    def run(label, out_dir, workers, expect_written):
+        nonlocal ok
+        t0 = time.perf_counter()
+        res = generate_feedback(engine, out_dir, workers=workers)
+        dt = time.perf_counter() - t0
+        print(f"{label:<28} {dt:7.2f}s  gerados={len(res.written):<5} pulados={len(res.unchanged):<5} falhas={len(res.failed)}")
+        if len(res.written) != expect_written or res.failed:
+            ok = False
+
+    run("1 processo", os.path.join(tmp, "serial"), 1, args.groups)
+    if args.workers > 1 and args.groups >= PARALLEL_MIN_GROUPS:
+        # Inclui subir o pool (spawn + import do fpdf2 em cada worker)
+        run(f"pool de {args.workers} processos", os.path.join(tmp, "pool"), args.workers, args.groups)
+    run("sem mudança", os.path.join(tmp, "serial"), 1, 0)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE evaluations SET c_overall = 'Revisado.' WHERE id = (SELECT MIN(id) FROM evaluations)")
+    run("1 avaliação alterada", os.path.join(tmp, "serial"), 1, 1)
+    print(f"  PDFs em {tmp} (cpu_count={os.cpu_count()})")
+    print("  correto" if ok else "  INCORRETO")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Build incremental da galeria (modules/gallery.build_gallery) com itens sintéticos: build completo, rebuild
+# sem mudança, um trabalho alterado e um trabalho novo. Confere que só as páginas afetadas foram regravadas
+# e que o resultado é idêntico ao de um build completo do zero.
+#   python -m bench.gallery_build --items 2000 --categories 8 --page-size 24
+import argparse, filecmp, os, random, sys, tempfile, time
+
+def _items(n: int, categories: int, seed: int):
+    rnd = random.Random(seed)
+    return [{"id": i, "group": f"G{i:04d}", "turma": f"T{i % 6}", "theme": f"Tema {i}",
+             "category": f"Categoria {rnd.randrange(categories)}", "submitted_at": "2025-11-20 10:00:00",
+             "video_link": f"https://example.org/v/{i}" if i % 3 else "",
+             "members": [f"ALUNO {i}-{k}" for k in range(4)]} for i in range(n)]
+
+def _same_tree(a: str, b: str) -> bool:
+    cmp = filecmp.dircmp(a, b, ignore=[".gallery-manifest.json"])
+    if cmp.left_only or cmp.right_only or filecmp.cmpfiles(a, b, cmp.common_files, shallow=False)[1:] != ([], []):
+        return False
+    return all(_same_tree(os.path.join(a, d), os.path.join(b, d)) for d in cmp.common_dirs)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=2000)
+    ap.add_argument("--categories", type=int, default=8)
+    ap.add_argument("--page-size", type=int, default=24)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+    from modules.gallery import build_gallery
+
+    tmp = tempfile.mkdtemp(prefix="bench_gallery_")
+    out = os.path.join(tmp, "public")
+    items = _items(args.items, args.categories, args.seed)
+    ok = True
+
+    def run(label, items, expect_written=None):
+        nonlocal ok
+        t0 = time.perf_counter()
+        res = build_gallery(items, out, page_size=args.page_size)
+        dt = time.perf_counter() - t0
+        print(f"{label:<22} {dt * 1000:8.1f} ms  cartões renderizados={res.cards_rendered:<5} "
+              f"páginas gravadas={res.pages_written:<4} sem mudança={res.pages_unchanged}")
+        if expect_written is not None and res.pages_written > expect_written:
+            print(f"  esperado no máximo {expect_written} página(s) gravada(s)")
+            ok = False
+
+    run("build completo", items)
+    run("sem mudança", items, expect_written=0)
+    items[len(items) // 2] = dict(items[len(items) // 2], theme="Tema alterado")
+    run("1 trabalho alterado", items, expect_written=1)
+    # Novo trabalho: página da categoria (e as seguintes, que deslocam) + índice com as contagens
+    new = dict(items[0], id=args.items, group="GNEW")
+    cat = [it for it in items if it["category"] == new["category"]]
+    run("1 trabalho novo", items + [new], expect_written=2 + len(cat) // args.page_size)
+
+    fresh = os.path.join(tmp, "fresh")
+    build_gallery(items + [new], fresh, page_size=args.page_size)
+    same = _same_tree(out, fresh)
+    print(f"  igual a um build do zero: {same}")
+    ok = ok and same
+    print("  correto" if ok else "  INCORRETO")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
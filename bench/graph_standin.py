@@ -0,0 +1,150 @@
+# Servidor HTTP local que imita o pedaço do Microsoft Graph usado por modules/sharepoint.py.
+# Guarda os arquivos em memória (self.files) e pode injetar falhas (fail_next, fail_chunks) para exercitar
+# retry e retomada das sessões de upload (createUploadSession + PUT com Content-Range).
+import itertools, json, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+SITE_ID = "standin-site"
+DRIVE_ID = "standin-drive"
+DRIVE_NAME = "Documentos Compartilhados"
+
+class GraphStandIn:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, simple_upload_max: int = 4 * 1024 * 1024):
+        self.simple_upload_max = simple_upload_max
+        self.files = {}
+        self.requests = []
+        self.connections = 0       # conexões TCP aceitas (keep-alive => poucas)
+        self.fail_next = 0
+        self.fail_chunks = set()   # índices globais de PUT de bloco que devolvem 503 (conexão caída)
+        self.chunk_delay = 0.0     # s de espera antes de aceitar cada bloco (rede lenta)
+        self.range_conflicts = 0   # PUTs de bloco recusados com 416 (intervalo sobreposto/fora de ordem)
+        self.sessions = {}         # id -> {"path", "total", "data": bytearray}
+        self.chunk_puts = []       # (session_id, start, end) de cada bloco aceito
+        self._chunk_counter = itertools.count()
+        self._session_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with standin.lock:
+                    standin.connections += 1
+
+            def _reply(self, code, payload=None):
+                body = json.dumps(payload or {}).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                n = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(n) if n else b""
+
+            def _should_fail(self):
+                with standin.lock:
+                    standin.requests.append((self.command, self.path))
+                    if standin.fail_next > 0:
+                        standin.fail_next -= 1
+                        return True
+                return False
+
+            def do_GET(self):
+                if self._should_fail():
+                    return self._reply(503, {"error": {"code": "serviceNotAvailable"}})
+                path = unquote(self.path)
+                m = re.match(r"^/upload/(\d+)$", path)
+                if m:
+                    sess = standin.sessions.get(int(m.group(1)))
+                    if not sess:
+                        return self._reply(404, {"error": {"code": "itemNotFound"}})
+                    end = "" if sess["total"] is None else sess["total"] - 1
+                    return self._reply(200, {"nextExpectedRanges": [f"{len(sess['data'])}-{end}"]})
+                if re.match(r"^/v1\.0/sites/[^/]+/drives$", path):
+                    return self._reply(200, {"value": [{"id": DRIVE_ID, "name": DRIVE_NAME}]})
+                if re.match(r"^/v1\.0/sites/[^/]+:/", path):
+                    return self._reply(200, {"id": SITE_ID})
+                self._reply(404, {"error": {"code": "itemNotFound"}})
+
+            def do_POST(self):
+                self._body()
+                if self._should_fail():
+                    return self._reply(503, {"error": {"code": "serviceNotAvailable"}})
+                m = re.match(r"^/v1\.0/sites/[^/]+/drives/[^/]+/root:/(.+):/createUploadSession$", unquote(self.path))
+                if not m:
+                    return self._reply(404, {"error": {"code": "itemNotFound"}})
+                with standin.lock:
+                    sid = next(standin._session_ids)
+                    standin.sessions[sid] = {"path": m.group(1), "total": None, "data": bytearray()}
+                host, port = standin.server.server_address[:2]
+                self._reply(200, {"uploadUrl": f"http://{host}:{port}/upload/{sid}", "nextExpectedRanges": ["0-"]})
+
+            def _put_chunk(self, sid, body):
+                sess = standin.sessions.get(sid)
+                if not sess:
+                    return self._reply(404, {"error": {"code": "itemNotFound"}})
+                if self.headers.get("Authorization"):
+                    return self._reply(401, {"error": {"code": "unauthenticated", "message": "uploadUrl não aceita token"}})
+                m = re.match(r"^bytes (\d+)-(\d+)/(\d+)$", self.headers.get("Content-Range", ""))
+                if not m:
+                    return self._reply(400, {"error": {"code": "invalidRange"}})
+                start, end, total = map(int, m.groups())
+                if standin.chunk_delay:
+                    time.sleep(standin.chunk_delay)
+                with standin.lock:
+                    n = next(standin._chunk_counter)
+                    if n in standin.fail_chunks:
+                        return self._reply(503, {"error": {"code": "serviceNotAvailable"}})
+                    if start != len(sess["data"]) or end - start + 1 != len(body):
+                        standin.range_conflicts += 1
+                        return self._reply(416, {"error": {"code": "invalidRange"},
+                                                 "nextExpectedRanges": [f"{len(sess['data'])}-"]})
+                    sess["total"] = total
+                    sess["data"] += body
+                    standin.chunk_puts.append((sid, start, end))
+                    if len(sess["data"]) >= total:
+                        standin.files[sess["path"]] = bytes(sess["data"])
+                        del standin.sessions[sid]
+                        return self._reply(201, {"name": sess["path"].rsplit("/", 1)[-1], "size": total})
+                self._reply(202, {"nextExpectedRanges": [f"{len(sess['data'])}-{total - 1}"]})
+
+            def do_PUT(self):
+                body = self._body()
+                m = re.match(r"^/upload/(\d+)$", self.path)
+                if m:
+                    return self._put_chunk(int(m.group(1)), body)
+                if self._should_fail():
+                    return self._reply(503, {"error": {"code": "serviceNotAvailable"}})
+                m = re.match(r"^/v1\.0/sites/[^/]+/drives/[^/]+/root:/(.+):/content$", unquote(self.path))
+                if not m:
+                    return self._reply(404, {"error": {"code": "itemNotFound"}})
+                if len(body) > standin.simple_upload_max:
+                    return self._reply(413, {"error": {"code": "requestTooLarge"}})
+                with standin.lock:
+                    standin.files[m.group(1)] = body
+                self._reply(201, {"name": m.group(1).rsplit("/", 1)[-1], "size": len(body)})
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def graph_base(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1.0"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,53 @@
+# Custo da instrumentação (modules/perf.py) no caminho quente: get_df servido pelo cache, get_df indo ao banco,
+# exec_sql e uma seção vazia, com a coleta desligada e ligada. Desligada deve ficar no ruído da medição.
+#   python -m bench.perf_overhead --calls 20000
+import argparse, itertools, os, sys, tempfile, time
+
+def _per_call_us(fn, calls: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        best = min(best, time.perf_counter() - t0)
+    return best / calls * 1e6
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=20000)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_perf_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from modules import perf
+    from modules.db import exec_sql, get_df, get_engine
+    from modules.migrations import run_migrations
+    run_migrations(get_engine())
+    exec_sql("INSERT INTO groups(code, turma, created_by, created_at) VALUES('G01', 'MA1', 'bench', 'now')")
+
+    ids = itertools.count()
+    def empty_section(i):
+        with perf.section("bench"):
+            pass
+    cases = [
+        ("get_df (cache)", args.calls, lambda i: get_df("SELECT code, turma FROM groups WHERE turma = :t", t="MA1")),
+        ("get_df (banco)", args.calls // 10, lambda i: get_df("SELECT code, turma FROM groups WHERE id = :i", i=next(ids))),
+        ("exec_sql", args.calls // 20, lambda i: exec_sql("UPDATE groups SET created_by = :b WHERE code = 'G01'", b=str(i))),
+        ("seção vazia", args.calls * 10, empty_section),
+    ]
+    print(f"{'':<16} {'desligado':>12} {'ligado':>12} {'diferença':>10}")
+    for label, calls, fn in cases:
+        fn(-1)   # aquece (cache, pool)
+        perf.set_enabled(False)
+        off = _per_call_us(fn, calls)
+        perf.set_enabled(True)
+        on = _per_call_us(fn, calls)
+        print(f"{label:<16} {off:9.2f} µs {on:9.2f} µs {(on - off) / off * 100:+9.1f}%")
+    perf.set_enabled(False)
+    m = perf.stats()
+    print(f"eventos no ring buffer: {sum(q['n'] for q in m['queries'])} consultas, "
+          f"{sum(s['n'] for s in m['sections'])} seções (limite {perf.RING_SIZE} por tipo)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
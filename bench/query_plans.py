@@ -0,0 +1,177 @@
+# Regressão de planos de consulta: junta todo SQL literal de app.py e modules/*.py, roda EXPLAIN QUERY PLAN
+# num banco sintético grande (com ANALYZE) e falha se alguma consulta cair em varredura completa de tabela.
+#   python -m bench.query_plans --scale 1 [--no-analyze] [-v]
+import argparse, ast, os, random, re, sqlite3, sys, tempfile
+from typing import Dict, Iterator, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE\s+INTO)\s", re.IGNORECASE)
+PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|INNER|GROUP|ORDER|LIMIT|USING)\b)([A-Za-z_]\w*))?",
+                         re.IGNORECASE)
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+CTE_NAME = re.compile(r"(?:\bWITH|,)\s+([A-Za-z_]\w*)\s+AS\s*\(", re.IGNORECASE)
+
+# Tabelas pequenas por natureza (dezenas de linhas): varrer é o plano certo
+SMALL_TABLES = {"config", "disciplines", "professors", "table_versions", "dashboard_counters", "schema_version",
+                "offerings", "roster_import"}
+# Consultas que leem a tabela inteira de propósito (relatórios/exportações, carga do importador CSV,
+# recontagem do painel): início do SQL normalizado -> motivo. Só o laço externo (primeiro SCAN do plano)
+# é liberado; varredura dentro do laço (tabela interna do join, subconsulta correlacionada) continua falhando.
+FULL_READ_OK: Dict[str, str] = {
+    "SELECT ra, name, email, turma FROM students": "importador CSV compara a pauta com todos os alunos",
+    "WITH first_eval AS (": "relatório Por Aluno",
+    "SELECT g.code AS Grupo,": "relatório Por Grupo",
+    "SELECT p.name AS Docente,": "relatório Por Docente",
+    "SELECT s.id, s.group_code, COALESCE(g.turma, ''), s.theme_title,": "lista de submissões do workbench de avaliação",
+    "SELECT g.code AS group_code, COALESCE(g.turma, '') AS turma,": "recontagem completa do painel",
+    "SELECT turma, COUNT(*), SUM(reserved)": "recontagem completa do painel",
+    "INSERT INTO group_progress(group_code, turma, reserved, submitted, evaluated)": "reconstrução do painel",
+    "DELETE FROM group_progress": "reconstrução do painel",
+    "DELETE FROM dashboard_counters": "reconstrução do painel",
+    "SELECT s.id, s.group_code, COALESCE(s.theme_title, ''), AVG(e.overall_score), s.approved": "candidatas à galeria (admin)",
+    "SELECT s.group_code, COALESCE(g.turma, ''), COALESCE(s.theme_title, ''), COALESCE(s.submitted_at, ''),": "PDFs de feedback (todas as avaliações)",
+    "SELECT id, report_path, slides_path, zip_path, media_file_path,": "janitor confere uploads/ contra todas as submissões",
+    "SELECT local_path FROM upload_jobs WHERE status IN": "janitor: arquivos de backups ainda não concluídos",
+    "SELECT group_code, SUM(COALESCE(report_size, 0)": "janitor recalcula o ledger de armazenamento",
+    "SELECT group_code, committed_bytes FROM storage_ledger": "janitor recalcula o ledger de armazenamento",
+    "UPDATE storage_ledger SET reserved_bytes = 0": "janitor expira reservas (uma linha por grupo)",
+    "SELECT group_code, committed_bytes, CASE": "uso por grupo no Admin (uma linha por grupo)",
+    "SELECT id, name, turma FROM students": "backfill de group_members.student_id no bootstrap",
+}
+
+def _module_constants(tree: ast.Module) -> Dict[str, str]:
+    out = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            for t in node.targets:
+                if isinstance(t, ast.Name):
+                    out[t.id] = node.value.value
+    return out
+
+def collect_sql(paths: List[str]) -> Iterator[Tuple[str, int, str]]:
+    # Strings SQL literais; f-strings têm {CONSTANTE_DO_MÓDULO} expandida e o resto vira parâmetro
+    for path in paths:
+        tree = ast.parse(open(path, encoding="utf-8").read())
+        consts = _module_constants(tree)
+        in_fstring = {id(v) for n in ast.walk(tree) if isinstance(n, ast.JoinedStr) for v in n.values}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in in_fstring:
+                sql = node.value
+            elif isinstance(node, ast.JoinedStr):
+                parts = []
+                for i, v in enumerate(node.values):
+                    if isinstance(v, ast.Constant):
+                        parts.append(v.value)
+                    elif isinstance(v.value, ast.Name) and v.value.id in consts:
+                        parts.append(consts[v.value.id])
+                    else:
+                        parts.append(f":_f{i}")
+                sql = "".join(parts)
+            else:
+                continue
+            if SQL_START.match(sql):
+                yield os.path.relpath(path, ROOT), node.lineno, sql
+
+def _normalized(sql: str) -> str:
+    return " ".join(sql.split())
+
+def _bind(sql: str):
+    sql = re.sub(r"\bIN\s+(:\w+)", r"IN (\1)", sql, flags=re.IGNORECASE)   # bindparam(expanding=True)
+    if "?" in sql and not PARAM.search(sql):
+        return sql, (None,) * sql.count("?")
+    return sql, {name: None for name in PARAM.findall(sql)}
+
+def full_scans(conn: sqlite3.Connection, sql: str) -> Tuple[List[str], List[str]]:
+    sql_b, params = _bind(sql)
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql_b, params)]
+    aliases = {}
+    for table, alias in TABLE_ALIAS.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias:
+            aliases[alias.lower()] = table.lower()
+    ctes = {name.lower() for name in CTE_NAME.findall(sql)}
+    scans = []
+    for detail in plan:
+        m = FULL_SCAN.match(detail)
+        if m and m.group(1).lower() not in ctes:   # SCAN de CTE percorre o resultado intermediário, não uma tabela
+            scans.append(aliases.get(m.group(1).lower(), m.group(1).lower()))
+    return plan, scans
+
+def populate(conn: sqlite3.Connection, scale: float, analyze: bool = True, seed: int = 7) -> None:
+    rnd = random.Random(seed)
+    n = lambda base: max(1, int(base * scale))
+    n_students, n_groups, n_themes = n(20000), n(4000), n(400)
+    turmas = [f"MA{i}" for i in range(1, 13)]
+    conn.executemany("INSERT INTO students(ra, name, email, turma, active) VALUES(?, ?, ?, ?, 1)",
+                     [(f"{i:08d}", f"ALUNO {i}", f"a{i}@pucsp.edu.br", rnd.choice(turmas)) for i in range(n_students)])
+    conn.executemany("INSERT INTO professors(name, email, role, pin, approved, discipline_code) VALUES(?, ?, 'docente', '', 1, ?)",
+                     [(f"PROF {i}", f"p{i}@pucsp.br", rnd.choice(["IND", "EBCII"])) for i in range(40)])
+    conn.executemany("INSERT INTO offerings(discipline_id, term, turma) VALUES(?, '2025.2', ?)",
+                     [(d, t) for d in (1, 2) for t in turmas])
+    conn.executemany("INSERT INTO enrollments(student_id, offering_id, active) VALUES(?, ?, 1)",
+                     [(i + 1, rnd.randint(1, 2 * len(turmas))) for i in range(n_students)])
+    conn.executemany("INSERT INTO groups(code, turma, created_at) VALUES(?, ?, '2025-09-01')",
+                     [(f"G{i:05d}", rnd.choice(turmas)) for i in range(n_groups)])
+    conn.executemany("INSERT INTO group_members(group_id, student_name) VALUES(?, ?)",
+                     [(g + 1, f"ALUNO {g * 4 + k}") for g in range(n_groups) for k in range(4)])
+    conn.executemany("INSERT OR IGNORE INTO themes(number, title, category, status, reserved_by) VALUES(?, ?, 'Outro', ?, ?)",
+                     [(i, f"Tema {i}", "reservado" if i < n_groups else "livre", f"G{i:05d}" if i < n_groups else None)
+                      for i in range(n_themes)])
+    conn.executemany("INSERT INTO submissions(group_code, theme_title, submitted_by, submitted_at) VALUES(?, ?, 'x', '2025-10-01')",
+                     [(f"G{g:05d}", f"Tema {g}") for g in range(0, n_groups, 1)])
+    conn.executemany("INSERT OR IGNORE INTO evaluations(submission_id, instructor_id, discipline_code, overall_score) VALUES(?, ?, ?, 8)",
+                     [(s + 1, rnd.randint(1, 40), d) for s in range(n_groups) for d in ("IND", "EBCII")])
+    conn.executemany("INSERT INTO upload_jobs(local_path, remote_name, status, next_attempt_at) VALUES('x', 'y', ?, 0)",
+                     [(rnd.choice(["concluido"] * 20 + ["pendente", "falhou"]),) for _ in range(n(10000))])
+    conn.executemany("INSERT INTO roster_imports(sha256, file_name) VALUES(?, 'x.txt')", [(f"{i:064x}",) for i in range(n(200))])
+    if analyze:
+        conn.execute("ANALYZE")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", type=float, default=1.0, help="multiplica o tamanho do banco sintético")
+    ap.add_argument("--no-analyze", action="store_true", help="sem sqlite_stat1 (como o banco do app em produção)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="mostra o plano de todas as consultas")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_plans_")
+    db_path = os.path.join(tmp, "app.db")
+    os.environ["APP_DB_URL"] = f"sqlite:///{db_path}"
+    from modules.db import get_engine
+    from modules.migrations import run_migrations
+    run_migrations(get_engine())
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("BEGIN")
+    populate(conn, args.scale, analyze=not args.no_analyze)
+    conn.execute("COMMIT")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS roster_import(ra TEXT PRIMARY KEY, name TEXT NOT NULL)")
+
+    paths = [os.path.join(ROOT, "app.py")] + sorted(
+        os.path.join(ROOT, "modules", f) for f in os.listdir(os.path.join(ROOT, "modules")) if f.endswith(".py"))
+    checked, failures = 0, []
+    for where, line, sql in collect_sql(paths):
+        norm = _normalized(sql)
+        try:
+            plan, scans = full_scans(conn, sql)
+        except sqlite3.Error as e:
+            failures.append((where, line, norm, f"erro no EXPLAIN: {e}"))
+            continue
+        checked += 1
+        if scans and any(norm.startswith(prefix) for prefix in FULL_READ_OK):
+            scans = scans[1:]
+        bad = [t for t in scans if t not in SMALL_TABLES]
+        if bad:
+            failures.append((where, line, norm, "varredura completa: " + ", ".join(sorted(set(bad)))))
+        if args.verbose or bad:
+            print(f"{where}:{line}  {norm[:110]}")
+            for detail in plan:
+                print(f"     {detail}")
+    print(f"{checked} consultas verificadas, {len(failures)} com problema")
+    for where, line, norm, why in failures:
+        print(f"  {where}:{line}: {why}\n      {norm[:140]}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
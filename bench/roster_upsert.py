@@ -0,0 +1,92 @@
+# Matrícula de uma pauta (modules/import_txt.upsert_students_and_enroll): versão em conjunto
+# (tabela temporária + INSERT ... ON CONFLICT) contra o caminho antigo, linha a linha.
+#   python -m bench.roster_upsert --students 5000
+import argparse, os, sys, tempfile, time
+
+from sqlalchemy import text
+
+def legacy_upsert_students_and_enroll(engine, term, disciplina_code, turma, students):
+    # Caminho anterior, mantido aqui só como referência de desempenho (até 5 comandos por aluno)
+    with engine.begin() as conn:
+        did = conn.execute(text("SELECT id FROM disciplines WHERE code=:c"), {"c": disciplina_code}).scalar()
+        if not did:
+            conn.execute(text("INSERT INTO disciplines(code,name) VALUES(:c,:n)"),
+                         {"c": disciplina_code, "n": "Economia Industrial" if disciplina_code=="IND" else "Economia Brasileira II"})
+            did = conn.execute(text("SELECT id FROM disciplines WHERE code=:c"), {"c": disciplina_code}).scalar()
+        oid = conn.execute(text("""SELECT id FROM offerings WHERE discipline_id=:d AND term=:t AND turma=:u"""),
+                           {"d": did, "t": term, "u": turma}).scalar()
+        if not oid:
+            conn.execute(text("""INSERT INTO offerings(discipline_id,term,turma) VALUES(:d,:t,:u)"""),
+                         {"d": did, "t": term, "u": turma})
+            oid = conn.execute(text("SELECT id FROM offerings WHERE discipline_id=:d AND term=:t AND turma=:u"),
+                               {"d": did, "t": term, "u": turma}).scalar()
+        for ra, name in students:
+            sid = conn.execute(text("SELECT id FROM students WHERE ra=:ra"), {"ra": ra}).scalar()
+            if not sid:
+                conn.execute(text("INSERT INTO students(ra,name,turma,active) VALUES(:ra,:n,:tu,1)"),
+                             {"ra": ra, "n": name, "tu": turma})
+                sid = conn.execute(text("SELECT id FROM students WHERE ra=:ra"), {"ra": ra}).scalar()
+            eid = conn.execute(text("SELECT id FROM enrollments WHERE student_id=:s AND offering_id=:o"),
+                               {"s": sid, "o": oid}).scalar()
+            if not eid:
+                conn.execute(text("INSERT INTO enrollments(student_id,offering_id,active) VALUES(:s,:o,1)"),
+                             {"s": sid, "o": oid})
+            else:
+                conn.execute(text("UPDATE enrollments SET active=1 WHERE id=:e"), {"e": eid})
+    return True
+
+def _fresh_engine(tmp, name):
+    from modules.db import get_engine
+    from modules.migrations import run_migrations
+    engine = get_engine(f"sqlite:///{os.path.join(tmp, name)}")
+    run_migrations(engine)
+    return engine
+
+def _snapshot(engine):
+    with engine.connect() as conn:
+        return (conn.execute(text("SELECT ra, name, turma, active FROM students ORDER BY ra")).all(),
+                conn.execute(text("""SELECT s.ra, o.turma, e.active FROM enrollments e JOIN students s ON s.id = e.student_id
+                                     JOIN offerings o ON o.id = e.offering_id ORDER BY s.ra, o.turma""")).all())
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_roster_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from modules.import_txt import upsert_students_and_enroll
+
+    roster = [(f"RA{i:08d}", f"ALUNO {i:05d}") for i in range(args.students)]
+    # Segunda pauta: metade já conhecida (outra turma), metade nova
+    half = args.students // 2
+    roster_b = roster[half:] + [(f"RA{i:08d}", f"ALUNO {i:05d}") for i in range(args.students, args.students + half)]
+    deactivate = "UPDATE enrollments SET active=0 WHERE id % 10 = 0"
+    runs = [("pauta nova", "MA1", roster, None), ("mesma pauta de novo", "MA1", roster, None),
+            ("outra turma (50% conhecidos)", "MA2", roster_b, None),
+            ("após desativar 10%", "MA1", roster, deactivate)]
+
+    results = {}
+    for label, fn in (("linha a linha", legacy_upsert_students_and_enroll), ("em conjunto", upsert_students_and_enroll)):
+        engine = _fresh_engine(tmp, f"{'legacy' if fn is legacy_upsert_students_and_enroll else 'set'}.db")
+        print(f"== {label}")
+        for run_label, turma, students, before in runs:
+            if before:
+                with engine.begin() as conn:
+                    conn.execute(text(before))
+            t0 = time.perf_counter()
+            out = fn(engine, "2025.2", "IND", turma, students)
+            elapsed = time.perf_counter() - t0
+            extra = ""
+            if out is not True:
+                extra = (f"  novos={len(out.new_students)} matriculados={len(out.enrolled)} "
+                         f"reativados={len(out.reactivated)} inalterados={len(out.unchanged)}")
+            print(f"   {run_label:<30} {elapsed * 1000:8.1f} ms{extra}")
+        results[label] = _snapshot(engine)
+
+    same = results["linha a linha"] == results["em conjunto"]
+    print(f"mesmo resultado no banco: {'sim' if same else 'NÃO'}")
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
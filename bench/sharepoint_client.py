@@ -0,0 +1,46 @@
+# Lote de uploads pelo GraphClient compartilhado: conta aquisições de token e conexões TCP
+# abertas no Graph local (esperado: 1 token e ~1 conexão, não N de cada).
+#   python -m bench.sharepoint_client --files 50
+import argparse, os, sys, tempfile, time
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=50)
+    ap.add_argument("--size-kb", type=int, default=64)
+    args = ap.parse_args(argv)
+
+    from bench.graph_standin import GraphStandIn, DRIVE_NAME
+    from modules.sharepoint import SharePointSettings, get_client
+
+    tmp = tempfile.mkdtemp(prefix="bench_sp_client_")
+    paths = []
+    for i in range(args.files):
+        path = os.path.join(tmp, f"f{i}.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(args.size_kb * 1024))
+        paths.append(path)
+
+    fetches = []
+    def local_token():
+        fetches.append(time.time())
+        return {"access_token": "token-local", "expires_in": 3600}
+
+    with GraphStandIn() as graph:
+        settings = SharePointSettings(tenant_id="t", client_id="c", client_secret="s",
+                                      site_url="https://contoso.sharepoint.com/sites/x", drive_name=DRIVE_NAME,
+                                      graph_base=graph.graph_base)
+        client = get_client(settings, local_token)
+        t0 = time.perf_counter()
+        for i, path in enumerate(paths):
+            client.upload(path, f"lote/f{i}.bin")
+        elapsed = time.perf_counter() - t0
+        lookups = sum(1 for m, p in graph.requests if m == "GET")
+        ok = len(graph.files) == args.files
+        print(f"arquivos={args.files} elapsed={elapsed:.2f}s tokens={len(fetches)} conexoes_tcp={graph.connections} "
+              f"lookups_site_drive={lookups}")
+    good = ok and len(fetches) == 1 and graph.connections <= 2 and lookups == 2
+    print("OK" if good else "FALHOU")
+    return 0 if good else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# Drena a fila upload_jobs contra o Graph local (bench/graph_standin.py), com falhas injetadas,
+# e confere que todo arquivo chegou íntegro.
+#   python -m bench.sharepoint_queue --files 40 --workers 4 --fail 10
+import argparse, os, sys, tempfile, time
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=40)
+    ap.add_argument("--size-kb", type=int, default=256)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--fail", type=int, default=10, help="requisições iniciais respondidas com 503")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_sp_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from bench.graph_standin import GraphStandIn, DRIVE_NAME
+    from modules.db import get_engine
+    from modules.jobs import UploadWorkerPool, enqueue_upload, job_counts
+    from modules.migrations import run_migrations
+    from modules.sharepoint import SharePointSettings, upload_file
+
+    engine = get_engine()
+    run_migrations(engine)
+    expected = {}
+    for i in range(args.files):
+        path = os.path.join(tmp, f"arquivo_{i}.bin")
+        data = os.urandom(args.size_kb * 1024)
+        with open(path, "wb") as f:
+            f.write(data)
+        expected[f"Submissoes/G{i:03d}_relatorio.pdf"] = data
+        enqueue_upload(engine, path, f"G{i:03d}_relatorio.pdf", submission_id=i)
+
+    with GraphStandIn() as graph:
+        graph.fail_next = args.fail
+        settings = SharePointSettings(tenant_id="t", client_id="c", client_secret="s",
+                                      site_url="https://contoso.sharepoint.com/sites/x", drive_name=DRIVE_NAME,
+                                      base_folder="Submissoes", graph_base=graph.graph_base)
+        local_token = lambda: {"access_token": "token-local", "expires_in": 3600}
+        uploader = lambda lp, rn, session: upload_file(settings, lp, rn, engine=engine, session=session,
+                                                       token_provider=local_token)
+        pool = UploadWorkerPool(engine, uploader, workers=args.workers, poll_interval=0.05,
+                                base_delay=0.05, max_delay=0.5).start()
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < args.timeout:
+            counts = job_counts(engine)
+            if counts["pendente"] == 0 and counts["enviando"] == 0:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - t0
+        pool.stop()
+        received = dict(graph.files)
+
+    counts = job_counts(engine)
+    ok = counts["concluido"] == args.files and received == expected
+    print(f"jobs={args.files} workers={args.workers} falhas_injetadas={args.fail} elapsed={elapsed:.2f}s status={counts}")
+    print("OK" if ok else "FALHOU: arquivos ausentes ou divergentes")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# Upload em sessão (blocos) contra o Graph local, com conexões "caindo" no meio: confere que cada
+# nova tentativa retoma do último intervalo confirmado (nenhum bloco reenviado do zero) e que o
+# arquivo chega íntegro. Arquivos pequenos continuam no PUT simples. Depois, um upload mais lento que o
+# --lease (cada bloco demora 60% do lease): o save de cada bloco renova o lease, então o job é reservado uma
+# vez só e nenhum segundo worker retoma a mesma sessão em paralelo.
+#   python -m bench.sharepoint_resume --size-mb 64 --drop 3,7,11 [--lease 0.5]
+import argparse, hashlib, os, sys, tempfile, time
+
+def _wait_queue(engine, timeout: float) -> float:
+    from modules.jobs import job_counts
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        counts = job_counts(engine)
+        if counts["pendente"] == 0 and counts["enviando"] == 0:
+            break
+        time.sleep(0.05)
+    return time.perf_counter() - t0
+
+def _slow_upload(engine, tmp: str, lease: float, timeout: float) -> bool:
+    from sqlalchemy import text
+    from bench.graph_standin import GraphStandIn
+    from modules.jobs import UploadWorkerPool, enqueue_upload
+    from modules.sharepoint import CHUNK_SIZE, SharePointSettings, upload_file
+
+    path = os.path.join(tmp, "lento.mp4")
+    data = os.urandom(4 * CHUNK_SIZE)
+    with open(path, "wb") as f:
+        f.write(data)
+    enqueue_upload(engine, path, "G002_media.mp4", submission_id=2)
+    with GraphStandIn() as graph:
+        graph.chunk_delay = lease * 0.6
+        settings = SharePointSettings(tenant_id="t", client_id="c", client_secret="s", site_id="site", drive_id="drive",
+                                      graph_base=graph.graph_base)
+        local_token = lambda: {"access_token": "token-local", "expires_in": 3600}
+        uploader = lambda lp, rn, session: upload_file(settings, lp, rn, session=session, token_provider=local_token)
+        pool = UploadWorkerPool(engine, uploader, workers=2, poll_interval=lease / 10, base_delay=0.05, max_delay=0.2,
+                                lease=lease).start()
+        elapsed = _wait_queue(engine, timeout)
+        pool.stop()
+    with engine.connect() as conn:
+        status, attempts = conn.execute(text("SELECT status, attempts FROM upload_jobs WHERE remote_name = 'G002_media.mp4'")).one()
+    sessions = sum(1 for m, p in graph.requests if m == "POST")
+    ok = (status == "concluido" and attempts == 1 and sessions == 1 and graph.range_conflicts == 0
+          and graph.files.get("G002_media.mp4") == data)
+    print(f"lento: lease={lease:.2f}s upload={elapsed:.2f}s reservas={attempts} sessoes_criadas={sessions} "
+          f"intervalos_sobrepostos={graph.range_conflicts} status={status} reservado_uma_vez={ok}")
+    return ok
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size-mb", type=int, default=64)
+    ap.add_argument("--drop", default="3,7,11", help="índices de blocos que falham com 503")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--lease", type=float, default=0.5, help="lease (s) do caso de upload lento")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_sp_resume_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from bench.graph_standin import GraphStandIn
+    from modules.db import get_engine
+    from modules.jobs import UploadWorkerPool, enqueue_upload, job_counts
+    from modules.migrations import run_migrations
+    from modules.sharepoint import CHUNK_SIZE, SharePointSettings, upload_file
+
+    engine = get_engine()
+    run_migrations(engine)
+    big = os.path.join(tmp, "video.mp4")
+    with open(big, "wb") as f:
+        for _ in range(args.size_mb):
+            f.write(os.urandom(1024 * 1024))
+    small = os.path.join(tmp, "relatorio.pdf")
+    with open(small, "wb") as f:
+        f.write(os.urandom(200 * 1024))
+    enqueue_upload(engine, big, "G001_media.mp4", submission_id=1)
+    enqueue_upload(engine, small, "G001_relatorio.pdf", submission_id=1)
+
+    with GraphStandIn() as graph:
+        graph.fail_chunks = {int(x) for x in args.drop.split(",") if x}
+        settings = SharePointSettings(tenant_id="t", client_id="c", client_secret="s", site_id="site", drive_id="drive",
+                                      graph_base=graph.graph_base)
+        local_token = lambda: {"access_token": "token-local", "expires_in": 3600}
+        uploader = lambda lp, rn, session: upload_file(settings, lp, rn, session=session, token_provider=local_token)
+        pool = UploadWorkerPool(engine, uploader, workers=2, poll_interval=0.05, base_delay=0.05, max_delay=0.2).start()
+        elapsed = _wait_queue(engine, args.timeout)
+        pool.stop()
+
+    def sha(data):
+        return hashlib.sha256(data).hexdigest()
+    with open(big, "rb") as f:
+        big_ok = sha(graph.files.get("G001_media.mp4", b"")) == sha(f.read())
+    with open(small, "rb") as f:
+        small_ok = graph.files.get("G001_relatorio.pdf") == f.read()
+    starts = [start for _, start, _ in graph.chunk_puts]
+    expected_chunks = -(-args.size_mb * 1024 * 1024 // CHUNK_SIZE)
+    no_restart = starts.count(0) == 1 and len(starts) == expected_chunks
+    print(f"arquivo={args.size_mb}MB blocos={len(starts)}/{expected_chunks} quedas={len(graph.fail_chunks)} "
+          f"sessoes_criadas={sum(1 for m, p in graph.requests if m == 'POST')} elapsed={elapsed:.2f}s status={job_counts(engine)}")
+    print(f"integro={big_ok} simples_ok={small_ok} retomou_sem_reenviar={no_restart}")
+    slow_ok = _slow_upload(engine, tmp, args.lease, args.timeout)
+    return 0 if (big_ok and small_ok and no_restart and slow_ok) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+# Gera pautas TXT no formato das exportações do SIGA/PUC lidas por modules/import_txt.parse_puc_txt
+# (cabeçalho com professor/código, disciplina, turma ECO-XXX e uma linha "RAnnnnnnnn NOME" por aluno).
+import random
+
+DISCIPLINES = {"IND": "ECONOMIA INDUSTRIAL", "EBCII": "ECONOMIA BRASILEIRA II"}
+FIRST = ["ANA", "BRUNO", "CARLA", "DANIEL", "EDUARDA", "FELIPE", "GABRIELA", "HENRIQUE", "ISABELA", "JOÃO",
+         "LUÍSA", "MARCELO", "NATÁLIA", "OTÁVIO", "PAULA", "RAFAEL", "SÍLVIA", "TIAGO", "VITÓRIA"]
+LAST = ["ALMEIDA", "BARBOSA", "CARDOSO", "DIAS", "ESTEVES", "FERREIRA", "GONÇALVES", "LIMA", "MARTINS",
+        "NOGUEIRA", "OLIVEIRA", "PEREIRA", "RIBEIRO", "SANTOS", "SOUZA", "VIEIRA"]
+
+def siga_export(turma: str, disc: str = "IND", students=None, n: int = 60, first_ra: int = 1,
+                professor: str = "ROLAND VERAS SALDANHA JUNIOR", cod_professor: str = "8722", seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    if students is None:
+        students = [(f"RA{first_ra + i:08d}", f"{rnd.choice(FIRST)} {rnd.choice(LAST)} {rnd.choice(LAST)}") for i in range(n)]
+    lines = [
+        "PONTIFÍCIA UNIVERSIDADE CATÓLICA DE SÃO PAULO",
+        "SIGA - Lista de Presença / Pauta de Alunos",
+        f"Professor {professor}  ",
+        f"Cód.Usuário: {cod_professor}",
+        f"Disciplina: {DISCIPLINES[disc]}",
+        f"ECO-{turma}",
+        "",
+        "RA          NOME",
+    ]
+    for ra, name in students:
+        lines.append(f"{ra}  {name}")
+    lines.append("")
+    lines.append(f"Total de alunos: {len(students)}")
+    return "\r\n".join(lines) + "\r\n"
@@ -0,0 +1,94 @@
+# Quota por grupo (modules/quota.UploadAllowance) com uploads concorrentes em streaming: N threads enviam
+# arquivos para poucos grupos ao mesmo tempo, sem tamanho declarado (reserva bloco a bloco). Confere que nenhum
+# grupo passa do limite, que o envio recusado para no primeiro bloco excedente e mede o custo do ledger.
+#   python -m bench.storage_quota --uploaders 16 --groups 2 --quota-mb 64 --file-mb 12
+import argparse, io, os, sys, tempfile, threading, time
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uploaders", type=int, default=16)
+    ap.add_argument("--groups", type=int, default=2)
+    ap.add_argument("--quota-mb", type=int, default=64)
+    ap.add_argument("--file-mb", type=int, default=12)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_quota_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from sqlalchemy import text
+    from modules.db import get_engine, write_tx
+    from modules.migrations import run_migrations
+    from modules.quota import GRANT_BYTES, MB, QuotaExceeded, UploadAllowance, group_usage
+    from modules.storage import CHUNK_SIZE, store_stream
+
+    engine = get_engine()
+    run_migrations(engine)
+    upload_dir = os.path.join(tmp, "uploads")
+    quota = args.quota_mb * MB
+    payloads = [os.urandom(args.file_mb * MB) for _ in range(args.uploaders)]   # conteúdos distintos (sem dedup)
+
+    t0 = time.perf_counter()
+    for data in payloads[:4]:
+        store_stream(io.BytesIO(data), ".bin", os.path.join(tmp, "plain"))
+    plain = (time.perf_counter() - t0) / 4
+    t0 = time.perf_counter()
+    for data in payloads[4:8]:
+        with UploadAllowance(engine, "SOLO", 1 << 40) as allowance:
+            store_stream(io.BytesIO(data), ".bin", os.path.join(tmp, "solo"), on_chunk=allowance.take)
+    solo = (time.perf_counter() - t0) / 4
+
+    results, lock, start = [], threading.Lock(), threading.Event()
+
+    def upload(i):
+        group = f"G{i % args.groups}"
+        allowance = UploadAllowance(engine, group, quota)
+        written = [0]
+
+        def on_chunk(n):
+            allowance.take(n)
+            written[0] += n
+
+        start.wait()
+        t = time.perf_counter()
+        try:
+            sf = store_stream(io.BytesIO(payloads[i]), ".bin", upload_dir, on_chunk=on_chunk)
+            with write_tx(engine) as conn:
+                conn.execute(text("INSERT INTO submissions(group_code, report_path, report_size) VALUES(:g, :p, :s)"),
+                             {"g": group, "p": sf.path, "s": sf.size})
+                allowance.release(conn=conn)
+            allowance.released()
+            status = "aceito"
+        except QuotaExceeded:
+            status = "recusado"
+        finally:
+            allowance.release()
+        with lock:
+            results.append((group, status, written[0], time.perf_counter() - t))
+
+    threads = [threading.Thread(target=upload, args=(i,)) for i in range(args.uploaders)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    start.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    ok = True
+    for g in sorted({r[0] for r in results}):
+        committed, reserved = group_usage(engine, g)
+        accepted = sum(1 for r in results if r[0] == g and r[1] == "aceito")
+        print(f"  {g}: aceitos={accepted} gravados={committed / MB:.0f} MB de {args.quota_mb} MB reservas pendentes={reserved}")
+        ok = ok and committed <= quota and reserved == 0 and committed == accepted * args.file_mb * MB
+    refused = [r for r in results if r[1] == "recusado"]
+    # Recusado para antes de gravar o arquivo inteiro: no máximo o que ainda cabia na quota + 1 bloco
+    worst = max((r[2] for r in refused), default=0)
+    ok = ok and all(r[2] < args.file_mb * MB for r in refused) and not os.listdir(os.path.join(upload_dir, "tmp"))
+    print(f"uploads={args.uploaders} em {elapsed:.2f}s  aceitos={len(results) - len(refused)} recusados={len(refused)} "
+          f"(maior parcial gravada antes da recusa: {worst / MB:.0f} MB de {args.file_mb} MB, bloco={CHUNK_SIZE // MB} MB)")
+    print(f"  arquivo de {args.file_mb} MB sozinho: sem ledger {plain * 1000:.0f} ms, com ledger {solo * 1000:.0f} ms "
+          f"({-(-args.file_mb * MB // GRANT_BYTES)} reservas no banco)")
+    print("  correto" if ok else "  INCORRETO")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
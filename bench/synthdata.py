@@ -0,0 +1,185 @@
+# Gerador de dados sintéticos (semente fixa = mesmo banco) sobre o esquema real: migrações + sementes do bootstrap,
+# alunos matriculados pelas pautas (upsert_students_and_enroll), grupos de MIN a MAX integrantes da mesma turma,
+# os temas de data/themes_2025_2.json reservados por compare-and-swap, submissões com arquivos de verdade no
+# armazenamento por conteúdo e avaliações de vários docentes por disciplina. Triggers mantêm painel/ledger/cache.
+#   python -m bench.synthdata --db /tmp/synth.db --students 3000 --groups 600 [--seed 7]
+#   APP_DB_URL=sqlite:////tmp/synth.db streamlit run app.py
+import argparse, io, os, random, sys, time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from bench.siga_txt import FIRST, LAST
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THEMES_PATH = os.path.join(ROOT, "data", "themes_2025_2.json")
+TERM = "2025/2"
+CONFIG_DEFAULTS = {"TERM": TERM, "MIN_GROUP": 4, "MAX_GROUP": 5, "RESERVE_DEADLINE": "2025-10-15T23:59:00",
+                   "PUBLISH_MIN_SCORE": 7.0, "MAX_GROUP_TOTAL_MB": 400}
+START = datetime(2025, 9, 1, 8, 0, 0)   # datas derivadas da semente, não do relógio
+COMMENTS = ["Bom recorte do tema.", "Faltou discutir a regulação do setor.", "Dados bem organizados.",
+            "Conclusão apressada.", "Ótima apresentação – clara e objetiva.", "Rever as referências.",
+            "Vídeo curto demais para o conteúdo.", "Boa articulação com a literatura de organização industrial."]
+SUBMISSION_SQL = """
+    INSERT INTO submissions(group_code, theme_title, report_path, slides_path, zip_path, media_link, media_file_path, consent,
+                            submitted_by, submitted_at, report_size, report_sha256, slides_size, slides_sha256,
+                            zip_size, zip_sha256, media_size, media_sha256)
+    VALUES(:gc, :theme, :rp, :sp, :zp, :ml, '', :cons, :by, :at, :rs, :rh, :ss, :sh, :zs, :zh, NULL, NULL)
+"""
+
+@dataclass
+class SynthSummary:
+    seed: int
+    students: int = 0
+    turmas: int = 0
+    groups: int = 0
+    professors: int = 0
+    themes: int = 0
+    reserved: int = 0
+    submissions: int = 0
+    files: int = 0
+    file_bytes: int = 0
+    evaluations: int = 0
+    seconds: float = 0.0
+
+def professors(n: int) -> List[Tuple[str, str, str, str, int, str]]:
+    # Mesmo formato de SEED_PROFESSORS (app.py): metade IND, metade EBCII; o primeiro é admin
+    return [(f"DOCENTE SINTÉTICO {i:02d}", f"docente{i:02d}@pucsp.br", "admin" if i == 0 else "docente",
+             "1234" if i == 0 else "", 1, "IND" if i % 2 == 0 else "EBCII") for i in range(n)]
+
+def _name(rnd: random.Random) -> str:
+    return f"{rnd.choice(FIRST)} {rnd.choice(LAST)} {rnd.choice(LAST)}"
+
+def _dummy_file(rnd: random.Random, kb: int) -> io.BytesIO:
+    # Tamanho variando +-50% em torno de kb; conteúdo da semente (mesma semente = mesmos objetos, deduplicados)
+    return io.BytesIO(rnd.randbytes(max(1, int(kb * 1024 * rnd.uniform(0.5, 1.5)))))
+
+def populate(engine, students: int = 3000, groups: int = 600, n_professors: int = 8, turmas: int = 6,
+             reserved: float = 0.8, submitted: float = 0.9, evaluated: float = 0.7, file_kb: int = 64,
+             upload_dir: str = None, seed: int = 7) -> SynthSummary:
+    # reserved: fração dos temas reservada; submitted: fração dos grupos com tema que submeteu;
+    # evaluated: fração das submissões avaliada (1 a 2 docentes de cada disciplina)
+    from modules.evaluations import SAVE_SQL
+    from modules.db import write_tx
+    from modules.import_txt import upsert_students_and_enroll
+    from modules.migrations import bootstrap
+    from modules.storage import UPLOAD_DIR, store_stream
+    from modules.themes import reserve_theme
+
+    t0 = time.perf_counter()
+    rnd = random.Random(seed)
+    upload_dir = upload_dir or UPLOAD_DIR
+    summary = SynthSummary(seed=seed)
+    bootstrap(engine, CONFIG_DEFAULTS, professors(n_professors), THEMES_PATH)
+
+    # Alunos: uma pauta por turma, matriculada nas duas disciplinas (mesmo caminho do importador TXT)
+    turma_names = [f"ECO-MA{i + 1}" for i in range(turmas)]
+    roster: Dict[str, List[Tuple[str, str]]] = {t: [] for t in turma_names}
+    for i in range(students):
+        roster[turma_names[i % turmas]].append((f"{10000000 + i:08d}", _name(rnd)))
+    with write_tx(engine) as conn:
+        for turma, rows in roster.items():
+            for disc in ("IND", "EBCII"):
+                upsert_students_and_enroll(engine, TERM, disc, turma, rows, conn=conn)
+        ids = dict(conn.execute(text("SELECT ra, id FROM students")).all())
+    summary.students, summary.turmas = students, turmas
+
+    # Grupos de 4 a 5 alunos da mesma turma (ninguém em dois grupos); para quando acabam os alunos
+    pools = {t: rnd.sample(rows, len(rows)) for t, rows in roster.items()}
+    group_rows, member_rows = [], []
+    for g in range(groups):
+        turma = turma_names[g % turmas]
+        size = rnd.randint(CONFIG_DEFAULTS["MIN_GROUP"], CONFIG_DEFAULTS["MAX_GROUP"])
+        if len(pools[turma]) < size:
+            continue
+        code = f"G{g + 1:04d}"
+        members, pools[turma] = pools[turma][:size], pools[turma][size:]
+        group_rows.append({"code": code, "turma": turma, "by": members[0][1],
+                           "at": (START + timedelta(minutes=rnd.randint(0, 20 * 24 * 60))).strftime("%Y-%m-%d %H:%M:%S")})
+        member_rows += [{"code": code, "name": name, "sid": ids[ra]} for ra, name in members]
+    with write_tx(engine) as conn:
+        conn.execute(text("INSERT INTO groups(code, turma, created_by, created_at) VALUES(:code, :turma, :by, :at)"), group_rows)
+        conn.execute(text("""INSERT INTO group_members(group_id, student_name, student_id)
+                             SELECT id, :name, :sid FROM groups WHERE code = :code"""), member_rows)
+        titles = list(conn.execute(text("SELECT title FROM themes ORDER BY number")).scalars())
+        profs = conn.execute(text("SELECT id, discipline_code FROM professors WHERE approved = 1")).all()
+    summary.groups, summary.themes, summary.professors = len(group_rows), len(titles), len(profs)
+
+    # Temas: cada grupo sorteado tenta o seu pelo compare-and-swap do app
+    codes = [g["code"] for g in group_rows]
+    holders = dict(zip(rnd.sample(titles, int(len(titles) * reserved)), rnd.sample(codes, min(len(codes), len(titles)))))
+    for title, code in holders.items():
+        when = START + timedelta(days=rnd.randint(1, 40), seconds=rnd.randint(0, 86399))
+        summary.reserved += reserve_theme(engine, code, title, now=when).ok
+
+    # Submissões: relatório + slides sempre, ZIP às vezes; arquivos gravados como o upload do app
+    names = {m["code"]: m["name"] for m in member_rows}
+    subs = []
+    for title, code in holders.items():
+        if rnd.random() >= submitted:
+            continue
+        files = {}
+        for kind, ext, p, kb in (("r", ".pdf", 1.0, file_kb), ("s", ".pptx", 1.0, file_kb * 2), ("z", ".zip", 0.3, file_kb * 4)):
+            sf = store_stream(_dummy_file(rnd, kb), ext, upload_dir) if rnd.random() < p else None
+            files[kind] = sf
+            if sf is not None:
+                summary.files += 1
+                summary.file_bytes += sf.size
+        subs.append({"gc": code, "theme": title, "cons": int(rnd.random() < 0.8), "by": names[code],
+                     "ml": f"https://youtu.be/{rnd.getrandbits(40):010x}" if rnd.random() < 0.7 else "",
+                     "at": (START + timedelta(days=rnd.randint(41, 60), seconds=rnd.randint(0, 86399))).strftime("%Y-%m-%d %H:%M:%S"),
+                     **{f"{k}p": sf.path if sf else "" for k, sf in files.items()},
+                     **{f"{k}s": sf.size if sf else None for k, sf in files.items()},
+                     **{f"{k}h": sf.sha256 if sf else None for k, sf in files.items()}})
+    with write_tx(engine) as conn:
+        if subs:
+            conn.execute(text(SUBMISSION_SQL), [{"gc": s["gc"], "theme": s["theme"], "rp": s["rp"], "sp": s["sp"], "zp": s["zp"],
+                                                 "ml": s["ml"], "cons": s["cons"], "by": s["by"], "at": s["at"],
+                                                 "rs": s["rs"], "rh": s["rh"], "ss": s["ss"], "sh": s["sh"],
+                                                 "zs": s["zs"], "zh": s["zh"]} for s in subs])
+        sub_ids = list(conn.execute(text("SELECT id FROM submissions ORDER BY id")).scalars())
+    summary.submissions = len(subs)
+
+    # Avaliações: 1 a 2 docentes de cada disciplina por submissão avaliada (mesmo UPSERT de save_evaluation)
+    by_disc = {d: [pid for pid, pd_ in profs if pd_ == d] for d in ("IND", "EBCII")}
+    evals = []
+    for sid in sub_ids:
+        if rnd.random() >= evaluated:
+            continue
+        for disc, pids in by_disc.items():
+            for pid in rnd.sample(pids, min(len(pids), rnd.randint(1, 2))):
+                sc = [round(rnd.uniform(4, 10) * 2) / 2 for _ in range(3)]
+                evals.append({"sid": sid, "iid": pid, "disc": disc, "sr": sc[0], "ss": sc[1], "sm": sc[2],
+                              "os": round(sum(sc) / 3 * 2) / 2, "cr": rnd.choice(COMMENTS), "cs": rnd.choice(COMMENTS),
+                              "cm": "", "co": rnd.choice(COMMENTS),
+                              "at": (START + timedelta(days=rnd.randint(61, 75))).strftime("%Y-%m-%d %H:%M:%S")})
+    if evals:
+        with write_tx(engine) as conn:
+            conn.execute(text(SAVE_SQL), evals)
+    summary.evaluations = len(evals)
+    summary.seconds = round(time.perf_counter() - t0, 3)
+    return summary
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True, help="arquivo SQLite (criado/migrado se não existir)")
+    ap.add_argument("--upload-dir", default="uploads")
+    ap.add_argument("--students", type=int, default=3000)
+    ap.add_argument("--groups", type=int, default=600)
+    ap.add_argument("--professors", type=int, default=8)
+    ap.add_argument("--file-kb", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    from modules.db import get_engine
+    summary = populate(get_engine(), students=args.students, groups=args.groups, n_professors=args.professors,
+                       file_kb=args.file_kb, upload_dir=args.upload_dir, seed=args.seed)
+    for k, v in asdict(summary).items():
+        print(f"{k:<12} {v}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
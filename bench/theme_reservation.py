@@ -0,0 +1,147 @@
+# Corrida pela reserva de temas no instante do RESERVE_DEADLINE: N grupos (threads ou processos) disparam juntos,
+# cada um tentando seus temas preferidos em ordem até conseguir um. Mede vazão/latência e confere:
+# um grupo por tema, um tema por grupo, toda vitória anunciada está no banco e nenhum tema livre sobra
+# enquanto houver grupo sem tema. --legacy roda o UPDATE antigo (sem checar rowcount) para comparação.
+#   python -m bench.theme_reservation --groups 100 --themes 50 [--processes 4] [--legacy]
+import argparse, multiprocessing, os, random, sqlite3, sys, tempfile, threading, time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+LEGACY_SQL = "UPDATE themes SET status='reservado', reserved_by=:gc, reserved_at=:ts WHERE title=:t AND status='livre'"
+
+def _preferences(n_groups: int, n_themes: int, seed: int) -> Dict[str, List[str]]:
+    # Preferências enviesadas para os primeiros temas: poucos temas disputados por muitos grupos
+    rnd = random.Random(seed)
+    titles = [f"Tema {i:03d}" for i in range(n_themes)]
+    return {f"G{g:03d}": sorted(titles, key=lambda t: rnd.random() * (1 + int(t[5:]) / 5)) for g in range(n_groups)}
+
+def _run_groups(groups: List[Tuple[str, List[str]]], legacy: bool, start: threading.Event) -> List[Tuple[str, str, str, float]]:
+    # Cada grupo tenta os temas em ordem; após perder, relê os temas livres (como o rerun da tela do aluno).
+    # Devolve (grupo, tema, status anunciado, latência em s) por tentativa.
+    from sqlalchemy import text
+    from modules.db import get_df, get_engine, write_tx
+    from modules.themes import reserve_theme
+    engine = get_engine()
+    out, lock = [], threading.Lock()
+
+    def one(group_code, prefs):
+        start.wait()
+        while prefs:
+            title = prefs[0]
+            t0 = time.perf_counter()
+            if legacy:
+                with write_tx(engine) as conn:
+                    conn.execute(text(LEGACY_SQL), {"gc": group_code, "t": title,
+                                                    "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+                status, ok = "reservado", True   # o app antigo anunciava sucesso sem olhar o rowcount
+            else:
+                res = reserve_theme(engine, group_code, title)
+                status, ok = res.status, res.ok
+            with lock:
+                out.append((group_code, title, status, time.perf_counter() - t0))
+            if ok or status == "grupo_com_tema":
+                return
+            free = set(get_df("SELECT title, category FROM themes WHERE status='livre'")["title"])
+            prefs = [t for t in prefs[1:] if t in free]
+
+    threads = [threading.Thread(target=one, args=g) for g in groups]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+def _process_main(groups, legacy, barrier, queue):
+    # Imports e conexão antes da barreira; ela solta todos os processos no mesmo instante
+    from modules.db import get_engine
+    import modules.themes  # noqa: F401
+    with get_engine().connect():
+        pass
+    start, out = threading.Event(), []
+    runner = threading.Thread(target=lambda: out.extend(_run_groups(groups, legacy, start)))
+    runner.start()
+    barrier.wait()
+    start.set()
+    runner.join()
+    queue.put(out)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--groups", type=int, default=100)
+    ap.add_argument("--themes", type=int, default=50)
+    ap.add_argument("--processes", type=int, default=0, help="divide os grupos entre N processos (0 = só threads)")
+    ap.add_argument("--legacy", action="store_true", help="UPDATE antigo, sem compare-and-swap")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_themes_")
+    db_path = os.path.join(tmp, "app.db")
+    os.environ["APP_DB_URL"] = f"sqlite:///{db_path}"
+    from modules.dashboard import check_counters
+    from modules.db import get_engine
+    from modules.migrations import run_migrations
+
+    engine = get_engine()
+    run_migrations(engine)
+    prefs = _preferences(args.groups, args.themes, args.seed)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO themes(number, title, category, status) VALUES(?, ?, 'Outro', 'livre')",
+                         [(i, f"Tema {i:03d}") for i in range(args.themes)])
+        conn.executemany("INSERT INTO groups(code, turma, created_at) VALUES(?, 'MA1', 'now')", [(g,) for g in prefs])
+
+    groups = list(prefs.items())
+    t0 = time.perf_counter()
+    if args.processes > 0:
+        ctx = multiprocessing.get_context("spawn")
+        barrier, queue = ctx.Barrier(args.processes + 1), ctx.Queue()
+        procs = [ctx.Process(target=_process_main, args=(groups[i::args.processes], args.legacy, barrier, queue))
+                 for i in range(args.processes)]
+        for p in procs:
+            p.start()
+        barrier.wait()   # todos os processos importados e prontos: dispara junto
+        t0 = time.perf_counter()
+        attempts = [a for _ in procs for a in queue.get()]
+        for p in procs:
+            p.join()
+    else:
+        start, attempts = threading.Event(), []
+        runner = threading.Thread(target=lambda: attempts.extend(_run_groups(groups, args.legacy, start)))
+        runner.start()
+        time.sleep(0.2)
+        t0 = time.perf_counter()
+        start.set()
+        runner.join()
+    elapsed = time.perf_counter() - t0
+
+    # Conferência contra o banco
+    with sqlite3.connect(db_path) as conn:
+        holder = dict(conn.execute("SELECT title, reserved_by FROM themes WHERE status = 'reservado'").fetchall())
+        multi = conn.execute("SELECT reserved_by, COUNT(*) FROM themes WHERE status = 'reservado' "
+                             "GROUP BY reserved_by HAVING COUNT(*) > 1").fetchall()
+        free_left = conn.execute("SELECT COUNT(*) FROM themes WHERE status = 'livre'").fetchone()[0]
+    claimed = [(g, t) for g, t, status, _ in attempts if status in ("reservado", "ja_reservado")]
+    false_wins = [(g, t) for g, t in claimed if holder.get(t) != g]
+    groups_with_theme = set(holder.values())
+    starved = len(prefs) - len(groups_with_theme) if free_left else 0
+    counters_ok = not check_counters(engine)
+
+    lat = sorted(a[3] for a in attempts)
+    p = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000 if lat else 0.0
+    by_status: Dict[str, int] = {}
+    for a in attempts:
+        by_status[a[2]] = by_status.get(a[2], 0) + 1
+    mode = f"{args.processes} processos" if args.processes else "threads"
+    print(f"{'legado' if args.legacy else 'compare-and-swap'} ({mode}): grupos={args.groups} temas={args.themes} "
+          f"tentativas={len(attempts)} em {elapsed:.2f}s = {len(attempts) / elapsed:.0f} reservas/s "
+          f"p50={p(.5):.1f}ms p95={p(.95):.1f}ms p99={p(.99):.1f}ms")
+    print("  resultados: " + ", ".join(f"{k}={v}" for k, v in sorted(by_status.items())))
+    print(f"  temas reservados={len(holder)} vitórias anunciadas={len(claimed)} vitórias falsas={len(false_wins)} "
+          f"grupos com >1 tema={len(multi)} grupos sem tema com tema livre={starved} contadores do painel ok={counters_ok}")
+    for g, t in false_wins[:5]:
+        print(f"    {g} ouviu 'reservado' para {t}, que ficou com {holder.get(t)}")
+    ok = not false_wins and not multi and not starved and counters_ok and len(holder) == min(args.groups, args.themes)
+    print("  correto" if ok else "  INCORRETO")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# Importação de vários TXT do SIGA (modules/import_txt.import_txt_files): interpretação no próprio processo
+# x pool de processos, e reenvio dos mesmos arquivos (pulados pelo sha256).
+#   python -m bench.txt_import --files 24 --students 4000
+import argparse, io, os, sys, tempfile, time
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=24)
+    ap.add_argument("--students", type=int, default=4000, help="alunos por arquivo")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_txt_")
+    os.environ["APP_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    from modules.db import get_engine
+    from modules.import_txt import import_txt_files, parse_puc_txt, _get_parse_pool
+    from modules.migrations import run_migrations
+    from bench.siga_txt import siga_export
+
+    blobs = []
+    for i in range(args.files):
+        disc = "IND" if i % 2 == 0 else "EBCII"
+        # Turmas se sobrepõem entre arquivos: mesmo RA aparece em mais de uma pauta
+        text_ = siga_export(f"MA{i // 2}", disc, n=args.students, first_ra=(i // 2) * args.students // 2 + 1, seed=i)
+        blobs.append((f"pauta_{i:02d}.txt", text_.encode("latin-1")))
+    total_mb = sum(len(b) for _, b in blobs) / 1e6
+    print(f"{args.files} arquivos, {total_mb:.1f} MB")
+
+    # Sobe todos os workers (e o import de modules.import_txt em cada um) fora da medição
+    warm = os.path.join(tmp, "warm.txt")
+    with open(warm, "w", encoding="latin-1") as f:
+        f.write(siga_export("MA0", n=1))
+    list(_get_parse_pool(args.workers).map(parse_puc_txt, [warm] * args.workers * 4))
+    ok = True
+    for label, workers in (("no processo", 1), (f"pool ({args.workers})", args.workers)):
+        engine = get_engine(f"sqlite:///{os.path.join(tmp, f'w{workers}.db')}")
+        run_migrations(engine)
+        up = os.path.join(tmp, f"up{workers}")
+        for run in ("primeira", "reenvio"):
+            t0 = time.perf_counter()
+            res = import_txt_files(engine, [(n, io.BytesIO(b)) for n, b in blobs], "2025.2", workers=workers, upload_dir=up)
+            elapsed = time.perf_counter() - t0
+            novos = sum(len(d.new_students) for d in res.offerings.values())
+            print(f"{label:<14} {run:<9} {elapsed * 1000:8.1f} ms  importados={res.count('importado')} "
+                  f"já importados={res.count('já importado')} alunos novos={novos}")
+            ok &= res.count("falhou") == 0
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# Leitura de exportações grandes do SIGA (várias pautas concatenadas): parser antigo (decodifica o arquivo
+# até 3x e faz várias varreduras do texto inteiro) x PucTxt (uma leitura/mmap, uma passada, alunos sob demanda).
+#   python -m bench.txt_parse --exports 60 --students 3000
+import argparse, os, re, sys, tempfile, time, tracemalloc
+
+from bench.siga_txt import siga_export
+
+def legacy_read_text_any(file_path):
+    for enc in ("utf-8", "latin-1", "cp1252"):
+        try:
+            with open(file_path, "r", encoding=enc) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+    return open(file_path, "rb").read().decode("latin-1", "ignore")
+
+def legacy_parse_puc_txt(file_path):
+    # Parser anterior, mantido aqui só como referência de desempenho/resultado
+    txt = legacy_read_text_any(file_path).replace("\r\n", "\n")
+    turma = None
+    m_turma = re.search(r"\n(ECO-[A-Z0-9]+)", txt)
+    if m_turma:
+        turma = m_turma.group(1).strip().replace("ECO-", "")
+    prof = ""
+    m_prof = re.search(r"Professor\s+(.+?)\s+\n", txt)
+    if m_prof:
+        prof = m_prof.group(1).strip()
+    m_cod = re.search(r"C[óo]d\.Usu[áa]rio:\s*(\d+)", txt)
+    cod_prof = m_cod.group(1) if m_cod else ""
+    disciplina = "ECONOMIA INDUSTRIAL" if "INDUSTRIAL" in txt.upper() else ("EBC II" if "BRASILEIRA" in txt.upper() else "")
+    students = []
+    for m in re.finditer(r"\b(RA\d{8})\b\s+([^\n\r]+)", txt):
+        students.append((m.group(1).strip(), re.sub(r"\s{2,}", " ", m.group(2).strip())))
+    return {"turma": turma, "disciplina": disciplina, "professor": prof, "cod_professor": cod_prof, "students": students}
+
+def _measure(fn):
+    # Tempo sem tracemalloc (que distorce muito o laço por linha); pico de memória numa segunda execução
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--exports", type=int, default=60, help="pautas concatenadas por arquivo")
+    ap.add_argument("--students", type=int, default=3000, help="alunos por pauta")
+    args = ap.parse_args(argv)
+
+    from modules.import_txt import PucTxt, parse_puc_txt
+
+    tmp = tempfile.mkdtemp(prefix="bench_parse_")
+    body = "".join(siga_export(f"MA{i % 9}", "EBCII" if i % 3 else "IND", n=args.students,
+                               first_ra=i * args.students + 1, seed=i) for i in range(args.exports))
+    ok = True
+    for enc in ("utf-8", "latin-1", "cp1252"):
+        path = os.path.join(tmp, f"siga_{enc}.txt")
+        text_ = body if enc != "cp1252" else body.replace("Pauta de Alunos", "Pauta de Alunos – “SIGA”")
+        with open(path, "w", encoding=enc, newline="") as f:
+            f.write(text_)
+        mb = os.path.getsize(path) / 1e6
+        old, t_old, m_old = _measure(lambda: legacy_parse_puc_txt(path))
+        new, t_new, m_new = _measure(lambda: parse_puc_txt(path))
+        lazy, t_lazy, m_lazy = _measure(lambda: sum(1 for _ in PucTxt(path)))
+        same = old == new and lazy == len(old["students"])
+        ok &= same
+        print(f"{enc:<8} {mb:6.1f} MB  alunos={len(new['students'])}  resultado igual={'sim' if same else 'NÃO'}")
+        print(f"   antigo          {t_old * 1000:8.1f} ms  pico {m_old / 1e6:7.1f} MB")
+        print(f"   PucTxt (lista)  {t_new * 1000:8.1f} ms  pico {m_new / 1e6:7.1f} MB")
+        print(f"   PucTxt (lazy)   {t_lazy * 1000:8.1f} ms  pico {m_lazy / 1e6:7.1f} MB")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
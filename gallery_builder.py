@@ -1,19 +1,35 @@
+# Galeria estática (public/) gerada a partir do banco: submissões aprovadas, com consentimento e nota >= PUBLISH_MIN_SCORE.
+# Incremental (manifesto de hashes em public/.gallery-manifest.json) e dividida por categoria ou turma, com paginação.
+#   python gallery_builder.py [--shard-by category|turma] [--page-size 24] [--from-json public/submissions.json]
+import argparse, json, sys
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-import json, os
+from modules.gallery import PAGE_SIZE, PUBLIC_DIR, SHARD_FIELDS, TEMPLATES_DIR, build_gallery, publish_gallery
 
-PUBLIC_DIR = "public"
-TEMPLATES_DIR = "templates"
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shard-by", choices=sorted(SHARD_FIELDS), default="category")
+    ap.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    ap.add_argument("--public-dir", default=PUBLIC_DIR)
+    ap.add_argument("--templates-dir", default=TEMPLATES_DIR)
+    ap.add_argument("--from-json", help="usa um submissions.json já exportado em vez do banco")
+    args = ap.parse_args(argv)
 
-os.makedirs(PUBLIC_DIR, exist_ok=True)
+    if args.from_json:
+        with open(args.from_json, encoding="utf-8") as f:
+            res = build_gallery(json.load(f), args.public_dir, args.templates_dir, args.shard_by, args.page_size)
+    else:
+        from modules.config import load_config
+        from modules.db import get_engine
+        from modules.migrations import run_migrations
+        engine = get_engine()
+        run_migrations(engine)
+        res = publish_gallery(engine, load_config(engine).publish_min_score, args.public_dir, args.templates_dir,
+                              args.shard_by, args.page_size)
+    print(f"{res.items} trabalhos em {res.shards} grupos; cartões: {res.cards_rendered} renderizados, "
+          f"{res.cards_reused} reaproveitados; páginas: {res.pages_written} gravadas, {res.pages_unchanged} sem mudança, "
+          f"{res.pages_removed} removidas{' (build completo)' if res.full_rebuild else ''}")
+    print(f"Galeria em {args.public_dir}/index.html")
+    return 0
 
-with open(os.path.join(PUBLIC_DIR, "submissions.json"), "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape())
-template = env.get_template("index.html.j2")
-html = template.render(items=data)
-
-with open(os.path.join(PUBLIC_DIR, "index.html"), "w", encoding="utf-8") as f:
-    f.write(html)
-print("Static site generated at public/index.html")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from modules.db import write_tx
+
+# chave na tabela config -> (atributo, conversor)
+CONFIG_KEYS = {
+    "TERM":               ("term", str),
+    "MIN_GROUP":          ("min_group", int),
+    "MAX_GROUP":          ("max_group", int),
+    "RESERVE_DEADLINE":   ("reserve_deadline", str),
+    "PUBLISH_MIN_SCORE":  ("publish_min_score", float),
+    "MAX_GROUP_TOTAL_MB": ("max_group_total_mb", int),
+    "SITE_ID":            ("site_id", str),
+    "DRIVE_ID":           ("drive_id", str),
+}
+
+@dataclass(frozen=True)
+class AppConfig:
+    term: str = "2025/2"
+    min_group: int = 4
+    max_group: int = 5
+    reserve_deadline: str = "2025-10-15T23:59:00"
+    publish_min_score: float = 7.0
+    max_group_total_mb: int = 400
+    site_id: Optional[str] = None
+    drive_id: Optional[str] = None
+
+    @classmethod
+    def from_rows(cls, rows: Dict[str, str]) -> "AppConfig":
+        kwargs = {}
+        for key, (attr, conv) in CONFIG_KEYS.items():
+            value = rows.get(key)
+            if value is None or value == "":
+                continue
+            try:
+                kwargs[attr] = conv(value)
+            except (TypeError, ValueError):
+                pass
+        return cls(**kwargs)
+
+_cache: Dict[str, AppConfig] = {}
+_lock = threading.Lock()
+
+def load_config(engine) -> AppConfig:
+    # Uma única consulta por processo; só é recarregada após set_config/invalidate
+    key = str(engine.url)
+    cfg = _cache.get(key)
+    if cfg is None:
+        with _lock:
+            cfg = _cache.get(key)
+            if cfg is None:
+                with engine.connect() as conn:
+                    rows = dict(conn.execute(text("SELECT key, value FROM config")).all())
+                cfg = AppConfig.from_rows(rows)
+                _cache[key] = cfg
+    return cfg
+
+def invalidate(engine=None):
+    with _lock:
+        if engine is None:
+            _cache.clear()
+        else:
+            _cache.pop(str(engine.url), None)
+
+def set_config(engine, key: str, value) -> None:
+    if key not in CONFIG_KEYS:
+        raise KeyError(f"Chave de configuração desconhecida: {key}")
+    with write_tx(engine) as conn:
+        conn.execute(text("INSERT OR REPLACE INTO config(key,value) VALUES(:k, :v)"), {"k": key, "v": str(value)})
+    invalidate(engine)
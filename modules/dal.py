@@ -0,0 +1,61 @@
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from modules import perf
+from modules.db import get_engine, get_query_cache, statement, write_tx
+
+# Consultas de um valor/uma linha/poucas linhas sem montar DataFrame (get_df fica para o que é tabela de verdade:
+# relatórios, st.dataframe). Uso com o módulo como prefixo – dal.scalar, dal.one, dal.all – para não
+# esconder o all() embutido. Linhas são Row do SQLAlchemy (tupla com atributos: row.id, row.name) ou,
+# com record=, instâncias da classe dada (ex.: dataclass(frozen=True, slots=True)) montadas por posição.
+# Resultados passam pelo mesmo cache invalidado por escrita de get_df e voltam sem cópia: são imutáveis.
+
+def _load(kind: tuple, sql: str, params: Dict, fetch: Callable[[Any], Any], count: Callable[[Any], int]) -> Any:
+    def loader():
+        with get_engine().connect() as conn:
+            return fetch(conn.execute(statement(sql), params))
+    cache = get_query_cache()
+    if not perf.enabled():
+        return loader() if cache is None else cache.value(kind, sql, params, loader)
+    # Medição (modules/perf.py), como em get_df
+    misses = []
+    def timed_loader():
+        misses.append(1)
+        return loader()
+    t0 = time.perf_counter()
+    value = timed_loader() if cache is None else cache.value(kind, sql, params, timed_loader)
+    perf.record_query("leitura", sql, time.perf_counter() - t0, count(value), cached=not misses, params=params)
+    return value
+
+def scalar(sql: str, **params) -> Any:
+    # Primeira coluna da primeira linha (None sem linhas): COUNT(*), valor de config, id por chave
+    return _load(("scalar",), sql, params, lambda res: res.scalar(), lambda v: int(v is not None))
+
+def one(sql: str, *, record: Optional[Callable] = None, **params) -> Optional[Any]:
+    # Primeira linha ou None (login por RA/e-mail, cadastro por id)
+    def fetch(res):
+        row = res.first()
+        return row if row is None or record is None else record(*row)
+    return _load(("one", record), sql, params, fetch, lambda v: int(v is not None))
+
+def all(sql: str, *, record: Optional[Callable] = None, **params) -> Tuple[Any, ...]:
+    # Todas as linhas numa tupla (listas curtas: opções de selectbox, pendências)
+    def fetch(res):
+        rows = res.all()
+        return tuple(rows) if record is None else tuple(record(*r) for r in rows)
+    return _load(("all", record), sql, params, fetch, len)
+
+def bulk_execute(sql: str, rows: Iterable[Dict], conn=None) -> int:
+    # Um executemany numa transação (a de conn, se dada); devolve as linhas afetadas
+    rows = list(rows)
+    if not rows:
+        return 0
+    t0 = time.perf_counter()
+    if conn is None:
+        with write_tx() as conn:
+            n = conn.execute(statement(sql), rows).rowcount
+    else:
+        n = conn.execute(statement(sql), rows).rowcount
+    if perf.enabled():
+        perf.record_query("escrita", sql, time.perf_counter() - t0, n, params={"linhas": len(rows)})
+    return n
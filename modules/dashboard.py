@@ -0,0 +1,69 @@
+from typing import TYPE_CHECKING, Dict, List
+
+from sqlalchemy import text
+
+from modules.db import get_df, write_tx
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COUNTER_COLUMNS = ("groups", "reserved", "submitted", "evaluated")
+
+# Mesmo cálculo dos triggers da migração 0008, feito do zero (para conferência/reconstrução)
+GROUP_PROGRESS_SQL = """
+    SELECT g.code AS group_code, COALESCE(g.turma, '') AS turma,
+           EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = g.code AND t.status = 'reservado') AS reserved,
+           EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = g.code) AS submitted,
+           (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+            WHERE s.group_code = g.code) >= 2 AS evaluated
+    FROM groups g WHERE g.code IS NOT NULL
+"""
+
+def read_counters() -> "pd.DataFrame":
+    # Tabela pequena (uma linha por turma + '*'); passa pelo cache de get_df
+    return get_df("SELECT turma, groups, reserved, submitted, evaluated FROM dashboard_counters ORDER BY turma")
+
+def totals(df_counters: "pd.DataFrame") -> Dict[str, int]:
+    row = df_counters[df_counters["turma"] == "*"]
+    if row.empty:
+        return {c: 0 for c in COUNTER_COLUMNS}
+    return {c: int(row[c].iloc[0]) for c in COUNTER_COLUMNS}
+
+def _expected(conn) -> Dict[str, Dict[str, int]]:
+    rows = conn.execute(text(f"""
+        SELECT turma, COUNT(*), SUM(reserved), SUM(submitted), SUM(evaluated)
+        FROM ({GROUP_PROGRESS_SQL}) GROUP BY turma
+    """)).all()
+    expected = {}
+    total = dict.fromkeys(COUNTER_COLUMNS, 0)
+    for turma, *vals in rows:
+        expected[turma] = dict(zip(COUNTER_COLUMNS, (int(v or 0) for v in vals)))
+        for c in COUNTER_COLUMNS:
+            total[c] += expected[turma][c]
+    expected["*"] = total
+    return expected
+
+def check_counters(engine) -> List[Dict]:
+    # Divergências entre dashboard_counters e o recálculo completo (lista vazia = consistente)
+    with engine.connect() as conn:
+        expected = _expected(conn)
+        stored = {r[0]: dict(zip(COUNTER_COLUMNS, r[1:])) for r in
+                  conn.execute(text("SELECT turma, groups, reserved, submitted, evaluated FROM dashboard_counters")).all()}
+    zero = dict.fromkeys(COUNTER_COLUMNS, 0)
+    diffs = []
+    for turma in sorted(set(expected) | set(stored)):
+        exp = expected.get(turma, zero); got = stored.get(turma, zero)
+        for c in COUNTER_COLUMNS:
+            if int(exp[c]) != int(got[c]):
+                diffs.append({"turma": turma, "contador": c, "esperado": int(exp[c]), "gravado": int(got[c])})
+    return diffs
+
+def rebuild_counters(engine) -> None:
+    # Recria group_progress do zero; os triggers de group_progress repovoam dashboard_counters
+    with write_tx(engine) as conn:
+        conn.execute(text("DELETE FROM group_progress"))
+        conn.execute(text("DELETE FROM dashboard_counters"))
+        conn.execute(text(f"""
+            INSERT INTO group_progress(group_code, turma, reserved, submitted, evaluated)
+            SELECT group_code, turma, reserved, submitted, evaluated FROM ({GROUP_PROGRESS_SQL})
+        """))
@@ -0,0 +1,145 @@
+import os, sqlite3, threading, time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+
+from modules import perf
+from modules.querycache import QueryCache
+
+if TYPE_CHECKING:
+    import pandas as pd   # importado só no uso: login e tela inicial não carregam o pandas
+
+DATA_DIR = "data"
+DB_URL = os.environ.get("APP_DB_URL") or f"sqlite:///{os.path.join(DATA_DIR, 'app.db')}"
+QUERY_CACHE_ENABLED = os.environ.get("APP_QUERY_CACHE", "1") != "0"
+
+# Pragmas aplicados a cada conexão nova do pool
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",          # leitores não bloqueiam escritores (persistente no arquivo)
+    "synchronous": "NORMAL",        # seguro com WAL; evita fsync a cada commit
+    "busy_timeout": 10000,          # ms esperando o lock de escrita antes de "database is locked"
+    "mmap_size": 268435456,         # 256 MB de leitura via mmap
+    "cache_size": -16000,           # ~16 MB de page cache por conexão
+    "temp_store": "MEMORY",
+}
+# UPSERT (INSERT ... ON CONFLICT DO UPDATE) nas migrações e importadores; get_engine recusa versões mais antigas
+MIN_SQLITE_VERSION = (3, 24, 0)
+# Streamlit roda uma thread por sessão: conexões fixas + folga para picos
+POOL_SIZE = 8
+MAX_OVERFLOW = 24
+POOL_TIMEOUT = 30
+# Statements preparados guardados pelo sqlite3 por conexão (padrão 128; o app tem ~90 SQL distintos)
+SQLITE_CACHED_STATEMENTS = 256
+
+_engines: Dict[str, object] = {}
+_caches: Dict[str, QueryCache] = {}
+_lock = threading.Lock()
+
+def _on_connect(dbapi_conn, _record):
+    # Desliga o controle de transação do pysqlite; o BEGIN é emitido por _on_begin
+    dbapi_conn.isolation_level = None
+    cur = dbapi_conn.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cur.execute(f"PRAGMA {name}={value}")
+    cur.close()
+
+def _on_begin(conn):
+    # Escritas pedem BEGIN IMMEDIATE: pegam o lock já no início e esperam pelo busy_timeout,
+    # em vez de falhar ao promover um lock de leitura no meio da transação
+    mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+    conn.exec_driver_sql(f"BEGIN {mode}")
+
+def get_engine(url: Optional[str] = None):
+    url = url or DB_URL
+    eng = _engines.get(url)
+    if eng is None:
+        with _lock:
+            eng = _engines.get(url)
+            if eng is None:
+                if url.startswith("sqlite") and sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+                    raise RuntimeError(f"SQLite {sqlite3.sqlite_version} é antigo demais; o app precisa de "
+                                       f"{'.'.join(map(str, MIN_SQLITE_VERSION))} ou mais recente")
+                if url.startswith("sqlite:///") and url != "sqlite:///:memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(url[len("sqlite:///"):])), exist_ok=True)
+                eng = create_engine(url, future=True, poolclass=QueuePool,
+                                    pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT,
+                                    connect_args={"check_same_thread": False, "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+                                                  "cached_statements": SQLITE_CACHED_STATEMENTS})
+                event.listen(eng, "connect", _on_connect)
+                event.listen(eng, "begin", _on_begin)
+                _engines[url] = eng
+    return eng
+
+def get_query_cache(engine=None) -> Optional[QueryCache]:
+    engine = engine or get_engine()
+    db_path = engine.url.database
+    if not QUERY_CACHE_ENABLED or engine.url.get_backend_name() != "sqlite" or not db_path or db_path == ":memory:":
+        return None
+    key = str(engine.url)
+    cache = _caches.get(key)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = _caches[key] = QueryCache(db_path)
+    return cache
+
+def dispose_engines():
+    with _lock:
+        for eng in _engines.values():
+            eng.dispose()
+        _engines.clear()
+        _caches.clear()
+
+@contextmanager
+def write_tx(engine=None):
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        conn.execution_options(sqlite_begin="IMMEDIATE")
+        with conn.begin():
+            yield conn
+    cache = get_query_cache(engine)
+    if cache is not None:
+        cache.mark_stale()
+
+# Funções auxiliares de banco de dados
+@lru_cache(maxsize=512)
+def statement(sql: str):
+    # Mesmo TextClause para o mesmo SQL: não reanalisa os :parâmetros a cada chamada, e o texto
+    # idêntico reaproveita a compilação do SQLAlchemy e o statement preparado do sqlite3
+    return text(sql)
+
+def _read_df(sql: str, params: dict) -> "pd.DataFrame":
+    import pandas as pd
+    with get_engine().connect() as conn:
+        return pd.read_sql(statement(sql), conn, params=params)
+
+def _cached_df(sql: str, params: dict, loader) -> "pd.DataFrame":
+    # Leituras passam pelo cache invalidado por escrita (modules/querycache.py)
+    cache = get_query_cache()
+    if cache is None:
+        return loader()
+    return cache.get(sql, params, loader)
+
+def get_df(sql: str, **params) -> "pd.DataFrame":
+    if not perf.enabled():
+        return _cached_df(sql, params, lambda: _read_df(sql, params))
+    # Medição (modules/perf.py): tempo, linhas e se veio do cache (loader não chamado)
+    misses = []
+    def loader():
+        misses.append(1)
+        return _read_df(sql, params)
+    t0 = time.perf_counter()
+    df = _cached_df(sql, params, loader)
+    perf.record_query("leitura", sql, time.perf_counter() - t0, len(df), cached=not misses, params=params)
+    return df
+
+def exec_sql(sql: str, **params):
+    t0 = time.perf_counter()
+    with write_tx() as conn:
+        rows = conn.execute(statement(sql), params).rowcount
+    if perf.enabled():
+        perf.record_query("escrita", sql, time.perf_counter() - t0, rows, params=params)
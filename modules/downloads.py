@@ -0,0 +1,87 @@
+import glob, hashlib, os, shutil, tempfile, threading, zipfile
+from dataclasses import dataclass
+from typing import Dict, List
+
+from modules.storage import CHUNK_SIZE, UPLOAD_DIR, download_name
+
+# Arquivos baixáveis de uma submissão: (tipo, coluna em submissions, rótulo)
+FILE_KINDS = (("relatorio", "report_path", "Relatório"), ("slides", "slides_path", "Slides"),
+              ("material", "zip_path", "Material Adicional"), ("media", "media_file_path", "Mídia"))
+MIME_TYPES = {
+    ".pdf": "application/pdf", ".zip": "application/zip",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".mp4": "video/mp4", ".mov": "video/quicktime", ".mp3": "audio/mpeg", ".m4a": "audio/mp4", ".wav": "audio/wav",
+}
+BUNDLE_DIR = os.path.join(UPLOAD_DIR, "bundles")
+
+@dataclass(frozen=True)
+class DownloadFile:
+    kind: str
+    label: str
+    path: str
+    name: str    # nome amigável (no disco o arquivo é nomeado pelo hash)
+    size: int
+
+    @property
+    def mime(self) -> str:
+        return MIME_TYPES.get(os.path.splitext(self.path)[1].lower(), "application/octet-stream")
+
+def human_size(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def submission_files(sub, group_code: str) -> List[DownloadFile]:
+    # sub: Submission (modules/groups.py) ou linha de submissions (Series/dict); só metadados, nada é lido
+    out = []
+    for kind, column, label in FILE_KINDS:
+        path = sub.get(column) if hasattr(sub, "get") else getattr(sub, column, None)
+        if path and os.path.isfile(path):
+            out.append(DownloadFile(kind, label, path, download_name(path, group_code, kind), os.path.getsize(path)))
+    return out
+
+# ===================== Pacote (ZIP) por submissão =====================
+_bundle_locks: Dict[str, threading.Lock] = {}
+_bundle_locks_guard = threading.Lock()
+
+def bundle_path(submission_id: int, files: List[DownloadFile], bundle_dir: str = BUNDLE_DIR) -> str:
+    # Nome depende do conjunto de arquivos: submissão alterada gera outro pacote, repetida reaproveita o mesmo
+    key = hashlib.sha256("\n".join(f"{f.name}={f.path}:{f.size}:{os.stat(f.path).st_mtime_ns}"
+                                   for f in files).encode()).hexdigest()[:16]
+    return os.path.join(bundle_dir, f"sub{int(submission_id)}_{key}.zip")
+
+def build_bundle(submission_id: int, files: List[DownloadFile], bundle_dir: str = BUNDLE_DIR) -> str:
+    # Monta o ZIP uma vez (cópia em blocos, sem recomprimir PDF/PPTX/vídeo) e devolve o caminho em cache
+    path = bundle_path(submission_id, files, bundle_dir)
+    if os.path.exists(path):
+        return path
+    with _bundle_locks_guard:
+        lock = _bundle_locks.setdefault(path, threading.Lock())
+    with lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(bundle_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=bundle_dir, suffix=".part")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for f in files:
+                    with open(f.path, "rb") as src, zf.open(f.name, "w", force_zip64=f.size >= zipfile.ZIP64_LIMIT) as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Pacotes antigos da mesma submissão (arquivos trocados) não servem mais
+        for old in glob.glob(os.path.join(bundle_dir, f"sub{int(submission_id)}_*.zip")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+    with _bundle_locks_guard:
+        _bundle_locks.pop(path, None)
+    return path
@@ -0,0 +1,147 @@
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from modules.db import get_query_cache, write_tx
+
+PAGE_SIZE = 20
+# Esqueleto da página (submissões + integrantes) e avaliações ficam em caches separados:
+# salvar uma nota só invalida as avaliações, não a lista de grupos
+SUBMISSION_TABLES = ("submissions", "groups", "group_members", "students")
+EVALUATION_TABLES = ("evaluations", "professors")
+
+SUBMISSIONS_SQL = """
+    SELECT s.id, s.group_code, COALESCE(g.turma, ''), s.theme_title, s.submitted_at,
+           s.report_path, s.slides_path, s.zip_path, s.media_link, s.media_file_path
+    FROM submissions s LEFT JOIN groups g ON g.code = s.group_code
+    ORDER BY s.group_code, s.id
+"""
+SUBMISSIONS_BY_TURMA_SQL = """
+    SELECT s.id, s.group_code, g.turma, s.theme_title, s.submitted_at,
+           s.report_path, s.slides_path, s.zip_path, s.media_link, s.media_file_path
+    FROM groups g JOIN submissions s ON s.group_code = g.code
+    WHERE g.turma = :turma
+    ORDER BY s.group_code, s.id
+"""
+MEMBERS_SQL = """
+    SELECT g.code, COALESCE(st.name, gm.student_name)
+    FROM groups g JOIN group_members gm ON gm.group_id = g.id LEFT JOIN students st ON st.id = gm.student_id
+    WHERE g.code IN :codes ORDER BY gm.id
+"""
+EVALUATIONS_SQL = """
+    SELECT e.submission_id, e.instructor_id, COALESCE(p.name, ''), e.discipline_code,
+           e.score_report, e.score_slides, e.score_media, e.overall_score, e.c_report, e.c_slides, e.c_media, e.c_overall
+    FROM evaluations e LEFT JOIN professors p ON p.id = e.instructor_id
+    WHERE e.submission_id IN :ids ORDER BY e.id
+"""
+SAVE_SQL = """
+    INSERT INTO evaluations(submission_id, instructor_id, discipline_code, score_report, score_slides, score_media, overall_score,
+                            liked, c_report, c_slides, c_media, c_overall, created_at)
+    VALUES(:sid, :iid, :disc, :sr, :ss, :sm, :os, 0, :cr, :cs, :cm, :co, :at)
+    ON CONFLICT(submission_id, instructor_id, discipline_code) DO UPDATE SET
+        score_report = excluded.score_report, score_slides = excluded.score_slides, score_media = excluded.score_media,
+        overall_score = excluded.overall_score, c_report = excluded.c_report, c_slides = excluded.c_slides,
+        c_media = excluded.c_media, c_overall = excluded.c_overall, created_at = excluded.created_at
+"""
+
+@dataclass(frozen=True)
+class Evaluation:
+    submission_id: int
+    instructor_id: int
+    instructor_name: str
+    discipline_code: str
+    score_report: Optional[float]
+    score_slides: Optional[float]
+    score_media: Optional[float]
+    overall_score: Optional[float]
+    c_report: Optional[str]
+    c_slides: Optional[str]
+    c_media: Optional[str]
+    c_overall: Optional[str]
+
+@dataclass(frozen=True)
+class WorkItem:
+    id: int
+    group_code: str
+    turma: str
+    theme_title: str
+    submitted_at: str
+    report_path: str
+    slides_path: str
+    zip_path: str
+    media_link: str
+    media_file_path: str
+    members: Tuple[str, ...] = ()
+
+@dataclass(frozen=True)
+class WorkbenchPage:
+    items: Tuple[WorkItem, ...]
+    page: int
+    pages: int
+    total: int
+    evaluations: Dict[int, Tuple[Evaluation, ...]]
+
+    def mine(self, submission_id: int, instructor_id: int) -> Optional[Evaluation]:
+        return next((e for e in self.evaluations.get(submission_id, ()) if e.instructor_id == instructor_id), None)
+
+    def others(self, submission_id: int, instructor_id: int) -> List[Evaluation]:
+        return [e for e in self.evaluations.get(submission_id, ()) if e.instructor_id != instructor_id]
+
+def _memo(engine, key, tables, loader):
+    cache = get_query_cache(engine)
+    return loader() if cache is None else cache.memo(key, tables, loader)
+
+def _load_submissions(engine, turma: Optional[str]) -> Tuple[WorkItem, ...]:
+    # Lista completa do filtro (linhas leves: sem integrantes); a paginação corta em memória
+    with engine.connect() as conn:
+        if turma:
+            rows = conn.execute(text(SUBMISSIONS_BY_TURMA_SQL), {"turma": turma}).all()
+        else:
+            rows = conn.execute(text(SUBMISSIONS_SQL)).all()
+    return tuple(WorkItem(*r) for r in rows)
+
+def _load_page(engine, turma: Optional[str], page: int, page_size: int) -> Tuple[Tuple[WorkItem, ...], int, int]:
+    items = _memo(engine, ("workbench_subs", turma or ""), SUBMISSION_TABLES, lambda: _load_submissions(engine, turma))
+    pages = max(1, -(-len(items) // page_size))
+    page = min(max(page, 0), pages - 1)
+    chunk = items[page * page_size:(page + 1) * page_size]
+    members = defaultdict(list)
+    if chunk:
+        with engine.connect() as conn:
+            stmt = text(MEMBERS_SQL).bindparams(bindparam("codes", expanding=True))
+            for code, name in conn.execute(stmt, {"codes": sorted({it.group_code for it in chunk})}).all():
+                members[code].append(name)
+    return tuple(replace(it, members=tuple(members[it.group_code])) for it in chunk), page, pages
+
+def _load_evaluations(engine, ids: Tuple[int, ...]) -> Dict[int, Tuple[Evaluation, ...]]:
+    out = defaultdict(list)
+    if ids:
+        with engine.connect() as conn:
+            stmt = text(EVALUATIONS_SQL).bindparams(bindparam("ids", expanding=True))
+            for row in conn.execute(stmt, {"ids": list(ids)}).all():
+                out[row[0]].append(Evaluation(*row))
+    return {sid: tuple(evs) for sid, evs in out.items()}
+
+def workbench_page(engine, turma: Optional[str] = None, page: int = 0, page_size: int = PAGE_SIZE) -> WorkbenchPage:
+    # Uma página do filtro com integrantes e todas as avaliações: 3 consultas na primeira vez,
+    # zero nos reruns seguintes até alguma das tabelas mudar (só as avaliações após salvar uma nota)
+    items, page, pages = _memo(engine, ("workbench_page", turma or "", page, page_size), SUBMISSION_TABLES,
+                               lambda: _load_page(engine, turma, page, page_size))
+    total = len(_memo(engine, ("workbench_subs", turma or ""), SUBMISSION_TABLES, lambda: _load_submissions(engine, turma)))
+    ids = tuple(it.id for it in items)
+    evaluations = _memo(engine, ("workbench_evals",) + ids, EVALUATION_TABLES, lambda: _load_evaluations(engine, ids))
+    return WorkbenchPage(items, page, pages, total, evaluations)
+
+def save_evaluation(engine, submission_id: int, instructor_id: int, discipline_code: str,
+                    scores: Dict[str, float], comments: Dict[str, str]) -> None:
+    # scores: report/slides/media/overall; comments: idem (texto livre)
+    with write_tx(engine) as conn:
+        conn.execute(text(SAVE_SQL), dict(
+            sid=submission_id, iid=instructor_id, disc=discipline_code,
+            sr=scores.get("report"), ss=scores.get("slides"), sm=scores.get("media"), os=scores.get("overall"),
+            cr=(comments.get("report") or "").strip(), cs=(comments.get("slides") or "").strip(),
+            cm=(comments.get("media") or "").strip(), co=(comments.get("overall") or "").strip(),
+            at=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
@@ -0,0 +1,226 @@
+import csv, glob, importlib.util, os, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from modules.db import DATA_DIR
+
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")
+CHUNK_ROWS = 5000   # linhas por leitura/escrita: memória constante, qualquer que seja o tamanho do relatório
+
+@dataclass(frozen=True)
+class ExportFormat:
+    label: str
+    ext: str
+    mime: str
+    module: Optional[str] = None   # dependência opcional; formato some da tela se não estiver instalada
+
+FORMATS: Dict[str, ExportFormat] = {
+    "csv": ExportFormat("CSV", ".csv", "text/csv"),
+    "parquet": ExportFormat("Parquet", ".parquet", "application/vnd.apache.parquet", "pyarrow"),
+    "xlsx": ExportFormat("Excel", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "openpyxl"),
+}
+
+@dataclass(frozen=True)
+class Report:
+    title: str
+    file_stem: str
+    sql: str
+    columns: Tuple[Tuple[str, str], ...]   # (coluna, 'text' | 'real'): tipos fixos para Parquet/Excel
+    tables: Tuple[str, ...]                # versões dessas tabelas identificam o arquivo em cache
+
+REPORTS: Dict[str, Report] = {
+    "grupos": Report(
+        "Por Grupo", "relatorio_grupos", """
+        SELECT g.code AS Grupo,
+               COALESCE(s.theme_title, '') AS Tema,
+               GROUP_CONCAT(gm.student_name, ', ') AS Integrantes,
+               CASE WHEN s.id IS NOT NULL THEN 'Sim' ELSE 'Não' END AS Submeteu,
+               MAX(CASE WHEN e.discipline_code='IND' THEN e.overall_score END) AS Nota_Industrial,
+               MAX(CASE WHEN e.discipline_code='EBCII' THEN e.overall_score END) AS Nota_EBCII
+        FROM groups g
+        LEFT JOIN group_members gm ON gm.group_id = g.id
+        LEFT JOIN submissions s ON s.group_code = g.code
+        LEFT JOIN evaluations e ON e.submission_id = s.id
+        GROUP BY g.code
+        """,
+        (("Grupo", "text"), ("Tema", "text"), ("Integrantes", "text"), ("Submeteu", "text"),
+         ("Nota_Industrial", "real"), ("Nota_EBCII", "real")),
+        ("groups", "group_members", "submissions", "evaluations")),
+    # Notas por submissão agregadas uma vez (primeira avaliação de cada disciplina do docente, como o antigo
+    # LIMIT 1) e juntadas aos alunos, em vez de duas subconsultas correlacionadas por linha
+    "alunos": Report(
+        "Por Aluno", "relatorio_alunos", """
+        WITH first_eval AS (
+            SELECT e.submission_id, pr.discipline_code AS disc, e.overall_score AS score, MIN(e.id)
+            FROM evaluations e JOIN professors pr ON pr.id = e.instructor_id
+            WHERE pr.discipline_code IN ('IND', 'EBCII')
+            GROUP BY e.submission_id, pr.discipline_code
+        ), notas AS (
+            SELECT submission_id,
+                   MAX(CASE WHEN disc = 'IND' THEN score END) AS ind,
+                   MAX(CASE WHEN disc = 'EBCII' THEN score END) AS ebc
+            FROM first_eval GROUP BY submission_id
+        )
+        SELECT st.ra AS RA, st.name AS Nome, g.code AS Grupo, COALESCE(s.theme_title, '') AS Tema,
+               CASE WHEN s.id IS NOT NULL THEN 'Sim' ELSE 'Não' END AS Submeteu,
+               n.ind AS Nota_Industrial, n.ebc AS Nota_EBCII
+        FROM students st
+        LEFT JOIN group_members gm ON gm.student_id = st.id
+        LEFT JOIN groups g ON gm.group_id = g.id
+        LEFT JOIN submissions s ON s.group_code = g.code
+        LEFT JOIN notas n ON n.submission_id = s.id
+        """,
+        (("RA", "text"), ("Nome", "text"), ("Grupo", "text"), ("Tema", "text"), ("Submeteu", "text"),
+         ("Nota_Industrial", "real"), ("Nota_EBCII", "real")),
+        ("students", "group_members", "groups", "submissions", "evaluations", "professors")),
+    "docentes": Report(
+        "Por Docente", "relatorio_docentes", """
+        SELECT p.name AS Docente, p.discipline_code AS Disciplina, s.group_code AS Grupo, s.theme_title AS Tema,
+               e.overall_score AS Nota_Atribuida, e.c_overall AS Comentario
+        FROM evaluations e
+        JOIN professors p ON e.instructor_id = p.id
+        JOIN submissions s ON e.submission_id = s.id
+        ORDER BY p.name, s.group_code
+        """,
+        (("Docente", "text"), ("Disciplina", "text"), ("Grupo", "text"), ("Tema", "text"),
+         ("Nota_Atribuida", "real"), ("Comentario", "text")),
+        ("professors", "submissions", "evaluations")),
+}
+
+def available_formats() -> List[str]:
+    return [k for k, f in FORMATS.items() if f.module is None or importlib.util.find_spec(f.module) is not None]
+
+def data_version(conn, tables) -> str:
+    stmt = text("SELECT name, version FROM table_versions WHERE name IN :names").bindparams(bindparam("names", expanding=True))
+    versions = dict(conn.execute(stmt, {"names": list(tables)}).all())
+    return "v" + "-".join(str(versions.get(t, 0)) for t in tables)
+
+def export_path(report_key: str, fmt: str, version: str, export_dir: str = EXPORT_DIR) -> str:
+    return os.path.join(export_dir, f"{REPORTS[report_key].file_stem}_{version}{FORMATS[fmt].ext}")
+
+# ===================== Escrita em blocos =====================
+def _write_csv(path: str, report: Report, chunks, progress) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow([c for c, _ in report.columns])
+        for rows in chunks:
+            w.writerows(rows)
+            progress(len(rows))
+
+def _write_parquet(path: str, report: Report, chunks, progress) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(c, pa.float64() if t == "real" else pa.string()) for c, t in report.columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:   # um row group por bloco
+            cols = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(col, type=f.type) for col, f in zip(cols, schema)],
+                                                    schema=schema))
+            progress(len(rows))
+
+def _write_xlsx(path: str, report: Report, chunks, progress) -> None:
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)   # linhas vão direto para o arquivo, sem montar a planilha em memória
+    ws = wb.create_sheet("Relatório")
+    ws.append([c for c, _ in report.columns])
+    for rows in chunks:
+        for row in rows:
+            ws.append(list(row))
+        progress(len(rows))
+    wb.save(path)
+
+_WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+def write_export(engine, report_key: str, fmt: str, export_dir: str = EXPORT_DIR,
+                 progress=lambda rows: None) -> Tuple[str, str, Optional[int]]:
+    # Devolve (caminho, versão, linhas); linhas=None quando o arquivo da versão já existia.
+    # Versões e linhas lidas no mesmo snapshot: o nome do arquivo descreve exatamente o conteúdo.
+    report = REPORTS[report_key]
+    os.makedirs(export_dir, exist_ok=True)
+    total = 0
+
+    def count(n):
+        nonlocal total
+        total += n
+        progress(total)
+
+    with engine.connect() as conn, conn.begin():
+        version = data_version(conn, report.tables)
+        path = export_path(report_key, fmt, version, export_dir)
+        if os.path.exists(path):
+            return path, version, None
+        result = conn.execution_options(stream_results=True).execute(text(report.sql))
+        fd, tmp_path = tempfile.mkstemp(dir=export_dir, suffix=".part")
+        os.close(fd)
+        try:
+            _WRITERS[fmt](tmp_path, report, (list(rows) for rows in result.partitions(CHUNK_ROWS)), count)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    # Versões antigas do mesmo relatório/formato não servem mais
+    for old in glob.glob(os.path.join(export_dir, f"{report.file_stem}_v*{FORMATS[fmt].ext}")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path, version, total
+
+# ===================== Geração em segundo plano =====================
+@dataclass
+class ExportJob:
+    report_key: str
+    fmt: str
+    version: str
+    status: str = "gerando"    # gerando | pronto | erro
+    rows: int = 0
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+_executor: Optional[ThreadPoolExecutor] = None
+_jobs: Dict[Tuple[str, str], ExportJob] = {}
+_jobs_lock = threading.Lock()
+
+def _run(engine, job: ExportJob, export_dir: str) -> None:
+    try:
+        job.path, job.version, rows = write_export(engine, job.report_key, job.fmt, export_dir,
+                                                   progress=lambda n: setattr(job, "rows", n))
+        job.rows = job.rows if rows is None else rows
+        job.status = "pronto"
+    except Exception as e:
+        job.error, job.status = repr(e), "erro"
+
+def current_export(engine, report_key: str, fmt: str, export_dir: str = EXPORT_DIR) -> Optional[ExportJob]:
+    # Exportação da versão atual dos dados (em andamento, com erro ou pronta em disco); None = precisa gerar
+    with engine.connect() as conn:
+        version = data_version(conn, REPORTS[report_key].tables)
+    with _jobs_lock:
+        job = _jobs.get((report_key, fmt))
+    if job is not None and (job.status in ("gerando", "erro") or job.version == version):
+        return job
+    path = export_path(report_key, fmt, version, export_dir)
+    if os.path.exists(path):
+        return ExportJob(report_key, fmt, version, "pronto", path=path)
+    return None
+
+def request_export(engine, report_key: str, fmt: str, export_dir: str = EXPORT_DIR) -> ExportJob:
+    # Enfileira a geração (um worker por processo: exportações pesadas não disputam o banco entre si)
+    global _executor
+    job = current_export(engine, report_key, fmt, export_dir)
+    if job is not None and job.status != "erro":
+        return job
+    with _jobs_lock:
+        job = _jobs.get((report_key, fmt))
+        if job is not None and job.status == "gerando":
+            return job
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+        job = ExportJob(report_key, fmt, version="")
+        _jobs[(report_key, fmt)] = job
+    _executor.submit(_run, engine, job, export_dir)
+    return job
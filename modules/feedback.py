@@ -0,0 +1,238 @@
+import glob, hashlib, json, multiprocessing, os, re, tempfile, threading, zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from modules.db import DATA_DIR
+
+FEEDBACK_DIR = os.path.join(DATA_DIR, "feedback")
+# TTF opcional (ex.: DejaVuSans.ttf) para texto fora do latin-1; sem ele usa a Helvetica embutida do PDF
+FEEDBACK_FONT = os.environ.get("FEEDBACK_FONT") or os.path.join(DATA_DIR, "fonts", "feedback.ttf")
+LAYOUT_VERSION = 1      # mudar o layout do PDF = incrementar (regera todos os arquivos)
+FEEDBACK_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# Abaixo disso renderizar no próprio processo sai mais barato que subir/despachar para o pool
+PARALLEL_MIN_GROUPS = 24
+
+DISCIPLINES = {"IND": "Economia Industrial", "EBCII": "Economia Brasileira II"}
+CRITERIA = (("Relatório", "report"), ("Slides", "slides"), ("Mídia", "media"), ("Geral", "overall"))
+
+# Todas as avaliações de uma vez (IND e EBCII juntas), ordenadas por grupo
+EVALUATIONS_SQL = """
+    SELECT s.group_code, COALESCE(g.turma, ''), COALESCE(s.theme_title, ''), COALESCE(s.submitted_at, ''),
+           e.discipline_code, COALESCE(p.name, ''),
+           e.score_report, e.score_slides, e.score_media, e.overall_score,
+           COALESCE(e.c_report, ''), COALESCE(e.c_slides, ''), COALESCE(e.c_media, ''), COALESCE(e.c_overall, '')
+    FROM evaluations e
+    JOIN submissions s ON s.id = e.submission_id
+    LEFT JOIN groups g ON g.code = s.group_code
+    LEFT JOIN professors p ON p.id = e.instructor_id
+    ORDER BY s.group_code, e.discipline_code, p.name, e.id
+"""
+MEMBERS_SQL = """
+    SELECT g.code, COALESCE(st.name, gm.student_name)
+    FROM groups g JOIN group_members gm ON gm.group_id = g.id LEFT JOIN students st ON st.id = gm.student_id
+    WHERE g.code IN :codes ORDER BY gm.id
+"""
+
+@dataclass
+class FeedbackResult:
+    written: List[str] = field(default_factory=list)     # grupos com PDF novo
+    unchanged: List[str] = field(default_factory=list)   # avaliações iguais às do último PDF
+    failed: Dict[str, str] = field(default_factory=dict)
+    removed: int = 0
+
+# ===================== Dados por grupo =====================
+def feedback_payloads(engine) -> List[Dict]:
+    # Um dict por grupo avaliado (o que vai no PDF, nada mais: é dele que sai o hash)
+    groups: Dict[str, Dict] = {}
+    with engine.connect() as conn:
+        for (code, turma, theme, submitted_at, disc, prof, sr, ss, sm, so, cr, cs, cm, co) in conn.execute(text(EVALUATIONS_SQL)):
+            g = groups.setdefault(code, {"group": code, "turma": turma, "theme": theme, "submitted_at": submitted_at,
+                                         "members": [], "evaluations": []})
+            g["evaluations"].append({"discipline": disc, "instructor": prof,
+                                     "scores": {"report": sr, "slides": ss, "media": sm, "overall": so},
+                                     "comments": {"report": cr, "slides": cs, "media": cm, "overall": co}})
+        if groups:
+            stmt = text(MEMBERS_SQL).bindparams(bindparam("codes", expanding=True))
+            for code, name in conn.execute(stmt, {"codes": sorted(groups)}).all():
+                groups[code]["members"].append(name)
+    return list(groups.values())
+
+def _safe(code: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", code) or "grupo"
+
+def feedback_path(payload: Dict, feedback_dir: str = FEEDBACK_DIR) -> str:
+    # Nome pelo conteúdo: avaliações iguais -> mesmo arquivo (pulado); qualquer mudança -> arquivo novo
+    digest = hashlib.sha256(json.dumps([LAYOUT_VERSION, payload], sort_keys=True, ensure_ascii=False)
+                            .encode("utf-8")).hexdigest()[:16]
+    return os.path.join(feedback_dir, f"feedback_{_safe(payload['group'])}_{digest}.pdf")
+
+# ===================== Renderização (roda nos workers) =====================
+_layout: Optional[Dict] = None   # fonte e medidas, preparadas uma vez por processo
+
+def _init_worker(font_path: str = FEEDBACK_FONT) -> None:
+    # Import do fpdf2 (e do fontTools, se houver TTF) e escolha da fonte feitos uma vez, antes da primeira tarefa
+    global _layout
+    import fpdf  # noqa: F401
+    ttf = font_path if font_path and os.path.isfile(font_path) else None
+    _layout = {"ttf": ttf, "family": "FeedbackSans" if ttf else "helvetica",
+               "label_w": 30, "crit_w": 24, "score_w": 16, "line_h": 6}
+    if ttf:
+        from fontTools import ttLib  # noqa: F401
+
+def _text(s) -> str:
+    # Helvetica do PDF só tem latin-1: troca a pontuação tipográfica comum e descarta o resto
+    s = "" if s is None else str(s)
+    if _layout["ttf"]:
+        return s
+    for a, b in (("–", "-"), ("—", "-"), ("“", '"'), ("”", '"'), ("‘", "'"), ("’", "'"), ("…", "..."), ("•", "-")):
+        s = s.replace(a, b)
+    return s.encode("latin-1", "replace").decode("latin-1")
+
+def _score(v) -> str:
+    return "-" if v is None else f"{v:.1f}".replace(".", ",")
+
+def _render_pdf(payload: Dict) -> bytes:
+    from fpdf import FPDF, XPos, YPos
+    L = _layout
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    if L["ttf"]:
+        pdf.add_font(L["family"], "", L["ttf"])
+        pdf.add_font(L["family"], "B", L["ttf"])
+    fam, h = L["family"], L["line_h"]
+    nl = {"new_x": XPos.LMARGIN, "new_y": YPos.NEXT}
+
+    pdf.add_page()
+    pdf.set_font(fam, "B", 15)
+    pdf.cell(0, 9, _text("Feedback do Trabalho Final – Industrial & EBC II"), **nl)
+    pdf.set_font(fam, "", 10)
+    pdf.cell(0, h, _text(f"Grupo {payload['group']}" + (f" · Turma {payload['turma']}" if payload["turma"] else "")), **nl)
+    if payload["theme"]:
+        pdf.multi_cell(0, h, _text(f"Tema: {payload['theme']}"), **nl)
+    if payload["members"]:
+        pdf.multi_cell(0, h, _text("Integrantes: " + ", ".join(payload["members"])), **nl)
+    if payload["submitted_at"]:
+        pdf.cell(0, h, _text(f"Submetido em {payload['submitted_at']}"), **nl)
+
+    by_disc = defaultdict(list)
+    for ev in payload["evaluations"]:
+        by_disc[ev["discipline"]].append(ev)
+    for disc in sorted(by_disc, key=lambda d: (d not in DISCIPLINES, d)):
+        pdf.ln(4)
+        pdf.set_font(fam, "B", 12)
+        pdf.cell(0, 8, _text(DISCIPLINES.get(disc, disc)), **nl)
+        for ev in by_disc[disc]:
+            pdf.set_font(fam, "B", 10)
+            pdf.cell(0, h, _text(f"Docente: {ev['instructor'] or '-'}"), **nl)
+            # Notas numa linha (rótulo + nota por critério), comentários abaixo
+            pdf.set_font(fam, "", 10)
+            for label, key in CRITERIA:
+                pdf.cell(L["crit_w"], h, _text(label + ":"))
+                pdf.cell(L["score_w"], h, _score(ev["scores"][key]))
+            pdf.ln(h)
+            for label, key in CRITERIA:
+                comment = (ev["comments"][key] or "").strip()
+                if comment:
+                    pdf.set_font(fam, "B", 10)
+                    pdf.cell(L["label_w"], h, _text(label))
+                    pdf.set_font(fam, "", 10)
+                    pdf.multi_cell(0, h, _text(comment), **nl)
+            pdf.ln(2)
+    return bytes(pdf.output())
+
+def _render(job: Tuple[Dict, str]) -> Tuple[str, str]:
+    # Grava o PDF de um grupo (arquivo temporário + rename); devolve (grupo, erro ou "")
+    payload, path = job
+    if _layout is None:
+        _init_worker()
+    try:
+        data = _render_pdf(payload)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return payload["group"], ""
+    except Exception as e:
+        return payload["group"], repr(e)
+
+# ===================== Lote =====================
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool(workers: int = FEEDBACK_WORKERS) -> ProcessPoolExecutor:
+    # Um pool por processo ("spawn", como o do importador TXT); cada worker prepara fonte/layout ao subir
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=_init_worker, initargs=(FEEDBACK_FONT,))
+    return _pdf_pool
+
+def generate_feedback(engine, feedback_dir: str = FEEDBACK_DIR, workers: int = FEEDBACK_WORKERS,
+                      force: bool = False) -> FeedbackResult:
+    # Um PDF por grupo avaliado; grupo cujas avaliações não mudaram desde o último PDF é pulado
+    result = FeedbackResult()
+    os.makedirs(feedback_dir, exist_ok=True)
+    jobs = []
+    current = set()
+    for payload in feedback_payloads(engine):
+        path = feedback_path(payload, feedback_dir)
+        current.add(path)
+        if os.path.exists(path) and not force:
+            result.unchanged.append(payload["group"])
+        else:
+            jobs.append((payload, path))
+
+    if workers > 1 and len(jobs) >= PARALLEL_MIN_GROUPS:
+        chunk = max(1, len(jobs) // (workers * 4))
+        done = list(_get_pdf_pool(workers).map(_render, jobs, chunksize=chunk))
+    else:
+        done = [_render(job) for job in jobs]
+    for group, error in done:
+        if error:
+            result.failed[group] = error
+        else:
+            result.written.append(group)
+
+    # PDFs de versões anteriores (avaliações alteradas) e de grupos sem avaliação não servem mais
+    for old in glob.glob(os.path.join(feedback_dir, "feedback_*.pdf")):
+        if old not in current:
+            try:
+                os.remove(old)
+                result.removed += 1
+            except OSError:
+                pass
+    return result
+
+def feedback_files(engine, feedback_dir: str = FEEDBACK_DIR) -> Dict[str, str]:
+    # grupo -> PDF atual (só os que já estão gerados e em dia com as avaliações)
+    out = {}
+    for payload in feedback_payloads(engine):
+        path = feedback_path(payload, feedback_dir)
+        if os.path.exists(path):
+            out[payload["group"]] = path
+    return out
+
+def bundle_feedback(files: Dict[str, str], feedback_dir: str = FEEDBACK_DIR) -> str:
+    # ZIP com os PDFs atuais (nome amigável por grupo); mesmo conjunto de arquivos -> mesmo ZIP, reaproveitado
+    key = hashlib.sha256("\n".join(sorted(files.values())).encode()).hexdigest()[:16]
+    path = os.path.join(feedback_dir, f"feedback_todos_{key}.zip")
+    if not os.path.exists(path):
+        fd, tmp_path = tempfile.mkstemp(dir=feedback_dir, suffix=".part")
+        os.close(fd)
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for group, pdf_path in sorted(files.items()):
+                zf.write(pdf_path, f"feedback_{_safe(group)}.pdf")
+        os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(feedback_dir, "feedback_todos_*.zip")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path
@@ -0,0 +1,216 @@
+import hashlib, json, os, re, tempfile, unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List
+
+from sqlalchemy import bindparam, text
+
+from modules.db import write_tx
+
+PUBLIC_DIR = "public"
+TEMPLATES_DIR = "templates"
+TEMPLATE_FILES = ("index.html.j2", "card.html.j2")
+MANIFEST_NAME = ".gallery-manifest.json"
+PAGE_SIZE = 24
+SHARD_FIELDS = {"category": "Sem categoria", "turma": "Sem turma"}   # campo -> rótulo do grupo vazio
+
+# Publicável = aprovada pelo admin, com consentimento dos autores e média das notas gerais >= PUBLISH_MIN_SCORE
+PUBLISHABLE_SQL = """
+    SELECT s.id, s.group_code, COALESCE(g.turma, ''), COALESCE(s.theme_title, ''), COALESCE(t.category, ''),
+           COALESCE(s.submitted_at, ''), COALESCE(s.media_link, '')
+    FROM submissions s
+    JOIN evaluations e ON e.submission_id = s.id
+    LEFT JOIN groups g ON g.code = s.group_code
+    LEFT JOIN themes t ON t.title = s.theme_title
+    WHERE s.approved = 1 AND s.consent = 1
+    GROUP BY s.id
+    HAVING AVG(e.overall_score) >= :min_score
+    ORDER BY s.group_code, s.id
+"""
+# Candidatas para o admin aprovar: consentidas e com nota suficiente (aprovadas ou não)
+CANDIDATES_SQL = """
+    SELECT s.id, s.group_code, COALESCE(s.theme_title, ''), AVG(e.overall_score), s.approved
+    FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+    WHERE s.consent = 1
+    GROUP BY s.id
+    HAVING AVG(e.overall_score) >= :min_score
+    ORDER BY AVG(e.overall_score) DESC, s.group_code
+"""
+MEMBERS_SQL = """
+    SELECT g.code, COALESCE(st.name, gm.student_name)
+    FROM groups g JOIN group_members gm ON gm.group_id = g.id LEFT JOIN students st ON st.id = gm.student_id
+    WHERE g.code IN :codes ORDER BY gm.id
+"""
+
+@dataclass
+class BuildResult:
+    items: int = 0
+    shards: int = 0
+    cards_rendered: int = 0
+    cards_reused: int = 0
+    pages_written: int = 0
+    pages_unchanged: int = 0
+    pages_removed: int = 0
+    full_rebuild: bool = False
+
+# ===================== Exportação (banco -> itens) =====================
+def publishable_items(engine, min_score: float) -> List[Dict]:
+    # Duas consultas: submissões publicáveis e os integrantes de todos os grupos delas
+    with engine.connect() as conn:
+        rows = conn.execute(text(PUBLISHABLE_SQL), {"min_score": float(min_score)}).all()
+        members = defaultdict(list)
+        if rows:
+            stmt = text(MEMBERS_SQL).bindparams(bindparam("codes", expanding=True))
+            for code, name in conn.execute(stmt, {"codes": sorted({r[1] for r in rows})}).all():
+                members[code].append(name)
+    return [{"id": sid, "group": code, "turma": turma, "theme": theme, "category": category,
+             "submitted_at": submitted_at, "video_link": link, "members": members[code]}
+            for sid, code, turma, theme, category, submitted_at, link in rows]
+
+def publication_candidates(engine, min_score: float) -> List[Dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(text(CANDIDATES_SQL), {"min_score": float(min_score)}).all()
+    return [{"id": sid, "group": code, "theme": theme, "score": round(float(score), 2), "approved": bool(approved)}
+            for sid, code, theme, score, approved in rows]
+
+def set_approved(engine, candidate_ids: List[int], approved_ids: List[int]) -> None:
+    # Marca/desmarca a aprovação para publicação só entre as candidatas exibidas
+    approved = set(approved_ids)
+    with write_tx(engine) as conn:
+        conn.execute(text("UPDATE submissions SET approved = :a WHERE id = :id AND COALESCE(approved, 0) != :a"),
+                     [{"id": int(i), "a": 1 if i in approved else 0} for i in candidate_ids])
+
+def export_items(items: List[Dict], public_dir: str = PUBLIC_DIR) -> bool:
+    # public/submissions.json (entrada do build a partir de arquivo); só regrava se mudou
+    path = os.path.join(public_dir, "submissions.json")
+    data = json.dumps(items, ensure_ascii=False, indent=1)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == data:
+                return False
+    _write_atomic(path, data)
+    return True
+
+# ===================== Build incremental (itens -> HTML) =====================
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _slug(label: str) -> str:
+    label = unicodedata.normalize("NFKD", label)
+    label = "".join(c for c in label if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", "-", label).strip("-") or "outros"
+
+def _slugs(labels: List[str], known: Dict[str, str]) -> Dict[str, str]:
+    # known: rótulo -> slug dos builds anteriores (manifesto); nunca muda, para não quebrar URLs publicadas.
+    # Só rótulos novos ganham slug; se colidir ("Saúde" já publicado, chega "SAUDE"), recebe -2, -3, ...
+    out = dict(known)
+    used = set(known.values())
+    for label in sorted(set(labels) - set(known)):
+        base = slug = _slug(label)
+        n = 1
+        while slug in used:
+            n += 1
+            slug = f"{base}-{n}"
+        used.add(slug)
+        out[label] = slug
+    return out
+
+def _page_name(n: int) -> str:
+    return "index.html" if n == 1 else f"pagina-{n}.html"
+
+def _write_atomic(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def _load_manifest(public_dir: str) -> Dict:
+    try:
+        with open(os.path.join(public_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build_gallery(items: List[Dict], public_dir: str = PUBLIC_DIR, templates_dir: str = TEMPLATES_DIR,
+                  shard_by: str = "category", page_size: int = PAGE_SIZE) -> BuildResult:
+    # Manifesto guarda o hash (e o HTML) de cada cartão e o hash de cada página: só é renderizado o cartão
+    # cujos dados mudaram e só é regravada a página cujo conteúdo mudou. Template/paginação diferentes = build completo.
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    from markupsafe import Markup
+
+    if shard_by not in SHARD_FIELDS:
+        raise ValueError(f"shard_by deve ser um de {sorted(SHARD_FIELDS)}")
+    env = Environment(loader=FileSystemLoader(templates_dir), autoescape=select_autoescape(["html", "j2"]))
+    sources = []
+    for name in TEMPLATE_FILES:
+        with open(os.path.join(templates_dir, name), encoding="utf-8") as f:
+            sources.append(f.read())
+    settings = {"templates": _digest(sources), "shard_by": shard_by, "page_size": page_size}
+    old = _load_manifest(public_dir)
+    res = BuildResult(items=len(items), full_rebuild=old.get("settings") != settings)
+    old_cards = {} if res.full_rebuild else old.get("cards", {})
+    old_pages = {} if res.full_rebuild else old.get("pages", {})
+
+    card_tpl = env.get_template("card.html.j2")
+    cards = {}
+    for it in items:
+        key, h = str(it["id"]), _digest(it)
+        cached = old_cards.get(key)
+        if cached and cached["hash"] == h:
+            cards[key] = cached
+            res.cards_reused += 1
+        else:
+            cards[key] = {"hash": h, "html": card_tpl.render(it=it)}
+            res.cards_rendered += 1
+
+    shards = defaultdict(list)
+    for it in items:
+        shards[it.get(shard_by) or SHARD_FIELDS[shard_by]].append(str(it["id"]))
+    # Contagens só na página inicial: um trabalho novo não muda a navegação das demais páginas
+    slugs = _slugs(list(shards), old.get("slugs", {}))
+    nav = [{"label": label, "href": f"{slugs[label]}/index.html"} for label in sorted(shards)]
+    counted = [dict(s, count=len(shards[s["label"]])) for s in nav]
+    res.shards = len(nav)
+
+    # (caminho relativo, contexto do template, ids dos cartões)
+    page_specs = [("index.html", {"root": "", "shard": None, "page": 1, "pages": 1, "shards": counted}, [])]
+    for label, ids in sorted(shards.items()):
+        slug = slugs[label]
+        n_pages = max(1, -(-len(ids) // page_size))
+        for n in range(1, n_pages + 1):
+            ctx = {"root": "../", "shard": label, "page": n, "pages": n_pages, "shards": nav,
+                   "prev_href": _page_name(n - 1) if n > 1 else None, "next_href": _page_name(n + 1) if n < n_pages else None}
+            page_specs.append((f"{slug}/{_page_name(n)}", ctx, ids[(n - 1) * page_size:n * page_size]))
+
+    page_tpl = env.get_template("index.html.j2")
+    pages = {}
+    for rel, ctx, ids in page_specs:
+        h = _digest({"settings": settings, "ctx": ctx, "cards": [cards[i]["hash"] for i in ids]})
+        pages[rel] = h
+        path = os.path.join(public_dir, rel)
+        if old_pages.get(rel) == h and os.path.exists(path):
+            res.pages_unchanged += 1
+            continue
+        _write_atomic(path, page_tpl.render(cards=[Markup(cards[i]["html"]) for i in ids], **ctx))
+        res.pages_written += 1
+
+    # Páginas que sumiram (categoria esvaziada, menos páginas); inclui as do manifesto anterior a um build completo
+    for rel in set(old.get("pages", {})) - set(pages):
+        path = os.path.join(public_dir, rel)
+        if os.path.exists(path):
+            os.remove(path)
+            res.pages_removed += 1
+            parent = os.path.dirname(path)
+            if parent != os.path.normpath(public_dir) and not os.listdir(parent):
+                os.rmdir(parent)
+    _write_atomic(os.path.join(public_dir, MANIFEST_NAME),
+                  json.dumps({"settings": settings, "cards": cards, "pages": pages, "slugs": slugs},
+                             ensure_ascii=False))
+    return res
+
+def publish_gallery(engine, min_score: float, public_dir: str = PUBLIC_DIR, templates_dir: str = TEMPLATES_DIR,
+                    shard_by: str = "category", page_size: int = PAGE_SIZE) -> BuildResult:
+    items = publishable_items(engine, min_score)
+    export_items(items, public_dir)
+    return build_gallery(items, public_dir, templates_dir, shard_by, page_size)
@@ -0,0 +1,100 @@
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from modules.db import get_query_cache
+
+# Tabelas lidas para montar o contexto: qualquer escrita nelas invalida o objeto em cache
+CONTEXT_TABLES = ("students", "groups", "group_members", "themes", "submissions")
+
+@dataclass(frozen=True)
+class Submission:
+    id: int
+    theme_title: str
+    submitted_at: str
+    submitted_by: str
+    report_path: str
+    slides_path: str
+    zip_path: str
+    media_link: str
+    media_file_path: str
+
+@dataclass(frozen=True)
+class StudentContext:
+    student_id: int
+    group_id: Optional[int] = None
+    group_code: Optional[str] = None
+    turma: Optional[str] = None
+    members: Tuple[str, ...] = ()
+    reserved_theme: Optional[str] = None
+    submission: Optional[Submission] = None
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    @property
+    def theme(self) -> Optional[str]:
+        # Tema reservado em themes; para submissões antigas, o título gravado na submissão
+        return self.reserved_theme or (self.submission.theme_title if self.submission else None) or None
+
+def _load_context(engine, student_id: int) -> StudentContext:
+    with engine.connect() as conn:
+        grp = conn.execute(text("""
+            SELECT g.id, g.code, g.turma FROM group_members gm JOIN groups g ON g.id = gm.group_id
+            WHERE gm.student_id = :sid ORDER BY g.id LIMIT 1
+        """), {"sid": student_id}).first()
+        if grp is None:
+            return StudentContext(student_id=student_id)
+        gid, code, turma = grp
+        members = conn.execute(text("""
+            SELECT COALESCE(s.name, gm.student_name) FROM group_members gm LEFT JOIN students s ON s.id = gm.student_id
+            WHERE gm.group_id = :gid ORDER BY gm.id
+        """), {"gid": gid}).scalars().all()
+        reserved = conn.execute(text("SELECT title FROM themes WHERE reserved_by = :gc AND status = 'reservado' LIMIT 1"),
+                                {"gc": code}).scalar()
+        sub = conn.execute(text("""
+            SELECT id, theme_title, submitted_at, submitted_by, report_path, slides_path, zip_path, media_link, media_file_path
+            FROM submissions WHERE group_code = :gc ORDER BY id LIMIT 1
+        """), {"gc": code}).first()
+    return StudentContext(student_id=student_id, group_id=gid, group_code=code, turma=turma, members=tuple(members),
+                          reserved_theme=reserved, submission=Submission(*sub) if sub else None)
+
+def student_context(engine, student_id: int) -> StudentContext:
+    # Grupo, integrantes, tema e submissão do aluno num único objeto; rerun sem escrita nessas tabelas = zero consultas
+    cache = get_query_cache(engine)
+    if cache is None:
+        return _load_context(engine, student_id)
+    return cache.memo(("student_context", int(student_id)), CONTEXT_TABLES, lambda: _load_context(engine, student_id))
+
+# ===================== Backfill de group_members.student_id =====================
+def _name_key(name: str) -> str:
+    # Sem acentos, sem diferença de maiúsculas e de espaços repetidos
+    name = unicodedata.normalize("NFKD", name or "")
+    return " ".join("".join(c for c in name if not unicodedata.combining(c)).casefold().split())
+
+def backfill_member_ids(conn) -> int:
+    # Hook pós-migração 0011 (app.py): integrantes que o SQL não resolveu pelo nome exato; compara nomes normalizados,
+    # aceitando só correspondência única (no geral ou na turma do grupo)
+    pending = conn.execute(text("""
+        SELECT gm.id, gm.student_name, g.turma FROM group_members gm LEFT JOIN groups g ON g.id = gm.group_id
+        WHERE gm.student_id IS NULL
+    """)).all()
+    if not pending:
+        return 0
+    by_name: Dict[str, List[Tuple[int, Optional[str]]]] = defaultdict(list)
+    for sid, name, turma in conn.execute(text("SELECT id, name, turma FROM students")):
+        by_name[_name_key(name)].append((sid, turma))
+    updates = []
+    for gm_id, name, turma in pending:
+        cands = by_name.get(_name_key(name), [])
+        if len(cands) > 1:
+            cands = [c for c in cands if c[1] == turma]
+        if len(cands) == 1:
+            updates.append({"sid": cands[0][0], "id": gm_id})
+    if updates:
+        conn.execute(text("UPDATE group_members SET student_id = :sid WHERE id = :id"), updates)
+    return len(updates)
@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from modules.db import write_tx
+
+# Variações de cabeçalho aceitas (primeira coluna não vazia vence)
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "ra": ("ra", "RA", "Ra"),
+    "name": ("name", "Nome", "nome", "NOME"),
+    "email": ("email", "Email", "E-mail", "e-mail", "EMAIL"),
+    "turma": ("turma", "Turma", "TURMA"),
+}
+
+UPSERT_SQL = """
+    INSERT INTO students(ra, name, email, turma, course_code, active) VALUES(?, ?, ?, ?, NULL, 1)
+    ON CONFLICT(ra) DO UPDATE SET name = excluded.name,
+        email = COALESCE(NULLIF(excluded.email, ''), students.email),
+        turma = COALESCE(NULLIF(excluded.turma, ''), students.turma)
+"""
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+def read_roster_csv(fileobj) -> pd.DataFrame:
+    # Tudo como texto: RA com zero à esquerda não vira número, célula vazia não vira NaN
+    return pd.read_csv(fileobj, dtype=str, keep_default_na=False, encoding_errors="replace")
+
+def normalize_roster(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    for field, aliases in COLUMN_ALIASES.items():
+        col = pd.Series("", index=df.index, dtype=object)
+        for alias in aliases:
+            if alias in df.columns:
+                vals = df[alias].fillna("").astype(str).str.strip()
+                col = col.mask(col == "", vals)
+        out[field] = col
+    out["name"] = out["name"].str.replace(r"\s{2,}", " ", regex=True)
+    return out
+
+def import_students_csv(engine, df: pd.DataFrame) -> ImportResult:
+    # Uma transação, um executemany: só vão ao banco os RAs novos ou com dados diferentes
+    roster = normalize_roster(df)
+    total = len(roster)
+    roster = roster[(roster["ra"] != "") & (roster["name"] != "")]
+    roster = roster.drop_duplicates("ra", keep="last")
+    result = ImportResult()
+    with write_tx(engine) as conn:
+        existing = pd.DataFrame(conn.exec_driver_sql("SELECT ra, name, email, turma FROM students").all(),
+                                columns=["ra", "name_db", "email_db", "turma_db"]).fillna("")
+        merged = roster.merge(existing, on="ra", how="left", indicator=True)
+        is_new = merged["_merge"] == "left_only"
+        merged[["name_db", "email_db", "turma_db"]] = merged[["name_db", "email_db", "turma_db"]].fillna("")
+        # Email/turma vazios no CSV mantêm o valor já gravado (mesma regra do UPSERT_SQL)
+        email_eff = merged["email"].mask(merged["email"] == "", merged["email_db"])
+        turma_eff = merged["turma"].mask(merged["turma"] == "", merged["turma_db"])
+        changed = ~is_new & ((merged["name"] != merged["name_db"]) | (email_eff != merged["email_db"])
+                             | (turma_eff != merged["turma_db"]))
+        todo = merged.loc[is_new | changed, ["ra", "name", "email", "turma"]]
+        if not todo.empty:
+            # Tuplas direto no executemany do driver: sem montar um dict por linha
+            conn.exec_driver_sql(UPSERT_SQL, list(todo.itertuples(index=False, name=None)))
+    result.inserted = int(is_new.sum())
+    result.updated = int(changed.sum())
+    result.skipped = total - result.inserted - result.updated
+    return result
@@ -1,67 +1,286 @@
-import re
-from sqlalchemy import text
+import codecs, mmap, multiprocessing, os, re, threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from modules.db import write_tx
+from modules.storage import UPLOAD_DIR, store_stream
 
 RA_LINE = re.compile(r"\b(RA\d{8})\b\s+([^\n\r]+)")
+TURMA_LINE = re.compile(r"\n(ECO-[A-Z0-9]+)")
+PROF_LINE = re.compile(r"Professor\s+(.+?)\s+\n")
+COD_LINE = re.compile(r"C[óo]d\.Usu[áa]rio:\s*(\d+)")
+SPACES = re.compile(r"\s{2,}")
+
+ENCODING_SAMPLE = 64 * 1024        # bytes do início do arquivo usados para escolher o encoding
+MMAP_MIN_BYTES = 1024 * 1024       # a partir daqui o arquivo é mapeado em vez de lido para a memória
+SCAN_BLOCK = 1024 * 1024           # texto decodificado por vez (cortado em fim de linha)
+
+def detect_encoding(sample: bytes) -> str:
+    # UTF-8 válido -> utf-8 (sequência cortada no fim da amostra não conta); bytes 0x80–0x9F
+    # (aspas/travessões do Windows) -> cp1252; caso contrário latin-1
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    return "cp1252" if re.search(rb"[\x80-\x9f]", sample) else "latin-1"
 
-def _read_text_any(file_path: str) -> str:
-    for enc in ("utf-8", "latin-1", "cp1252"):
+@contextmanager
+def _mapped(file_path: str):
+    # Um único read, ou mmap em exportações grandes (páginas vêm do cache do SO, sem cópia inteira na memória)
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+        else:
+            yield f.read()
+
+def _text_blocks(buf, enc: str, block: int = SCAN_BLOCK) -> Iterator[str]:
+    # Blocos de ~block bytes terminando em "\n"; cada bloco começa com "\n" (como se viesse depois de
+    # uma quebra de linha), exceto o primeiro – mesma semântica das regex sobre o texto inteiro
+    pos, size = 0, len(buf)
+    while pos < size:
+        end = buf.find(b"\n", min(pos + block, size) - 1)
+        end = size if end < 0 else end + 1
+        raw = buf[pos:end]
         try:
-            with open(file_path, "r", encoding=enc) as f:
-                return f.read()
+            txt = raw.decode(enc)
         except UnicodeDecodeError:
-            continue
-    return open(file_path, "rb").read().decode("latin-1", "ignore")
+            txt = raw.decode("cp1252", "replace")   # amostra era UTF-8/ASCII, mas este trecho não
+        yield ("\n" if pos else "") + txt.replace("\r\n", "\n")
+        pos = end
+
+class PucTxt:
+    # Pauta do SIGA lida em uma passada: os alunos são gerados sob demanda, bloco a bloco, e o
+    # cabeçalho (turma, professor, código, disciplina) é preenchido conforme o texto passa –
+    # só está completo ao fim da iteração
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._reset()
+
+    def _reset(self):
+        self.encoding = None
+        self.turma: Optional[str] = None
+        self.professor = ""
+        self.cod_professor = ""
+        self._industrial = False
+        self._brasileira = False
+
+    @property
+    def disciplina(self) -> str:
+        return "ECONOMIA INDUSTRIAL" if self._industrial else ("EBC II" if self._brasileira else "")
+
+    def header(self) -> Dict[str, str]:
+        return {"turma": self.turma, "disciplina": self.disciplina,
+                "professor": self.professor, "cod_professor": self.cod_professor}
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        self._reset()
+        with _mapped(self.file_path) as buf:
+            self.encoding = detect_encoding(buf[:ENCODING_SAMPLE])
+            for txt in _text_blocks(buf, self.encoding):
+                if self.turma is None:
+                    m = TURMA_LINE.search(txt)
+                    if m:
+                        self.turma = m.group(1).replace("ECO-", "")
+                if not self.professor:
+                    m = PROF_LINE.search(txt)
+                    if m:
+                        self.professor = m.group(1).strip()
+                if not self.cod_professor:
+                    m = COD_LINE.search(txt)
+                    if m:
+                        self.cod_professor = m.group(1)
+                if not self._industrial:
+                    up = txt.upper()
+                    self._industrial = "INDUSTRIAL" in up
+                    self._brasileira = self._brasileira or "BRASILEIRA" in up
+                for ra, name in RA_LINE.findall(txt):
+                    yield ra, SPACES.sub(" ", name.strip())
 
 def parse_puc_txt(file_path: str):
-    txt = _read_text_any(file_path).replace("\r\n", "\n")
-    turma = None
-    m_turma = re.search(r"\n(ECO-[A-Z0-9]+)", txt)
-    if m_turma:
-        turma = m_turma.group(1).strip().replace("ECO-", "")
-    prof = ""
-    m_prof = re.search(r"Professor\s+(.+?)\s+\n", txt)
-    if m_prof:
-        prof = m_prof.group(1).strip()
-    m_cod = re.search(r"C[óo]d\.Usu[áa]rio:\s*(\d+)", txt)
-    cod_prof = m_cod.group(1) if m_cod else ""
-    disciplina = "ECONOMIA INDUSTRIAL" if "INDUSTRIAL" in txt.upper() else ("EBC II" if "BRASILEIRA" in txt.upper() else "")
-
-    students = []
-    for m in RA_LINE.finditer(txt):
-        ra = m.group(1).strip()
-        name = re.sub(r"\s{2,}", " ", m.group(2).strip())
-        students.append((ra, name))
-    return {
-        "turma": turma, "disciplina": disciplina,
-        "professor": prof, "cod_professor": cod_prof,
-        "students": students
-    }
-
-def upsert_students_and_enroll(engine, term: str, disciplina_code: str, turma: str, students: list):
-    with engine.begin() as conn:
-        did = conn.execute(text("SELECT id FROM disciplines WHERE code=:c"), {"c": disciplina_code}).scalar()
-        if not did:
-            conn.execute(text("INSERT INTO disciplines(code,name) VALUES(:c,:n)"),
-                         {"c": disciplina_code, "n": "Economia Industrial" if disciplina_code=="IND" else "Economia Brasileira II"})
-            did = conn.execute(text("SELECT id FROM disciplines WHERE code=:c"), {"c": disciplina_code}).scalar()
-        oid = conn.execute(text("""SELECT id FROM offerings WHERE discipline_id=:d AND term=:t AND turma=:u"""),
-                           {"d": did, "t": term, "u": turma}).scalar()
-        if not oid:
-            conn.execute(text("""INSERT INTO offerings(discipline_id,term,turma) VALUES(:d,:t,:u)"""),
-                         {"d": did, "t": term, "u": turma})
-            oid = conn.execute(text("SELECT id FROM offerings WHERE discipline_id=:d AND term=:t AND turma=:u"),
-                               {"d": did, "t": term, "u": turma}).scalar()
-        for ra, name in students:
-            sid = conn.execute(text("SELECT id FROM students WHERE ra=:ra"), {"ra": ra}).scalar()
-            if not sid:
-                conn.execute(text("INSERT INTO students(ra,name,turma,active) VALUES(:ra,:n,:tu,1)"),
-                             {"ra": ra, "n": name, "tu": turma})
-                sid = conn.execute(text("SELECT id FROM students WHERE ra=:ra"), {"ra": ra}).scalar()
-            eid = conn.execute(text("SELECT id FROM enrollments WHERE student_id=:s AND offering_id=:o"),
-                               {"s": sid, "o": oid}).scalar()
-            if not eid:
-                conn.execute(text("INSERT INTO enrollments(student_id,offering_id,active) VALUES(:s,:o,1)"),
-                             {"s": sid, "o": oid})
-            else:
-                conn.execute(text("UPDATE enrollments SET active=1 WHERE id=:e"), {"e": eid})
-    return True
+    doc = PucTxt(file_path)
+    students = list(doc)
+    return dict(doc.header(), students=students)
+
+@dataclass
+class RosterDiff:
+    new_students: List[str] = field(default_factory=list)   # RA criado agora (já matriculado)
+    enrolled: List[str] = field(default_factory=list)       # aluno existente, matrícula nova nesta oferta
+    reactivated: List[str] = field(default_factory=list)    # matrícula existente que estava inativa
+    unchanged: List[str] = field(default_factory=list)      # aluno e matrícula ativa já existiam
+
+# Diff calculado antes das escritas (mesma transação): a pauta contra students/enrollments da oferta
+ROSTER_DIFF_SQL = """
+    SELECT r.ra, s.id IS NULL AS is_new, e.id IS NULL AS no_enrollment, COALESCE(e.active, 0) AS active
+    FROM roster_import r
+    LEFT JOIN students s ON s.ra = r.ra
+    LEFT JOIN enrollments e ON e.student_id = s.id AND e.offering_id = :o
+    ORDER BY r.ra
+"""
+
+def upsert_students_and_enroll(engine, term: str, disciplina_code: str, turma: str, students: list,
+                               conn=None) -> RosterDiff:
+    # conn: transação já aberta pelo chamador (importação de vários arquivos num único commit)
+    if conn is not None:
+        return _enroll(conn, term, disciplina_code, turma, students)
+    with write_tx(engine) as c:
+        return _enroll(c, term, disciplina_code, turma, students)
+
+def _enroll(conn, term: str, disciplina_code: str, turma: str, students: list) -> RosterDiff:
+    # Número fixo de comandos, independente do tamanho da pauta: a pauta vai para uma tabela
+    # temporária (um executemany) e alunos/matrículas são resolvidos com INSERT ... SELECT ... ON CONFLICT
+    conn.execute(text("INSERT INTO disciplines(code,name) VALUES(:c,:n) ON CONFLICT(code) DO NOTHING"),
+                 {"c": disciplina_code, "n": "Economia Industrial" if disciplina_code=="IND" else "Economia Brasileira II"})
+    conn.execute(text("""
+        INSERT INTO offerings(discipline_id,term,turma) SELECT id, :t, :u FROM disciplines WHERE code=:c
+        ON CONFLICT(discipline_id,term,turma) DO NOTHING
+    """), {"c": disciplina_code, "t": term, "u": turma})
+    oid = conn.execute(text("""SELECT o.id FROM offerings o JOIN disciplines d ON d.id = o.discipline_id
+                               WHERE d.code=:c AND o.term=:t AND o.turma=:u"""),
+                       {"c": disciplina_code, "t": term, "u": turma}).scalar()
+    conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS roster_import(ra TEXT PRIMARY KEY, name TEXT NOT NULL)")
+    conn.exec_driver_sql("DELETE FROM roster_import")
+    conn.exec_driver_sql("INSERT OR REPLACE INTO roster_import(ra, name) VALUES(?, ?)",
+                         [(ra, name) for ra, name in students])
+
+    diff = RosterDiff()
+    for ra, is_new, no_enrollment, active in conn.execute(text(ROSTER_DIFF_SQL), {"o": oid}):
+        if is_new:
+            diff.new_students.append(ra)
+        elif no_enrollment:
+            diff.enrolled.append(ra)
+        elif active != 1:
+            diff.reactivated.append(ra)
+        else:
+            diff.unchanged.append(ra)
+
+    conn.execute(text("""
+        INSERT INTO students(ra,name,turma,active) SELECT ra, name, :tu, 1 FROM roster_import WHERE true
+        ON CONFLICT(ra) DO NOTHING
+    """), {"tu": turma})
+    conn.execute(text("""
+        INSERT INTO enrollments(student_id,offering_id,active)
+        SELECT s.id, :o, 1 FROM roster_import r JOIN students s ON s.ra = r.ra WHERE true
+        ON CONFLICT(student_id,offering_id) DO UPDATE SET active=1 WHERE active IS NOT 1
+    """), {"o": oid})
+    conn.exec_driver_sql("DELETE FROM roster_import")
+    return diff
+
+# ===================== Importação de vários TXT =====================
+DISCIPLINE_CODES = {"ECONOMIA INDUSTRIAL": "IND", "EBC II": "EBCII"}
+PARSE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# Abaixo disso interpretar no próprio processo sai mais barato que despachar para o pool
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+@dataclass
+class TxtFileResult:
+    name: str
+    sha256: str
+    status: str                  # importado | já importado | repetido | falhou
+    disciplina: str = ""
+    turma: str = ""
+    students: int = 0
+    error: str = ""
+
+@dataclass
+class TxtImportResult:
+    files: List[TxtFileResult] = field(default_factory=list)
+    offerings: Dict[Tuple[str, str], RosterDiff] = field(default_factory=dict)   # (disciplina, turma) -> diff
+
+    def count(self, status: str) -> int:
+        return sum(1 for f in self.files if f.status == status)
+
+def _get_parse_pool(workers: int = PARSE_WORKERS) -> ProcessPoolExecutor:
+    # Um pool por processo; "spawn" porque o Streamlit já tem várias threads rodando (fork + threads não é seguro)
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+    return _parse_pool
+
+def _ra_digits(ra: str) -> str:
+    # O login do aluno usa só os dígitos (mesmo formato das importações manuais/CSV)
+    return ra[2:] if ra.upper().startswith("RA") else ra
+
+def _scan_roster(file_path: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    # Roda no worker: consome a pauta sob demanda direto num dict RA -> nome (sem lista intermediária)
+    doc = PucTxt(file_path)
+    students: Dict[str, str] = {}
+    for ra, name in doc:
+        students.setdefault(_ra_digits(ra), name)
+    return doc.header(), students
+
+def import_txt_files(engine, files: List[Tuple[str, BinaryIO]], term: str, imported_by: str = "",
+                     workers: int = PARSE_WORKERS, upload_dir: str = UPLOAD_DIR) -> TxtImportResult:
+    # files: (nome, arquivo) – guarda cada um no armazenamento por conteúdo, pula o que já foi importado
+    # (sha256 em roster_imports), interpreta o resto em paralelo com parse_puc_txt, junta por oferta
+    # (disciplina x turma) sem RA repetido e grava tudo numa única transação
+    result = TxtImportResult()
+    pending: List[Tuple[TxtFileResult, str]] = []
+    pending_bytes = 0
+    seen = set()
+    stored = [(name, store_stream(fobj, ".txt", upload_dir)) for name, fobj in files]
+    with engine.connect() as conn:
+        hashes = list({sf.sha256 for _, sf in stored})
+        known = set(conn.execute(text("SELECT sha256 FROM roster_imports WHERE sha256 IN :h")
+                                 .bindparams(bindparam("h", expanding=True)), {"h": hashes}).scalars()) if hashes else set()
+    for name, sf in stored:
+        fr = TxtFileResult(name=name, sha256=sf.sha256, status="importado")
+        result.files.append(fr)
+        if sf.sha256 in known:
+            fr.status = "já importado"
+        elif sf.sha256 in seen:
+            fr.status = "repetido"
+        else:
+            seen.add(sf.sha256)
+            pending.append((fr, sf.path))
+            pending_bytes += sf.size
+    if not pending:
+        return result
+
+    paths = [path for _, path in pending]
+    if workers > 1 and len(paths) > 1 and pending_bytes >= PARALLEL_MIN_BYTES:
+        parsed = list(_get_parse_pool(workers).map(_scan_roster, paths))
+    else:
+        parsed = [_scan_roster(path) for path in paths]
+
+    rosters: Dict[Tuple[str, str], Dict[str, str]] = {}
+    imported: List[TxtFileResult] = []
+    for (fr, _), (info, students) in zip(pending, parsed):
+        fr.disciplina = DISCIPLINE_CODES.get(info["disciplina"], "")
+        fr.turma = info["turma"] or ""
+        fr.students = len(students)
+        if not fr.disciplina or not fr.turma:
+            fr.status, fr.error = "falhou", "turma/disciplina não identificada no arquivo"
+            continue
+        if not students:
+            fr.status, fr.error = "falhou", "nenhum RA encontrado"
+            continue
+        roster = rosters.setdefault((fr.disciplina, fr.turma), {})
+        for ra, name in students.items():
+            roster.setdefault(ra, name)
+        imported.append(fr)
+
+    if rosters:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with write_tx(engine) as conn:
+            for (disc, turma), roster in rosters.items():
+                result.offerings[(disc, turma)] = upsert_students_and_enroll(engine, term, disc, turma,
+                                                                             list(roster.items()), conn=conn)
+            conn.execute(text("""
+                INSERT INTO roster_imports(sha256, file_name, term, discipline_code, turma, students, imported_by, imported_at)
+                VALUES(:h, :n, :t, :d, :u, :s, :by, :at) ON CONFLICT(sha256) DO NOTHING
+            """), [{"h": fr.sha256, "n": fr.name, "t": term, "d": fr.disciplina, "u": fr.turma, "s": fr.students,
+                    "by": imported_by, "at": now} for fr in imported])
+    return result
@@ -0,0 +1,165 @@
+import os, re, threading, time
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+
+from modules.db import write_tx
+from modules.quota import reconcile_ledger
+from modules.storage import UPLOAD_DIR
+
+JANITOR_INTERVAL = 30 * 60     # s entre varreduras do thread em segundo plano
+GRACE_SECONDS = 2 * 3600       # arquivo mais novo que isso pode ser de um envio ainda em andamento
+FILE_COLUMNS = (("report_path", "report_size"), ("slides_path", "slides_size"),
+                ("zip_path", "zip_size"), ("media_file_path", "media_size"))
+BUNDLE_NAME = re.compile(r"^sub(\d+)_[0-9a-f]+\.zip$")
+
+# Tudo que ainda aponta para um arquivo local: submissões e backups para o SharePoint não concluídos
+REFERENCED_SQL = """
+    SELECT id, report_path, slides_path, zip_path, media_file_path, report_size, slides_size, zip_size, media_size
+    FROM submissions
+"""
+PENDING_JOBS_SQL = "SELECT local_path FROM upload_jobs WHERE status IN ('pendente', 'enviando', 'falhou')"
+# Submissões anteriores à migração 0004 não têm tamanho: preenchido a partir do disco (NULL continua NULL)
+BACKFILL_SQL = """
+    UPDATE submissions SET report_size = COALESCE(report_size, :report_size), slides_size = COALESCE(slides_size, :slides_size),
+                           zip_size = COALESCE(zip_size, :zip_size), media_size = COALESCE(media_size, :media_size)
+    WHERE id = :id
+"""
+
+@dataclass
+class JanitorReport:
+    scanned: int = 0
+    orphans: List[str] = field(default_factory=list)
+    reclaimed_bytes: int = 0
+    partials_removed: int = 0       # uploads/tmp/*.part de envios interrompidos
+    bundles_removed: int = 0        # ZIPs de submissões que não existem mais
+    sizes_backfilled: int = 0       # submissões antigas sem *_size (passam a contar na quota)
+    ledger_fixed: int = 0
+    reservations_expired: int = 0
+    dry_run: bool = False
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+def _backfill_sizes(engine, rows) -> int:
+    # Tamanhos lidos do disco; os triggers da migração 0014 levam a diferença para o ledger
+    updates, files = [], 0
+    for row in rows:
+        params = {"id": row[0]}
+        for (_, size_col), path, size in zip(FILE_COLUMNS, row[1:5], row[5:9]):
+            params[size_col] = os.path.getsize(path) if size is None and path and os.path.isfile(path) else None
+            files += params[size_col] is not None
+        if any(params[size_col] is not None for _, size_col in FILE_COLUMNS):
+            updates.append(params)
+    if updates:
+        with write_tx(engine) as conn:
+            conn.execute(text(BACKFILL_SQL), updates)
+    return files
+
+def reconcile_uploads(engine, upload_dir: str = UPLOAD_DIR, grace: float = GRACE_SECONDS, dry_run: bool = False,
+                      now: Optional[float] = None) -> JanitorReport:
+    # Confere uploads/ contra submissions/upload_jobs e remove o que nada referencia (só arquivos mais velhos
+    # que grace: um envio em andamento grava os arquivos antes da linha em submissions)
+    now = now or time.time()
+    report = JanitorReport(dry_run=dry_run)
+    with engine.connect() as conn:
+        rows = conn.execute(text(REFERENCED_SQL)).all()
+        pending = conn.execute(text(PENDING_JOBS_SQL)).scalars().all()
+    submission_ids = {r[0] for r in rows}
+    referenced: Set[str] = {_norm(p) for r in rows for p in r[1:5] if p}
+    referenced.update(_norm(p) for p in pending if p)
+    if not dry_run:
+        report.sizes_backfilled = _backfill_sizes(engine, rows)
+        report.ledger_fixed, report.reservations_expired = reconcile_ledger(engine, now)
+
+    tmp_dir = _norm(os.path.join(upload_dir, "tmp"))
+    bundle_dir = _norm(os.path.join(upload_dir, "bundles"))
+    for root, dirs, files in os.walk(upload_dir, topdown=False):
+        nroot = _norm(root)
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            report.scanned += 1
+            if now - st.st_mtime < grace:
+                continue
+            if nroot == tmp_dir:
+                kind = "partials_removed"
+            elif nroot == bundle_dir:
+                m = BUNDLE_NAME.match(name)
+                if not m or int(m.group(1)) in submission_ids:
+                    continue
+                kind = "bundles_removed"
+            elif _norm(path) in referenced:
+                continue
+            else:
+                kind = None
+                report.orphans.append(path)
+            report.reclaimed_bytes += st.st_size
+            if kind:
+                setattr(report, kind, getattr(report, kind) + 1)
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        # Pastas da árvore por hash que ficaram vazias (uploads/objects/ab/cd)
+        if not dry_run and nroot not in (_norm(upload_dir), tmp_dir, bundle_dir):
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+    return report
+
+# ===================== Thread em segundo plano =====================
+class Janitor:
+    def __init__(self, engine, upload_dir: str = UPLOAD_DIR, interval: float = JANITOR_INTERVAL,
+                 grace: float = GRACE_SECONDS):
+        self.engine = engine
+        self.upload_dir = upload_dir
+        self.interval = interval
+        self.grace = grace
+        self.last_report: Optional[JanitorReport] = None
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Janitor":
+        self._thread = threading.Thread(target=self._run, name="uploads-janitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self, dry_run: bool = False) -> JanitorReport:
+        report = reconcile_uploads(self.engine, self.upload_dir, self.grace, dry_run=dry_run)
+        if not dry_run:
+            self.last_report, self.last_run, self.last_error = report, time.time(), None
+        return report
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"   # erro de banco/disco: tenta no próximo ciclo
+            self._stop.wait(self.interval)
+
+_janitor: Optional[Janitor] = None
+_janitor_lock = threading.Lock()
+
+def ensure_janitor(engine, upload_dir: str = UPLOAD_DIR, interval: float = JANITOR_INTERVAL) -> Janitor:
+    # Um janitor por processo, iniciado na primeira sessão
+    global _janitor
+    if _janitor is None:
+        with _janitor_lock:
+            if _janitor is None:
+                _janitor = Janitor(engine, upload_dir, interval).start()
+    return _janitor
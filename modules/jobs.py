@@ -0,0 +1,206 @@
+import random, threading, time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from modules.db import write_tx
+
+MAX_ATTEMPTS = 8
+BASE_DELAY = 5.0        # s; dobra a cada falha
+MAX_DELAY = 15 * 60.0   # s
+LEASE_SECONDS = 30 * 60.0  # job 'enviando' sem resposta volta para a fila (worker/processo morreu)
+POLL_INTERVAL = 5.0
+
+class LeaseLost(RuntimeError):
+    # O lease do job venceu e outro worker o reservou: este worker para de enviar
+    pass
+
+def _now_str() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def backoff_delay(attempts: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    # Backoff exponencial com jitter (50–100% do valor)
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * (0.5 + random.random() / 2)
+
+# ===================== Fila =====================
+def enqueue_upload(engine, local_path: str, remote_name: str, submission_id: Optional[int] = None,
+                   max_attempts: int = MAX_ATTEMPTS, conn=None) -> None:
+    params = {"sid": submission_id, "lp": local_path, "rn": remote_name, "ma": max_attempts, "at": _now_str()}
+    sql = text("""
+        INSERT INTO upload_jobs(submission_id, local_path, remote_name, status, attempts, max_attempts, next_attempt_at, created_at, updated_at)
+        VALUES(:sid, :lp, :rn, 'pendente', 0, :ma, 0, :at, :at)
+    """)
+    if conn is not None:
+        conn.execute(sql, params)
+        return
+    with write_tx(engine) as c:
+        c.execute(sql, params)
+
+def claim_job(engine, lease: float = LEASE_SECONDS) -> Optional[Dict]:
+    # Reserva atômica: SELECT + UPDATE no mesmo BEGIN IMMEDIATE (nenhum outro escritor entre os dois),
+    # então cada job vai para um único worker. Sem RETURNING (SQLite < 3.35)
+    now = time.time()
+    with write_tx(engine) as conn:
+        row = conn.execute(text("""
+            SELECT id, local_path, remote_name, attempts, max_attempts FROM upload_jobs
+            WHERE status IN ('pendente','enviando') AND next_attempt_at <= :now
+            ORDER BY next_attempt_at, id LIMIT 1
+        """), {"now": now}).mappings().first()
+        if row is None:
+            return None
+        conn.execute(text("""
+            UPDATE upload_jobs SET status='enviando', attempts=attempts+1, next_attempt_at=:lease, updated_at=:at
+            WHERE id=:id
+        """), {"id": row["id"], "lease": now + lease, "at": _now_str()})
+    return dict(row, attempts=row["attempts"] + 1)
+
+# complete_job/fail_job só valem para quem ainda detém a reserva: status 'enviando' e o mesmo attempts
+# devolvido por claim_job. Se o lease venceu e outro worker pegou o job, a resposta do primeiro é ignorada
+# (não desfaz um 'concluido' nem agenda um reenvio completo).
+def complete_job(engine, job: Dict) -> bool:
+    with write_tx(engine) as conn:
+        res = conn.execute(text("""
+            UPDATE upload_jobs SET status='concluido', last_error=NULL, upload_url=NULL, bytes_uploaded=total_bytes, updated_at=:at
+            WHERE id=:id AND status='enviando' AND attempts=:claimed
+        """), {"id": job["id"], "claimed": job["attempts"], "at": _now_str()})
+    return res.rowcount == 1
+
+def fail_job(engine, job: Dict, error: str, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY) -> Optional[str]:
+    # Devolve o novo status, ou None se o job já não era deste worker
+    if job["attempts"] >= job["max_attempts"]:
+        status, next_at = "falhou", 0
+    else:
+        status, next_at = "pendente", time.time() + backoff_delay(job["attempts"], base_delay, max_delay)
+    with write_tx(engine) as conn:
+        res = conn.execute(text("""
+            UPDATE upload_jobs SET status=:st, next_attempt_at=:nx, last_error=:err, updated_at=:at
+            WHERE id=:id AND status='enviando' AND attempts=:claimed
+        """), {"st": status, "nx": next_at, "err": error[:500], "at": _now_str(), "id": job["id"], "claimed": job["attempts"]})
+    return status if res.rowcount == 1 else None
+
+def retry_failed(engine) -> int:
+    with write_tx(engine) as conn:
+        res = conn.execute(text("""
+            UPDATE upload_jobs SET status='pendente', attempts=0, next_attempt_at=0, updated_at=:at
+            WHERE status='falhou'
+        """), {"at": _now_str()})
+        return res.rowcount
+
+def job_counts(engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT status, COUNT(*) FROM upload_jobs GROUP BY status")).all()
+    counts = {"pendente": 0, "enviando": 0, "concluido": 0, "falhou": 0}
+    counts.update({status: n for status, n in rows})
+    return counts
+
+def list_jobs(engine, statuses=("pendente", "enviando", "falhou"), limit: int = 50) -> List[Dict]:
+    marks = ", ".join(f":s{i}" for i in range(len(statuses)))
+    params = {f"s{i}": s for i, s in enumerate(statuses)}
+    params["lim"] = limit
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT id, submission_id, remote_name, status, attempts, max_attempts, bytes_uploaded, total_bytes, last_error, updated_at
+            FROM upload_jobs WHERE status IN ({marks}) ORDER BY id DESC LIMIT :lim
+        """), params).mappings().all()
+    return [dict(r) for r in rows]
+
+class JobSessionStore:
+    # Progresso da sessão de upload gravado no próprio job (sobrevive a retry e a restart do processo).
+    # Cada save (um por bloco confirmado) também renova o lease: upload lento não volta para a fila no meio.
+    def __init__(self, engine, job_id: int, claimed: int, lease: float = LEASE_SECONDS):
+        self.engine = engine
+        self.job_id = job_id
+        self.claimed = claimed
+        self.lease = lease
+
+    def load(self):
+        with self.engine.connect() as conn:
+            row = conn.execute(text("SELECT upload_url, bytes_uploaded FROM upload_jobs WHERE id=:id"),
+                               {"id": self.job_id}).first()
+        return (row[0], int(row[1] or 0)) if row and row[0] else None
+
+    def save(self, upload_url: str, offset: int, total: int) -> None:
+        with write_tx(self.engine) as conn:
+            res = conn.execute(text("""
+                UPDATE upload_jobs SET upload_url=:u, bytes_uploaded=:o, total_bytes=:t, next_attempt_at=:lease, updated_at=:at
+                WHERE id=:id AND status='enviando' AND attempts=:claimed
+            """), {"u": upload_url, "o": offset, "t": total, "lease": time.time() + self.lease, "at": _now_str(),
+                    "id": self.job_id, "claimed": self.claimed})
+        if res.rowcount != 1:
+            raise LeaseLost(f"job {self.job_id} reservado por outro worker")
+
+    def clear(self) -> None:
+        # Não mexe na sessão de quem reservou o job depois deste worker
+        with write_tx(self.engine) as conn:
+            conn.execute(text("""
+                UPDATE upload_jobs SET upload_url=NULL, bytes_uploaded=0, updated_at=:at
+                WHERE id=:id AND status='enviando' AND attempts=:claimed
+            """), {"at": _now_str(), "id": self.job_id, "claimed": self.claimed})
+
+# ===================== Pool de workers =====================
+class UploadWorkerPool:
+    def __init__(self, engine, uploader: Callable[[str, str, JobSessionStore], None], workers: int = 2,
+                 poll_interval: float = POLL_INTERVAL, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, lease: float = LEASE_SECONDS):
+        self.engine = engine
+        self.uploader = uploader
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "UploadWorkerPool":
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"upload-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    def run_once(self) -> bool:
+        job = claim_job(self.engine, self.lease)
+        if job is None:
+            return False
+        try:
+            self.uploader(job["local_path"], job["remote_name"], JobSessionStore(self.engine, job["id"], job["attempts"], self.lease))
+        except Exception as e:
+            fail_job(self.engine, job, f"{type(e).__name__}: {e}", self.base_delay, self.max_delay)
+        else:
+            complete_job(self.engine, job)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                busy = self.run_once()
+            except Exception:
+                busy = False  # erro de banco: espera o próximo ciclo
+            if not busy:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+_pool: Optional[UploadWorkerPool] = None
+_pool_lock = threading.Lock()
+
+def ensure_worker_pool(engine, uploader: Callable[[str, str, JobSessionStore], None], workers: int = 2) -> UploadWorkerPool:
+    # Um pool por processo, iniciado na primeira sessão que precisar dele
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = UploadWorkerPool(engine, uploader, workers=workers).start()
+    return _pool
@@ -0,0 +1,126 @@
+import os, re, json, sqlite3, threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from modules.db import write_tx
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+_bootstrapped = set()
+_bootstrap_lock = threading.Lock()
+
+# ===================== Runner de migrações versionadas =====================
+def list_migrations(sql_dir: str = SQL_DIR) -> List[Tuple[int, str, str]]:
+    found = []
+    for fname in os.listdir(sql_dir):
+        m = MIGRATION_FILE.match(fname)
+        if m:
+            found.append((int(m.group(1)), m.group(2), os.path.join(sql_dir, fname)))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Versões de migração duplicadas em {sql_dir}")
+    return found
+
+def _statements(script: str):
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = buf.strip()
+            buf = ""
+            body = "\n".join(l for l in stmt.splitlines() if not l.strip().startswith("--")).strip()
+            if body:
+                yield stmt
+    if buf.strip() and "\n".join(l for l in buf.splitlines() if not l.strip().startswith("--")).strip():
+        raise ValueError(f"Comando SQL incompleto no fim do script: {buf.strip()[:80]}")
+
+def _exec_migration_stmt(conn, stmt: str):
+    try:
+        conn.exec_driver_sql(stmt)
+    except OperationalError as e:
+        # Bancos criados antes do runner já podem ter a coluna (antigo _add_col)
+        if "duplicate column name" not in str(e.orig):
+            raise
+
+def applied_versions(conn) -> set:
+    conn.exec_driver_sql("""
+    CREATE TABLE IF NOT EXISTS schema_version(
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT
+    );
+    """)
+    return {r[0] for r in conn.exec_driver_sql("SELECT version FROM schema_version")}
+
+def run_migrations(engine, sql_dir: str = SQL_DIR,
+                   post_migration: Optional[Dict[int, Callable]] = None) -> List[int]:
+    # post_migration: versão -> fn(conn), chamada na mesma transação logo depois que aquela versão é aplicada
+    # (ajustes em Python que o SQL não faz; o runner não conhece os módulos de funcionalidade)
+    post_migration = post_migration or {}
+    applied = []
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    for version, name, path in list_migrations(sql_dir):
+        if version in done:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            script = f.read()
+        # BEGIN IMMEDIATE: outro processo aplicando a mesma versão espera e depois a pula
+        with write_tx(engine) as conn:
+            if version in applied_versions(conn):
+                continue
+            for stmt in _statements(script):
+                _exec_migration_stmt(conn, stmt)
+            if version in post_migration:
+                post_migration[version](conn)
+            conn.execute(text("INSERT OR IGNORE INTO schema_version(version, name, applied_at) VALUES(:v, :n, :at)"),
+                         {"v": version, "n": name, "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+        applied.append(version)
+    return applied
+
+# ===================== Sementes (config, docentes, temas) =====================
+def _seed(conn, config_defaults: dict, professors: list, themes_path: str = None):
+    conn.execute(text("INSERT OR IGNORE INTO config(key,value) VALUES(:k,:v)"),
+                 [{"k": k, "v": str(v)} for k, v in config_defaults.items()])
+    if professors:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute(text("""
+            INSERT OR IGNORE INTO professors(name,email,role,pin,approved,discipline_code,created_at)
+            VALUES(:name, :email, :role, :pin, :approved, :disc, :created_at)
+        """), [{"name": name, "email": email, "role": role, "pin": pin, "approved": approved,
+                "disc": disc, "created_at": now} for name, email, role, pin, approved, disc in professors])
+    # Carrega temas do JSON apenas se a tabela estiver vazia
+    if themes_path and os.path.exists(themes_path):
+        if conn.execute(text("SELECT id FROM themes LIMIT 1")).first() is None:
+            try:
+                with open(themes_path, "r", encoding="utf-8") as f:
+                    themes_list = json.load(f)
+            except Exception:
+                themes_list = []
+            rows = [{"num": it.get("number") or i, "title": it.get("title"), "cat": it.get("category") or "Outro"}
+                    for i, it in enumerate(themes_list, start=1) if it.get("title")]
+            if rows:
+                conn.execute(text("""
+                    INSERT OR IGNORE INTO themes(number, title, category, status)
+                    VALUES(:num, :title, :cat, 'livre')
+                """), rows)
+
+def bootstrap(engine, config_defaults: dict, professors: list, themes_path: str = None,
+              sql_dir: str = SQL_DIR, post_migration: Optional[Dict[int, Callable]] = None) -> bool:
+    # Executa migrações + sementes uma única vez por processo (e por banco)
+    key = str(engine.url)
+    if key in _bootstrapped:
+        return False
+    with _bootstrap_lock:
+        if key in _bootstrapped:
+            return False
+        run_migrations(engine, sql_dir, post_migration)
+        with write_tx(engine) as conn:
+            _seed(conn, config_defaults, professors, themes_path)
+        _bootstrapped.add(key)
+    return True
@@ -0,0 +1,169 @@
+import csv, functools, json, logging, math, os, threading, time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PERF_DIR = os.path.join("data", "perf")
+RING_SIZE = int(os.environ.get("APP_PERF_RING", 5000))           # eventos guardados por tipo (os mais antigos saem)
+SLOW_QUERY_MS = float(os.environ.get("APP_SLOW_QUERY_MS", 200))   # consulta acima disso vai para o log de lentas
+SQL_KEY_LEN = 160
+
+log = logging.getLogger("app.perf")
+
+# Desligado por padrão: get_df/exec_sql e as seções só testam esta flag (APP_PERF=1 ou o toggle da aba Desempenho)
+_enabled = os.environ.get("APP_PERF", "0") == "1"
+_lock = threading.Lock()
+_queries: deque = deque(maxlen=RING_SIZE)    # (ts, tipo, sql, ms, linhas, do cache, seção)
+_sections: deque = deque(maxlen=RING_SIZE)   # (ts, seção, ms)
+_reruns: deque = deque(maxlen=RING_SIZE)     # (ts, perfil, ms)
+_slow: deque = deque(maxlen=200)             # (ts, tipo, sql, ms, linhas, params)
+# Um rerun por thread (o Streamlit roda o script de cada sessão numa thread própria)
+_local = threading.local()
+
+def enabled() -> bool:
+    return _enabled
+
+def set_enabled(on: bool) -> None:
+    global _enabled
+    _enabled = bool(on)
+
+def reset() -> None:
+    with _lock:
+        for buf in (_queries, _sections, _reruns, _slow):
+            buf.clear()
+
+@functools.lru_cache(maxsize=1024)
+def _sql_key(sql: str) -> str:
+    # Mesmo SQL com espaçamento diferente = mesma consulta (o app tem poucas dezenas de SQL distintos)
+    key = " ".join(sql.split())
+    return key if len(key) <= SQL_KEY_LEN else key[:SQL_KEY_LEN - 1] + "…"
+
+# ===================== Coleta =====================
+def record_query(kind: str, sql: str, seconds: float, rows: int, cached: bool = False,
+                 params: Optional[Dict] = None) -> None:
+    ms = seconds * 1000
+    key = _sql_key(sql)
+    ev = (time.time(), kind, key, ms, int(rows), bool(cached), getattr(_local, "section", None))
+    with _lock:
+        _queries.append(ev)
+        if ms >= SLOW_QUERY_MS:
+            _slow.append((ev[0], kind, key, ms, int(rows), repr(params or {})[:200]))
+    if ms >= SLOW_QUERY_MS:
+        log.warning("consulta lenta (%.0f ms, %d linhas): %s", ms, rows, key)
+
+def _record_section(name: str, seconds: float) -> None:
+    with _lock:
+        _sections.append((time.time(), name, seconds * 1000))
+
+@contextmanager
+def section(name: str):
+    # Conta também a seção interrompida por st.rerun()/exceção; consultas dentro dela levam o nome da seção
+    if not _enabled:
+        yield
+        return
+    outer = getattr(_local, "section", None)
+    _local.section = name
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_section(name, time.perf_counter() - t0)
+        _local.section = outer
+
+def timed(name: str):
+    # Decorador para fragmentos (rerun parcial não passa por rerun_start/rerun_end)
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with section(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def rerun_start() -> None:
+    # Topo do script; checkpoint(nome) fecha a seção desde a marca anterior (trechos sem bloco próprio)
+    if _enabled:
+        _local.t0 = _local.mark = time.perf_counter()
+        _local.section = None
+
+def checkpoint(name: str) -> None:
+    mark = getattr(_local, "mark", None)
+    if _enabled and mark is not None:
+        now = time.perf_counter()
+        _record_section(name, now - mark)
+        _local.mark = now
+
+def rerun_end(profile: str) -> None:
+    # Só reruns que chegam ao fim do script contam no total (st.rerun() interrompe e recomeça)
+    t0 = getattr(_local, "t0", None)
+    if _enabled and t0 is not None:
+        with _lock:
+            _reruns.append((time.time(), profile, (time.perf_counter() - t0) * 1000))
+    _local.t0 = _local.mark = None
+
+# ===================== Agregação =====================
+def _pct(values: List[float], p: float) -> float:
+    # Percentil por posição (nearest-rank) sobre a lista já ordenada
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def _summary(groups: Dict[tuple, List[float]]) -> List[Dict]:
+    out = []
+    for key, values in groups.items():
+        values.sort()
+        out.append({"key": key, "n": len(values), "p50_ms": round(_pct(values, 50), 2),
+                    "p95_ms": round(_pct(values, 95), 2), "max_ms": round(values[-1], 2),
+                    "total_ms": round(sum(values), 1)})
+    return sorted(out, key=lambda r: r["p95_ms"], reverse=True)
+
+def stats() -> Dict[str, List[Dict]]:
+    with _lock:
+        queries, sections, reruns, slow = list(_queries), list(_sections), list(_reruns), list(_slow)
+    q_ms, q_rows, q_hits = defaultdict(list), defaultdict(int), defaultdict(int)
+    for _, kind, key, ms, rows, cached, _sec in queries:
+        q_ms[(kind, key)].append(ms)
+        q_rows[(kind, key)] += rows
+        q_hits[(kind, key)] += cached
+    by_query = []
+    for r in _summary(q_ms):
+        kind, key = r.pop("key")
+        by_query.append(dict(r, kind=kind, sql=key, avg_rows=round(q_rows[(kind, key)] / r["n"], 1),
+                             cache_hit=round(q_hits[(kind, key)] / r["n"], 3)))
+    s_ms, r_ms = defaultdict(list), defaultdict(list)
+    for _, name, ms in sections:
+        s_ms[name].append(ms)
+    for _, profile, ms in reruns:
+        r_ms[profile].append(ms)
+    return {
+        "queries": by_query,
+        "sections": [dict(r, section=r.pop("key")) for r in _summary(s_ms)],
+        "reruns": [dict(r, profile=r.pop("key")) for r in _summary(r_ms)],
+        "slow": [{"ts": datetime.fromtimestamp(ts).isoformat(timespec="seconds"), "kind": kind, "sql": key,
+                  "ms": round(ms, 1), "rows": rows, "params": params}
+                 for ts, kind, key, ms, rows, params in reversed(slow)],
+    }
+
+# ===================== Exportação =====================
+def export(fmt: str = "json", perf_dir: str = PERF_DIR) -> str:
+    # Eventos brutos do ring buffer (+ resumo no JSON) em data/perf, para análise fora do app
+    if fmt not in ("json", "csv"):
+        raise ValueError("fmt deve ser 'json' ou 'csv'")
+    with _lock:
+        queries, sections, reruns = list(_queries), list(_sections), list(_reruns)
+    os.makedirs(perf_dir, exist_ok=True)
+    path = os.path.join(perf_dir, f"perf_{datetime.now():%Y%m%d_%H%M%S}.{fmt}")
+    rows = ([{"type": "query", "ts": ts, "kind": kind, "name": key, "ms": round(ms, 3), "rows": n,
+              "cached": int(cached), "section": sec or ""} for ts, kind, key, ms, n, cached, sec in queries]
+            + [{"type": "section", "ts": ts, "name": name, "ms": round(ms, 3)} for ts, name, ms in sections]
+            + [{"type": "rerun", "ts": ts, "name": profile, "ms": round(ms, 3)} for ts, profile, ms in reruns])
+    if fmt == "csv":
+        fields = ["type", "ts", "kind", "name", "ms", "rows", "cached", "section"]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=fields, restval="")
+            w.writeheader()
+            w.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"exported_at": datetime.now().isoformat(timespec="seconds"), "slow_query_ms": SLOW_QUERY_MS,
+                       "summary": stats(), "events": rows}, f, ensure_ascii=False, indent=1)
+    return path
@@ -0,0 +1,104 @@
+import re, sqlite3, threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_ENTRIES = 512
+TABLE_REF = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def referenced_tables(sql: str) -> FrozenSet[str]:
+    return frozenset(t.lower() for t in TABLE_REF.findall(sql))
+
+def _params_key(params: Dict) -> tuple:
+    try:
+        key = tuple(sorted(params.items()))
+        hash(key)
+        return key
+    except TypeError:
+        return tuple(sorted((k, repr(v)) for k, v in params.items()))
+
+class QueryCache:
+    # Cache LRU de get_df por (SQL, parâmetros). Cada entrada guarda a versão das tabelas lidas
+    # (table_versions, mantida por triggers – migração 0007). Uma conexão "vigia" só lê
+    # PRAGMA data_version, que muda quando qualquer outra conexão/processo faz commit; só então
+    # as versões são relidas. Rerun sem escrita nenhuma = zero consultas ao banco.
+    def __init__(self, db_path: str, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._watcher = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._data_version = None
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.syncs = 0
+
+    def _sync(self) -> None:
+        dv = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+        if dv != self._data_version:
+            try:
+                self._versions = dict(self._watcher.execute("SELECT name, version FROM table_versions"))
+            except sqlite3.OperationalError:
+                self._versions = {}   # banco ainda sem a migração 0007
+            self._data_version = dv
+            self.syncs += 1
+
+    def mark_stale(self) -> None:
+        # Chamado após escritas deste processo: força reler as versões na próxima leitura
+        with self._lock:
+            self._data_version = None
+
+    def get(self, sql: str, params: Dict, loader: Callable[[], "pd.DataFrame"]) -> "pd.DataFrame":
+        df = self._cached((sql, _params_key(params)), referenced_tables(sql), loader)
+        return df.copy()
+
+    def value(self, kind: tuple, sql: str, params: Dict, loader: Callable[[], Any]) -> Any:
+        # Resultado já imutável de uma consulta (escalar, linha, tupla de linhas – modules/dal.py): sem cópia.
+        # kind separa formas diferentes do mesmo SQL (ex.: ("all", Registro))
+        return self._cached(("value",) + kind + (sql, _params_key(params)), referenced_tables(sql), loader)
+
+    def memo(self, key: tuple, tables: Iterable[str], loader: Callable[[], Any]) -> Any:
+        # Mesmo mecanismo para objetos montados por várias consultas (ex.: contexto do aluno);
+        # o objeto é devolvido sem cópia, então deve ser imutável
+        return self._cached(("memo",) + tuple(key), frozenset(t.lower() for t in tables), loader)
+
+    def _cached(self, key: tuple, tables: FrozenSet[str], loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._sync()
+            if not tables or any(t not in self._versions for t in tables):
+                self.bypassed += 1
+                snap = None
+            else:
+                snap = tuple(self._versions[t] for t in sorted(tables))
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == snap:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+        value = loader()
+        if snap is not None:
+            # snap foi lido antes da consulta: se alguém escreveu no meio, a entrada já nasce vencida
+            with self._lock:
+                self._entries[key] = (snap, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._data_version = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "bypassed": self.bypassed, "syncs": self.syncs,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -0,0 +1,138 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from modules.db import write_tx
+
+MB = 1024 * 1024
+GRANT_BYTES = 8 * MB            # reserva mínima por ida ao banco durante o streaming (1 escrita a cada 8 blocos de 1 MB)
+RESERVATION_TTL = 2 * 3600      # s; reserva não renovada por mais que isso é de um envio que morreu
+
+# Mesmo cálculo dos triggers da migração 0014, feito do zero (conferência/reconstrução pelo janitor)
+COMMITTED_SQL = """
+    SELECT group_code, SUM(COALESCE(report_size, 0) + COALESCE(slides_size, 0) + COALESCE(zip_size, 0) + COALESCE(media_size, 0))
+    FROM submissions WHERE group_code IS NOT NULL GROUP BY group_code
+"""
+# Compare-and-swap: só reserva se committed + reservado (vigente) + pedido couber na quota
+GRANT_SQL = """
+    UPDATE storage_ledger
+    SET reserved_bytes = (CASE WHEN reserved_at >= :stale THEN reserved_bytes ELSE 0 END) + :n, reserved_at = :now
+    WHERE group_code = :g
+      AND committed_bytes + (CASE WHEN reserved_at >= :stale THEN reserved_bytes ELSE 0 END) + :n <= :quota
+"""
+
+class QuotaExceeded(Exception):
+    def __init__(self, group_code: str, quota_bytes: int, used_bytes: int, requested_bytes: int):
+        self.group_code = group_code
+        self.quota_bytes = quota_bytes
+        self.used_bytes = used_bytes
+        self.requested_bytes = requested_bytes
+        super().__init__(f"grupo {group_code}: {used_bytes / MB:.1f} MB usados + {requested_bytes / MB:.1f} MB "
+                         f"excedem o limite de {quota_bytes / MB:.0f} MB")
+
+def group_usage(engine, group_code: str, conn=None, now: Optional[float] = None) -> Tuple[int, int]:
+    # (bytes gravados nas submissões, bytes em upload agora)
+    stale = (now or time.time()) - RESERVATION_TTL
+    sql = text("""SELECT committed_bytes, CASE WHEN reserved_at >= :stale THEN reserved_bytes ELSE 0 END
+                  FROM storage_ledger WHERE group_code = :g""")
+    if conn is None:
+        with engine.connect() as conn:
+            row = conn.execute(sql, {"g": group_code, "stale": stale}).first()
+    else:
+        row = conn.execute(sql, {"g": group_code, "stale": stale}).first()
+    return (int(row[0]), int(row[1])) if row else (0, 0)
+
+class UploadAllowance:
+    # Bytes que um envio (uma submissão, vários arquivos) pode gravar. Reservados no ledger antes da escrita:
+    # reserve(total declarado) de uma vez, e take(n) a cada bloco do streaming pede mais em blocos de GRANT_BYTES.
+    # O upload é recusado no primeiro bloco que passaria da quota, não depois do arquivo inteiro gravado.
+    def __init__(self, engine, group_code: str, quota_bytes: int, grant_bytes: int = GRANT_BYTES):
+        self.engine = engine
+        self.group_code = group_code
+        self.quota_bytes = quota_bytes
+        self.grant_bytes = grant_bytes
+        self.available = 0   # reservado e ainda não gravado
+        self.reserved = 0    # total reservado por este envio (devolvido em release)
+
+    def _grant(self, conn, n: int) -> None:
+        now = time.time()
+        conn.execute(text("INSERT INTO storage_ledger(group_code) VALUES(:g) ON CONFLICT(group_code) DO NOTHING"),
+                     {"g": self.group_code})
+        params = {"g": self.group_code, "n": n, "quota": int(self.quota_bytes), "now": now, "stale": now - RESERVATION_TTL}
+        if conn.execute(text(GRANT_SQL), params).rowcount != 1:
+            used = sum(group_usage(self.engine, self.group_code, conn=conn, now=now))
+            raise QuotaExceeded(self.group_code, self.quota_bytes, used, n)
+
+    def reserve(self, n: int, conn=None) -> None:
+        # conn: transação do chamador; sem ela, uma transação curta só para a reserva
+        if n <= 0:
+            return
+        if conn is not None:
+            self._grant(conn, int(n))
+        else:
+            with write_tx(self.engine) as conn:
+                self._grant(conn, int(n))
+        self.available += int(n)
+        self.reserved += int(n)
+
+    def take(self, n: int) -> None:
+        # Chamado antes de gravar cada bloco (store_stream on_chunk); perto do limite pede só o que falta
+        if n > self.available:
+            need = n - self.available
+            try:
+                self.reserve(max(need, self.grant_bytes))
+            except QuotaExceeded:
+                if need >= self.grant_bytes:
+                    raise
+                self.reserve(need)
+        self.available -= n
+
+    def release(self, conn=None) -> None:
+        # Devolve a reserva; na transação que grava a submissão, os triggers passam os bytes para committed.
+        # Com conn o UPDATE só vale se aquela transação fizer commit: o chamador chama released() depois do
+        # commit; se ela for desfeita, o release() sem conn (no finally) ainda devolve a reserva.
+        if not self.reserved:
+            return
+        sql = text("UPDATE storage_ledger SET reserved_bytes = MAX(0, reserved_bytes - :n) WHERE group_code = :g")
+        if conn is not None:
+            conn.execute(sql, {"n": self.reserved, "g": self.group_code})
+            return
+        with write_tx(self.engine) as conn:
+            conn.execute(sql, {"n": self.reserved, "g": self.group_code})
+        self.released()
+
+    def released(self) -> None:
+        # A transação com release(conn=...) fez commit: nada mais a devolver
+        self.reserved = self.available = 0
+
+    def __enter__(self) -> "UploadAllowance":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+def usage_by_group(engine, limit: int = 20) -> List[Dict]:
+    now = time.time()
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT group_code, committed_bytes, CASE WHEN reserved_at >= :stale THEN reserved_bytes ELSE 0 END
+            FROM storage_ledger ORDER BY committed_bytes DESC LIMIT :lim
+        """), {"stale": now - RESERVATION_TTL, "lim": limit}).all()
+    return [{"group": g, "committed": int(c), "reserved": int(r)} for g, c, r in rows]
+
+def reconcile_ledger(engine, now: Optional[float] = None) -> Tuple[int, int]:
+    # Corrige committed_bytes que divergiu do recálculo e zera reservas vencidas; devolve (corrigidos, vencidas)
+    now = now or time.time()
+    with write_tx(engine) as conn:
+        expected = dict(conn.execute(text(COMMITTED_SQL)).all())
+        stored = dict(conn.execute(text("SELECT group_code, committed_bytes FROM storage_ledger")).all())
+        fixes = [{"g": g, "b": int(expected.get(g, 0))} for g in set(expected) | set(stored)
+                 if int(expected.get(g, 0)) != int(stored.get(g, 0) or 0)]
+        if fixes:
+            conn.execute(text("""INSERT INTO storage_ledger(group_code, committed_bytes) VALUES(:g, :b)
+                                 ON CONFLICT(group_code) DO UPDATE SET committed_bytes = excluded.committed_bytes"""), fixes)
+        expired = conn.execute(text("""UPDATE storage_ledger SET reserved_bytes = 0
+                                       WHERE reserved_bytes > 0 AND reserved_at < :stale"""),
+                               {"stale": now - RESERVATION_TTL}).rowcount
+    return len(fixes), expired
@@ -0,0 +1,246 @@
+import os, threading, time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from modules.config import load_config, set_config
+
+GRAPH_BASE = "https://graph.microsoft.com/v1.0"
+LOGIN_BASE = "https://login.microsoftonline.com"
+HTTP_TIMEOUT = 60
+SIMPLE_UPLOAD_MAX = 4 * 1024 * 1024   # acima disso o Graph exige sessão de upload
+CHUNK_SIZE = 16 * 320 * 1024          # 5 MiB; o Graph exige múltiplos de 320 KiB
+TOKEN_REFRESH_MARGIN = 300            # s antes de expirar o token já é renovado
+HTTP_POOL_SIZE = 8
+
+class SharePointError(Exception):
+    pass
+
+@dataclass(frozen=True)
+class SharePointSettings:
+    tenant_id: Optional[str] = None
+    client_id: Optional[str] = None
+    client_secret: Optional[str] = None
+    site_url: Optional[str] = None
+    drive_name: Optional[str] = None
+    base_folder: str = ""
+    site_id: Optional[str] = None
+    drive_id: Optional[str] = None
+    graph_base: str = GRAPH_BASE
+
+    @classmethod
+    def from_secrets(cls, secrets) -> "SharePointSettings":
+        aad = secrets.get("aad") or secrets
+        sp = secrets.get("sharepoint") or secrets
+        return cls(
+            tenant_id=aad.get("TENANT_ID"), client_id=aad.get("CLIENT_ID"), client_secret=aad.get("CLIENT_SECRET"),
+            site_url=sp.get("SP_SITE_URL") or sp.get("SITE_URL"),
+            drive_name=sp.get("SP_DRIVE_NAME") or sp.get("DRIVE_NAME"),
+            base_folder=sp.get("SP_BASE_FOLDER") or sp.get("BASE_FOLDER", ""),
+            site_id=sp.get("SITE_ID"), drive_id=sp.get("DRIVE_ID"),
+            graph_base=sp.get("GRAPH_BASE_URL") or GRAPH_BASE,
+        )
+
+    @property
+    def configured(self) -> bool:
+        has_target = (self.site_id and self.drive_id) or (self.site_url and self.drive_name)
+        return bool(self.tenant_id and self.client_id and self.client_secret and has_target)
+
+class MemorySessionStore:
+    # Guarda (uploadUrl, offset) só em memória; a fila usa modules.jobs.JobSessionStore (persistente)
+    def __init__(self):
+        self.state = None
+
+    def load(self) -> Optional[Tuple[str, int]]:
+        return self.state
+
+    def save(self, upload_url: str, offset: int, total: int) -> None:
+        self.state = (upload_url, offset)
+
+    def clear(self) -> None:
+        self.state = None
+
+def _next_offset(payload: dict) -> Optional[int]:
+    ranges = payload.get("nextExpectedRanges") or []
+    return int(ranges[0].split("-")[0]) if ranges else None
+
+# ===================== Integração com SharePoint (Graph API) =====================
+class GraphClient:
+    # Um cliente por processo e por configuração: app MSAL, token, sessão HTTP (keep-alive)
+    # e IDs de site/drive são criados/obtidos uma vez e reaproveitados por todos os uploads.
+    # requests/msal só são importados aqui: sem SharePoint configurado o app nunca os carrega.
+    # token_provider (opcional) substitui o MSAL e devolve um dict no formato do MSAL
+    # ({"access_token": ..., "expires_in": ...}); usado contra o Graph local dos benchmarks.
+    def __init__(self, settings: SharePointSettings, token_provider: Optional[Callable[[], dict]] = None):
+        self.settings = settings
+        self.token_provider = token_provider
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self._msal_app = None
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._drive: Optional[Tuple[str, str]] = None
+        self._lock = threading.Lock()
+        self.token_acquisitions = 0
+
+    def _acquire(self) -> dict:
+        if self.token_provider:
+            return self.token_provider()
+        s = self.settings
+        if self._msal_app is None:
+            import msal
+            self._msal_app = msal.ConfidentialClientApplication(s.client_id, authority=f"{LOGIN_BASE}/{s.tenant_id}",
+                                                                client_credential=s.client_secret, http_client=self.http)
+        return self._msal_app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
+
+    def token(self) -> Optional[str]:
+        s = self.settings
+        if not self.token_provider and not (s.tenant_id and s.client_id and s.client_secret):
+            return None
+        with self._lock:
+            if self._token and time.time() < self._token_expires - TOKEN_REFRESH_MARGIN:
+                return self._token
+            try:
+                result = self._acquire() or {}
+            except Exception:
+                return None
+            if not result.get("access_token"):
+                return None
+            self.token_acquisitions += 1
+            self._token = result["access_token"]
+            self._token_expires = time.time() + float(result.get("expires_in") or 3600)
+            return self._token
+
+    def invalidate_token(self) -> None:
+        with self._lock:
+            self._token = None
+
+    def _get(self, url: str, token: str):
+        return self.http.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=HTTP_TIMEOUT)
+
+    def resolve_drive(self, token: str, engine=None) -> Tuple[str, str]:
+        # Obtém IDs do site e drive se não fornecidos (e guarda na config)
+        if self._drive:
+            return self._drive
+        s = self.settings
+        site_id = s.site_id; drive_id = s.drive_id
+        if not (site_id and drive_id) and engine is not None:
+            cfg = load_config(engine)
+            site_id, drive_id = cfg.site_id, cfg.drive_id
+        if not (site_id and drive_id):
+            if not (s.site_url and s.drive_name):
+                raise SharePointError("SharePoint sem SITE_ID/DRIVE_ID nem SP_SITE_URL/SP_DRIVE_NAME")
+            host = s.site_url.split("//")[1].split("/")[0]
+            site_path = s.site_url.split(host)[-1]
+            resp_site = self._get(f"{s.graph_base}/sites/{host}:{site_path}", token)
+            if resp_site.status_code != 200:
+                raise SharePointError(f"site não encontrado (HTTP {resp_site.status_code})")
+            site_id = resp_site.json().get("id")
+            resp_drives = self._get(f"{s.graph_base}/sites/{site_id}/drives", token)
+            if resp_drives.status_code != 200:
+                raise SharePointError(f"falha ao listar drives (HTTP {resp_drives.status_code})")
+            drive_id = next((d.get("id") for d in resp_drives.json().get("value", []) if d.get("name") == s.drive_name), None)
+            if not (site_id and drive_id):
+                raise SharePointError(f"drive '{s.drive_name}' não encontrado")
+            if engine is not None:
+                set_config(engine, "SITE_ID", site_id)
+                set_config(engine, "DRIVE_ID", drive_id)
+        self._drive = (site_id, drive_id)
+        return self._drive
+
+    def create_upload_session(self, token: str, site_id: str, drive_id: str, target_path: str) -> str:
+        url = f"{self.settings.graph_base}/sites/{site_id}/drives/{drive_id}/root:/{target_path}:/createUploadSession"
+        resp = self.http.post(url, headers={"Authorization": f"Bearer {token}"}, timeout=HTTP_TIMEOUT,
+                              json={"item": {"@microsoft.graph.conflictBehavior": "replace"}})
+        if resp.status_code != 200:
+            raise SharePointError(f"falha ao criar sessão de upload (HTTP {resp.status_code}): {resp.text[:200]}")
+        return resp.json()["uploadUrl"]
+
+    def upload_large(self, token: str, site_id: str, drive_id: str, target_path: str,
+                     local_path: str, session=None, chunk_size: int = CHUNK_SIZE) -> None:
+        # Upload em blocos fixos; cada bloco confirmado (202 + nextExpectedRanges) é salvo em `session`,
+        # então uma nova tentativa continua do último byte aceito em vez de recomeçar do zero.
+        # O uploadUrl é pré-autenticado: os PUTs de bloco não levam o token.
+        session = session or MemorySessionStore()
+        total = os.path.getsize(local_path)
+        upload_url, offset = session.load() or (None, 0)
+        if upload_url:
+            resp = self.http.get(upload_url, timeout=HTTP_TIMEOUT)
+            if resp.status_code == 200:
+                nxt = _next_offset(resp.json())
+                offset = nxt if nxt is not None else offset
+            else:  # sessão expirada/cancelada
+                upload_url, offset = None, 0
+        if not upload_url:
+            upload_url, offset = self.create_upload_session(token, site_id, drive_id, target_path), 0
+            session.save(upload_url, 0, total)
+        with open(local_path, "rb") as f:
+            while offset < total:
+                f.seek(offset)
+                chunk = f.read(min(chunk_size, total - offset))
+                end = offset + len(chunk) - 1
+                resp = self.http.put(upload_url, data=chunk, timeout=HTTP_TIMEOUT,
+                                     headers={"Content-Length": str(len(chunk)), "Content-Range": f"bytes {offset}-{end}/{total}"})
+                if resp.status_code in (200, 201):
+                    session.clear()
+                    return
+                if resp.status_code == 202:
+                    nxt = _next_offset(resp.json())
+                    offset = nxt if nxt is not None else end + 1
+                    session.save(upload_url, offset, total)
+                    continue
+                if resp.status_code == 404:
+                    session.clear()
+                    raise SharePointError("sessão de upload expirada; será recriada na próxima tentativa")
+                raise SharePointError(f"bloco {offset}-{end} recusado (HTTP {resp.status_code}): {resp.text[:200]}")
+        raise SharePointError("sessão terminou sem confirmação do arquivo completo")
+
+    def upload(self, local_path: str, remote_name: str, engine=None, session=None) -> None:
+        # Levanta SharePointError em qualquer falha (a fila de jobs decide se tenta de novo)
+        from requests import RequestException
+        token = self.token()
+        if not token:
+            raise SharePointError("não foi possível obter token do Graph")
+        try:
+            site_id, drive_id = self.resolve_drive(token, engine)
+            folder_path = self.settings.base_folder.strip("/")
+            target_path = f"{folder_path}/{remote_name}" if folder_path else remote_name
+            if os.path.getsize(local_path) > SIMPLE_UPLOAD_MAX:
+                self.upload_large(token, site_id, drive_id, target_path, local_path, session)
+                return
+            url = f"{self.settings.graph_base}/sites/{site_id}/drives/{drive_id}/root:/{target_path}:/content"
+            with open(local_path, "rb") as f:
+                resp = self.http.put(url, headers={"Authorization": f"Bearer {token}"}, data=f, timeout=HTTP_TIMEOUT)
+        except (OSError, ValueError, KeyError, RequestException) as e:
+            raise SharePointError(str(e)) from e
+        if resp.status_code == 401:
+            self.invalidate_token()
+        if resp.status_code not in (200, 201):
+            raise SharePointError(f"upload recusado (HTTP {resp.status_code}): {resp.text[:200]}")
+
+_clients: Dict[tuple, GraphClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(settings: SharePointSettings, token_provider: Optional[Callable[[], dict]] = None) -> GraphClient:
+    key = (settings, token_provider)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = GraphClient(settings, token_provider)
+    return client
+
+def upload_file(settings: SharePointSettings, local_path: str, remote_name: str, engine=None,
+                token_provider: Optional[Callable[[], dict]] = None, session=None) -> None:
+    get_client(settings, token_provider).upload(local_path, remote_name, engine=engine, session=session)
+
+def upload_to_sharepoint(settings: SharePointSettings, local_path: str, remote_name: str, engine=None) -> bool:
+    try:
+        upload_file(settings, local_path, remote_name, engine=engine)
+        return True
+    except SharePointError:
+        return False
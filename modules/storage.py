@@ -0,0 +1,60 @@
+import os, hashlib, tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+
+UPLOAD_DIR = "uploads"
+CHUNK_SIZE = 1024 * 1024  # 1 MB por leitura: memória de pico constante por upload
+
+@dataclass(frozen=True)
+class StoredFile:
+    path: str
+    sha256: str
+    size: int
+    deduplicated: bool = False
+
+def object_path(sha256: str, ext: str = "", upload_dir: str = UPLOAD_DIR) -> str:
+    # Árvore endereçada por conteúdo: uploads/objects/ab/cd/abcd...<ext>
+    return os.path.join(upload_dir, "objects", sha256[:2], sha256[2:4], f"{sha256}{ext.lower()}")
+
+def store_stream(fileobj: BinaryIO, ext: str = "", upload_dir: str = UPLOAD_DIR,
+                 chunk_size: int = CHUNK_SIZE, on_chunk: Optional[Callable[[int], None]] = None) -> StoredFile:
+    # Copia em blocos para um temporário no mesmo disco, calculando o SHA-256 no caminho,
+    # e só então move (rename atômico) para o endereço final; arquivo idêntico é reaproveitado.
+    # on_chunk(n) roda antes de gravar cada bloco e pode abortar com exceção (ex.: quota do grupo, modules/quota.py)
+    tmp_dir = os.path.join(upload_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    if getattr(fileobj, "seekable", lambda: False)():
+        fileobj.seek(0)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(chunk_size)
+                if not chunk:
+                    break
+                if on_chunk is not None:
+                    on_chunk(len(chunk))
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        digest = h.hexdigest()
+        final = object_path(digest, ext, upload_dir)
+        if os.path.exists(final):
+            os.remove(tmp_path)
+            os.utime(final)   # objeto reaproveitado volta a ser "novo": o janitor não o apaga antes da submissão gravar
+            return StoredFile(final, digest, size, deduplicated=True)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp_path, final)
+        return StoredFile(final, digest, size)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def download_name(path: str, group_code: str, label: str) -> str:
+    # Nome amigável para download (o arquivo em disco é nomeado pelo hash)
+    return f"{group_code}_{label}{os.path.splitext(path)[1]}"
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from modules.db import write_tx
+
+# Resultados de reserve_theme
+RESERVED = "reservado"             # este pedido ficou com o tema
+ALREADY_OURS = "ja_reservado"      # o grupo já tinha este tema (clique duplo, rerun)
+GROUP_HAS_THEME = "grupo_com_tema" # o grupo já tem outro tema (um tema por grupo)
+TAKEN = "ocupado"                  # outro grupo reservou antes
+NOT_FOUND = "inexistente"
+
+# Compare-and-swap: só troca se o tema ainda está livre e o grupo ainda não tem tema.
+# Dentro do BEGIN IMMEDIATE de write_tx a checagem e a escrita são atômicas; o índice único
+# ux_themes_reserved_by (migração 0012) garante o "um tema por grupo" mesmo para escritas fora daqui.
+# rowcount = 1 diz que a troca aconteceu (sem RETURNING, que exige SQLite 3.35).
+RESERVE_SQL = """
+    UPDATE themes SET status = 'reservado', reserved_by = :gc, reserved_at = :ts
+    WHERE title = :t AND status = 'livre'
+      AND NOT EXISTS (SELECT 1 FROM themes o WHERE o.reserved_by = :gc AND o.status = 'reservado')
+"""
+
+@dataclass(frozen=True)
+class Reservation:
+    status: str
+    title: str
+    holder: Optional[str] = None        # grupo que está com o tema pedido
+    group_theme: Optional[str] = None   # tema que o grupo já tinha
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (RESERVED, ALREADY_OURS)
+
+def _reserve(conn, group_code: str, title: str, ts: str) -> Reservation:
+    if conn.execute(text(RESERVE_SQL), {"gc": group_code, "t": title, "ts": ts}).rowcount == 1:
+        return Reservation(RESERVED, title, holder=group_code, group_theme=title)
+    # Perdeu a troca: descobre o porquê com o estado que venceu
+    row = conn.execute(text("SELECT status, reserved_by FROM themes WHERE title = :t"), {"t": title}).first()
+    if row is None:
+        return Reservation(NOT_FOUND, title)
+    status, holder = row
+    if status == "reservado" and holder == group_code:
+        return Reservation(ALREADY_OURS, title, holder=group_code, group_theme=title)
+    own = conn.execute(text("SELECT title FROM themes WHERE reserved_by = :gc AND status = 'reservado' LIMIT 1"),
+                       {"gc": group_code}).scalar()
+    if own is not None:
+        return Reservation(GROUP_HAS_THEME, title, holder=holder if status == "reservado" else None, group_theme=own)
+    return Reservation(TAKEN, title, holder=holder)
+
+def reserve_theme(engine, group_code: str, title: str, conn=None, now: Optional[datetime] = None) -> Reservation:
+    # conn permite reservar dentro da transação de quem chama (ex.: junto com a submissão)
+    ts = (now or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    if conn is not None:
+        return _reserve(conn, group_code, title, ts)
+    with write_tx(engine) as conn:
+        return _reserve(conn, group_code, title, ts)
@@ -0,0 +1,114 @@
+-- Esquema base do app (antes criado a cada rerun em app.py)
+CREATE TABLE IF NOT EXISTS students(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ra TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT,
+    turma TEXT,
+    course_code TEXT,
+    active INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS professors(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    role TEXT,
+    pin TEXT,
+    discipline_code TEXT,
+    approved INTEGER DEFAULT 0,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS disciplines(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT UNIQUE,
+    name TEXT NOT NULL
+);
+
+-- Oferta = disciplina x semestre x turma (chave natural única; usada por modules/import_txt.py)
+CREATE TABLE IF NOT EXISTS offerings(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    discipline_id INTEGER NOT NULL,
+    term TEXT NOT NULL,
+    turma TEXT NOT NULL,
+    instructor_id INTEGER,
+    UNIQUE(discipline_id, term, turma)
+);
+
+CREATE TABLE IF NOT EXISTS enrollments(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER NOT NULL,
+    offering_id INTEGER NOT NULL,
+    active INTEGER DEFAULT 1,
+    UNIQUE(student_id, offering_id)
+);
+
+CREATE TABLE IF NOT EXISTS groups(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT UNIQUE,
+    turma TEXT,
+    course_code TEXT DEFAULT 'JOINT',
+    created_by TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS group_members(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER NOT NULL,
+    student_name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS themes(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    number INTEGER,
+    title TEXT UNIQUE NOT NULL,
+    category TEXT,
+    status TEXT CHECK (status IN ('livre','reservado')) DEFAULT 'livre',
+    reserved_by TEXT,
+    reserved_at TEXT,
+    released_by TEXT,
+    released_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS submissions(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_code TEXT,
+    theme_title TEXT,
+    report_path TEXT,
+    slides_path TEXT,
+    zip_path TEXT,
+    media_link TEXT,
+    media_file_path TEXT,
+    consent INTEGER DEFAULT 0,
+    submitted_by TEXT,
+    submitted_at TEXT,
+    approved INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS evaluations(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER NOT NULL,
+    instructor_id INTEGER NOT NULL,
+    discipline_code TEXT NOT NULL,
+    score_report REAL,
+    score_slides REAL,
+    score_media REAL,
+    overall_score REAL,
+    liked INTEGER DEFAULT 0,
+    c_report TEXT,
+    c_slides TEXT,
+    c_media TEXT,
+    c_overall TEXT,
+    created_at TEXT,
+    UNIQUE(submission_id, instructor_id, discipline_code)
+);
+
+CREATE TABLE IF NOT EXISTS config(
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Disciplinas (IND, EBCII)
+INSERT OR IGNORE INTO disciplines(code,name) VALUES('IND','Economia Industrial');
+INSERT OR IGNORE INTO disciplines(code,name) VALUES('EBCII','Economia Brasileira II');
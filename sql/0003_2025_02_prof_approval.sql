@@ -0,0 +1,8 @@
+-- sql/0003_2025_02_prof_approval.sql
+
+-- adiciona coluna "approved" se ainda não existir
+-- (o runner ignora "duplicate column name" em bancos que já têm as colunas)
+ALTER TABLE professors ADD COLUMN approved INTEGER DEFAULT 0;
+ALTER TABLE professors ADD COLUMN created_at TEXT;
+
+-- As sementes de docentes ficam em SEED_PROFESSORS (app.py), aplicadas no bootstrap.
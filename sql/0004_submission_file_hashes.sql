@@ -0,0 +1,9 @@
+-- Tamanho e SHA-256 de cada arquivo da submissão (armazenamento endereçado por conteúdo)
+ALTER TABLE submissions ADD COLUMN report_size INTEGER;
+ALTER TABLE submissions ADD COLUMN report_sha256 TEXT;
+ALTER TABLE submissions ADD COLUMN slides_size INTEGER;
+ALTER TABLE submissions ADD COLUMN slides_sha256 TEXT;
+ALTER TABLE submissions ADD COLUMN zip_size INTEGER;
+ALTER TABLE submissions ADD COLUMN zip_sha256 TEXT;
+ALTER TABLE submissions ADD COLUMN media_size INTEGER;
+ALTER TABLE submissions ADD COLUMN media_sha256 TEXT;
@@ -0,0 +1,16 @@
+-- Fila persistente de backups para o SharePoint (drenada por modules/jobs.py)
+CREATE TABLE IF NOT EXISTS upload_jobs(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER,
+    local_path TEXT NOT NULL,
+    remote_name TEXT NOT NULL,
+    status TEXT CHECK (status IN ('pendente','enviando','concluido','falhou')) DEFAULT 'pendente',
+    attempts INTEGER DEFAULT 0,
+    max_attempts INTEGER DEFAULT 8,
+    next_attempt_at REAL DEFAULT 0,   -- epoch; para 'enviando' é o fim do lease do worker
+    last_error TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_upload_jobs_due ON upload_jobs(status, next_attempt_at);
@@ -0,0 +1,4 @@
+-- Progresso de upload em sessão (Graph createUploadSession) para retomar do último byte confirmado
+ALTER TABLE upload_jobs ADD COLUMN upload_url TEXT;
+ALTER TABLE upload_jobs ADD COLUMN bytes_uploaded INTEGER DEFAULT 0;
+ALTER TABLE upload_jobs ADD COLUMN total_bytes INTEGER;
@@ -0,0 +1,57 @@
+-- Versão por tabela, incrementada por triggers a cada escrita (qualquer conexão/processo).
+-- O cache de consultas (modules/querycache.py) compara essas versões para invalidar só o necessário.
+-- Tabelas novas que devam ser cacheadas precisam de linha aqui + os três triggers.
+CREATE TABLE IF NOT EXISTS table_versions(
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_versions(name, version) VALUES ('students', 0), ('professors', 0), ('disciplines', 0), ('offerings', 0), ('enrollments', 0), ('groups', 0), ('group_members', 0), ('themes', 0), ('submissions', 0), ('evaluations', 0), ('config', 0), ('upload_jobs', 0);
+
+CREATE TRIGGER IF NOT EXISTS tv_students_ins AFTER INSERT ON students BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'students'; END;
+CREATE TRIGGER IF NOT EXISTS tv_students_upd AFTER UPDATE ON students BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'students'; END;
+CREATE TRIGGER IF NOT EXISTS tv_students_del AFTER DELETE ON students BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'students'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_professors_ins AFTER INSERT ON professors BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'professors'; END;
+CREATE TRIGGER IF NOT EXISTS tv_professors_upd AFTER UPDATE ON professors BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'professors'; END;
+CREATE TRIGGER IF NOT EXISTS tv_professors_del AFTER DELETE ON professors BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'professors'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_disciplines_ins AFTER INSERT ON disciplines BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'disciplines'; END;
+CREATE TRIGGER IF NOT EXISTS tv_disciplines_upd AFTER UPDATE ON disciplines BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'disciplines'; END;
+CREATE TRIGGER IF NOT EXISTS tv_disciplines_del AFTER DELETE ON disciplines BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'disciplines'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_offerings_ins AFTER INSERT ON offerings BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'offerings'; END;
+CREATE TRIGGER IF NOT EXISTS tv_offerings_upd AFTER UPDATE ON offerings BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'offerings'; END;
+CREATE TRIGGER IF NOT EXISTS tv_offerings_del AFTER DELETE ON offerings BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'offerings'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_enrollments_ins AFTER INSERT ON enrollments BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'enrollments'; END;
+CREATE TRIGGER IF NOT EXISTS tv_enrollments_upd AFTER UPDATE ON enrollments BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'enrollments'; END;
+CREATE TRIGGER IF NOT EXISTS tv_enrollments_del AFTER DELETE ON enrollments BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'enrollments'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_groups_ins AFTER INSERT ON groups BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'groups'; END;
+CREATE TRIGGER IF NOT EXISTS tv_groups_upd AFTER UPDATE ON groups BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'groups'; END;
+CREATE TRIGGER IF NOT EXISTS tv_groups_del AFTER DELETE ON groups BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'groups'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_group_members_ins AFTER INSERT ON group_members BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'group_members'; END;
+CREATE TRIGGER IF NOT EXISTS tv_group_members_upd AFTER UPDATE ON group_members BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'group_members'; END;
+CREATE TRIGGER IF NOT EXISTS tv_group_members_del AFTER DELETE ON group_members BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'group_members'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_themes_ins AFTER INSERT ON themes BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'themes'; END;
+CREATE TRIGGER IF NOT EXISTS tv_themes_upd AFTER UPDATE ON themes BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'themes'; END;
+CREATE TRIGGER IF NOT EXISTS tv_themes_del AFTER DELETE ON themes BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'themes'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_submissions_ins AFTER INSERT ON submissions BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'submissions'; END;
+CREATE TRIGGER IF NOT EXISTS tv_submissions_upd AFTER UPDATE ON submissions BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'submissions'; END;
+CREATE TRIGGER IF NOT EXISTS tv_submissions_del AFTER DELETE ON submissions BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'submissions'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_evaluations_ins AFTER INSERT ON evaluations BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'evaluations'; END;
+CREATE TRIGGER IF NOT EXISTS tv_evaluations_upd AFTER UPDATE ON evaluations BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'evaluations'; END;
+CREATE TRIGGER IF NOT EXISTS tv_evaluations_del AFTER DELETE ON evaluations BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'evaluations'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_config_ins AFTER INSERT ON config BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'config'; END;
+CREATE TRIGGER IF NOT EXISTS tv_config_upd AFTER UPDATE ON config BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'config'; END;
+CREATE TRIGGER IF NOT EXISTS tv_config_del AFTER DELETE ON config BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'config'; END;
+
+CREATE TRIGGER IF NOT EXISTS tv_upload_jobs_ins AFTER INSERT ON upload_jobs BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'upload_jobs'; END;
+CREATE TRIGGER IF NOT EXISTS tv_upload_jobs_upd AFTER UPDATE ON upload_jobs BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'upload_jobs'; END;
+CREATE TRIGGER IF NOT EXISTS tv_upload_jobs_del AFTER DELETE ON upload_jobs BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'upload_jobs'; END;
@@ -0,0 +1,207 @@
+-- Contadores do Painel de Acompanhamento mantidos por triggers.
+-- group_progress: uma linha por grupo (tem tema? submeteu? avaliado pelas duas disciplinas?),
+-- recalculada só para o grupo afetado a cada escrita em groups/themes/submissions/evaluations.
+-- dashboard_counters: somatório por turma ('' = sem turma) e a linha '*' com o total geral.
+-- modules/dashboard.py confere/reconstrói tudo a partir do zero.
+CREATE TABLE IF NOT EXISTS group_progress(
+    group_code TEXT PRIMARY KEY,
+    turma TEXT NOT NULL DEFAULT '',
+    reserved INTEGER NOT NULL DEFAULT 0,
+    submitted INTEGER NOT NULL DEFAULT 0,
+    evaluated INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS dashboard_counters(
+    turma TEXT PRIMARY KEY,
+    groups INTEGER NOT NULL DEFAULT 0,
+    reserved INTEGER NOT NULL DEFAULT 0,
+    submitted INTEGER NOT NULL DEFAULT 0,
+    evaluated INTEGER NOT NULL DEFAULT 0
+);
+
+-- group_progress -> dashboard_counters (turma e total '*')
+CREATE TRIGGER IF NOT EXISTS gp_ins AFTER INSERT ON group_progress BEGIN
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES(NEW.turma, 1, NEW.reserved, NEW.submitted, NEW.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES('*', 1, NEW.reserved, NEW.submitted, NEW.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+END;
+
+CREATE TRIGGER IF NOT EXISTS gp_del AFTER DELETE ON group_progress BEGIN
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES(OLD.turma, -1, -OLD.reserved, -OLD.submitted, -OLD.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES('*', -1, -OLD.reserved, -OLD.submitted, -OLD.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+END;
+
+CREATE TRIGGER IF NOT EXISTS gp_upd AFTER UPDATE ON group_progress
+WHEN OLD.turma IS NOT NEW.turma OR OLD.reserved != NEW.reserved OR OLD.submitted != NEW.submitted OR OLD.evaluated != NEW.evaluated
+BEGIN
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES(OLD.turma, -1, -OLD.reserved, -OLD.submitted, -OLD.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES('*', -1, -OLD.reserved, -OLD.submitted, -OLD.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES(NEW.turma, 1, NEW.reserved, NEW.submitted, NEW.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+    INSERT INTO dashboard_counters(turma, groups, reserved, submitted, evaluated)
+    VALUES('*', 1, NEW.reserved, NEW.submitted, NEW.evaluated)
+    ON CONFLICT(turma) DO UPDATE SET groups = groups + excluded.groups, reserved = reserved + excluded.reserved,
+        submitted = submitted + excluded.submitted, evaluated = evaluated + excluded.evaluated;
+END;
+
+-- groups
+CREATE TRIGGER IF NOT EXISTS dc_groups_ins AFTER INSERT ON groups WHEN NEW.code IS NOT NULL BEGIN
+    INSERT OR IGNORE INTO group_progress(group_code, turma, reserved, submitted, evaluated)
+    SELECT g.code, COALESCE(g.turma, ''),
+           EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = g.code AND t.status = 'reservado'),
+           EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = g.code),
+           (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+            WHERE s.group_code = g.code) >= 2
+    FROM groups g WHERE g.id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_groups_del AFTER DELETE ON groups BEGIN
+    DELETE FROM group_progress WHERE group_code = OLD.code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_groups_upd AFTER UPDATE OF code, turma ON groups BEGIN
+    DELETE FROM group_progress WHERE group_code = OLD.code;
+    INSERT OR IGNORE INTO group_progress(group_code, turma, reserved, submitted, evaluated)
+    SELECT g.code, COALESCE(g.turma, ''),
+           EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = g.code AND t.status = 'reservado'),
+           EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = g.code),
+           (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+            WHERE s.group_code = g.code) >= 2
+    FROM groups g WHERE g.id = NEW.id AND g.code IS NOT NULL;
+END;
+
+-- themes
+CREATE TRIGGER IF NOT EXISTS dc_themes_ins AFTER INSERT ON themes BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = NEW.reserved_by AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = NEW.reserved_by),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = NEW.reserved_by) >= 2
+    WHERE group_code = NEW.reserved_by;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_themes_upd AFTER UPDATE OF status, reserved_by ON themes BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = OLD.reserved_by AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = OLD.reserved_by),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = OLD.reserved_by) >= 2
+    WHERE group_code = OLD.reserved_by;
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = NEW.reserved_by AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = NEW.reserved_by),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = NEW.reserved_by) >= 2
+    WHERE group_code = NEW.reserved_by;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_themes_del AFTER DELETE ON themes BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = OLD.reserved_by AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = OLD.reserved_by),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = OLD.reserved_by) >= 2
+    WHERE group_code = OLD.reserved_by;
+END;
+
+-- submissions
+CREATE TRIGGER IF NOT EXISTS dc_submissions_ins AFTER INSERT ON submissions BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = NEW.group_code AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = NEW.group_code),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = NEW.group_code) >= 2
+    WHERE group_code = NEW.group_code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_submissions_upd AFTER UPDATE OF group_code ON submissions BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = OLD.group_code AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = OLD.group_code),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = OLD.group_code) >= 2
+    WHERE group_code = OLD.group_code;
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = NEW.group_code AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = NEW.group_code),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = NEW.group_code) >= 2
+    WHERE group_code = NEW.group_code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_submissions_del AFTER DELETE ON submissions BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = OLD.group_code AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = OLD.group_code),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = OLD.group_code) >= 2
+    WHERE group_code = OLD.group_code;
+END;
+
+-- evaluations
+CREATE TRIGGER IF NOT EXISTS dc_evaluations_ins AFTER INSERT ON evaluations BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = (SELECT group_code FROM submissions WHERE id = NEW.submission_id) AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = NEW.submission_id)),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = NEW.submission_id)) >= 2
+    WHERE group_code = (SELECT group_code FROM submissions WHERE id = NEW.submission_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_evaluations_upd AFTER UPDATE OF submission_id, discipline_code ON evaluations BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = (SELECT group_code FROM submissions WHERE id = OLD.submission_id) AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = OLD.submission_id)),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = OLD.submission_id)) >= 2
+    WHERE group_code = (SELECT group_code FROM submissions WHERE id = OLD.submission_id);
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = (SELECT group_code FROM submissions WHERE id = NEW.submission_id) AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = NEW.submission_id)),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = NEW.submission_id)) >= 2
+    WHERE group_code = (SELECT group_code FROM submissions WHERE id = NEW.submission_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS dc_evaluations_del AFTER DELETE ON evaluations BEGIN
+    UPDATE group_progress SET
+        reserved = EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = (SELECT group_code FROM submissions WHERE id = OLD.submission_id) AND t.status = 'reservado'),
+        submitted = EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = OLD.submission_id)),
+        evaluated = (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+                     WHERE s.group_code = (SELECT group_code FROM submissions WHERE id = OLD.submission_id)) >= 2
+    WHERE group_code = (SELECT group_code FROM submissions WHERE id = OLD.submission_id);
+END;
+
+-- Carga inicial (os triggers de group_progress preenchem dashboard_counters)
+INSERT OR IGNORE INTO group_progress(group_code, turma, reserved, submitted, evaluated)
+SELECT g.code, COALESCE(g.turma, ''),
+       EXISTS(SELECT 1 FROM themes t WHERE t.reserved_by = g.code AND t.status = 'reservado'),
+       EXISTS(SELECT 1 FROM submissions s WHERE s.group_code = g.code),
+       (SELECT COUNT(DISTINCT e.discipline_code) FROM submissions s JOIN evaluations e ON e.submission_id = s.id
+        WHERE s.group_code = g.code) >= 2
+FROM groups g WHERE g.code IS NOT NULL;
+
+-- Cache de consultas (ver 0007)
+INSERT OR IGNORE INTO table_versions(name, version) VALUES ('dashboard_counters', 0);
+CREATE TRIGGER IF NOT EXISTS tv_dashboard_counters_ins AFTER INSERT ON dashboard_counters BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'dashboard_counters'; END;
+CREATE TRIGGER IF NOT EXISTS tv_dashboard_counters_upd AFTER UPDATE ON dashboard_counters BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'dashboard_counters'; END;
+CREATE TRIGGER IF NOT EXISTS tv_dashboard_counters_del AFTER DELETE ON dashboard_counters BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'dashboard_counters'; END;
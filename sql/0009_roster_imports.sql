@@ -0,0 +1,17 @@
+-- Arquivos TXT (SIGA/PUC) já importados, pelo sha256 do conteúdo: reenviar o mesmo arquivo não reprocessa
+CREATE TABLE IF NOT EXISTS roster_imports(
+    sha256 TEXT PRIMARY KEY,
+    file_name TEXT,
+    term TEXT,
+    discipline_code TEXT,
+    turma TEXT,
+    students INTEGER DEFAULT 0,
+    imported_by TEXT,
+    imported_at TEXT
+);
+
+-- Cache de consultas (ver 0007)
+INSERT OR IGNORE INTO table_versions(name, version) VALUES ('roster_imports', 0);
+CREATE TRIGGER IF NOT EXISTS tv_roster_imports_ins AFTER INSERT ON roster_imports BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'roster_imports'; END;
+CREATE TRIGGER IF NOT EXISTS tv_roster_imports_upd AFTER UPDATE ON roster_imports BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'roster_imports'; END;
+CREATE TRIGGER IF NOT EXISTS tv_roster_imports_del AFTER DELETE ON roster_imports BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'roster_imports'; END;
@@ -0,0 +1,14 @@
+-- Índices das consultas quentes (login do aluno, tela de avaliação, painel/triggers, fila de backups).
+-- evaluations(submission_id, instructor_id) já é coberto pelo UNIQUE(submission_id, instructor_id, discipline_code).
+-- Conferido por bench/query_plans.py (EXPLAIN QUERY PLAN de todo SQL do app num banco sintético grande).
+CREATE INDEX IF NOT EXISTS ix_group_members_student_name ON group_members(student_name);
+CREATE INDEX IF NOT EXISTS ix_group_members_group_id ON group_members(group_id);
+CREATE INDEX IF NOT EXISTS ix_submissions_group_code ON submissions(group_code);
+-- status tem só 2 valores: um índice comum em status não é usado pelo planner; o parcial cobre a lista de temas livres
+CREATE INDEX IF NOT EXISTS ix_themes_livre ON themes(title, category) WHERE status = 'livre';
+CREATE INDEX IF NOT EXISTS ix_themes_reserved_by ON themes(reserved_by);
+CREATE INDEX IF NOT EXISTS ix_groups_turma ON groups(turma);
+CREATE INDEX IF NOT EXISTS ix_professors_email_lower ON professors(lower(email));
+CREATE INDEX IF NOT EXISTS ix_enrollments_offering ON enrollments(offering_id);
+-- list_jobs: status IN (...) ORDER BY id DESC – sem isso o planner percorre a fila inteira (quase toda 'concluido')
+CREATE INDEX IF NOT EXISTS ix_upload_jobs_status_id ON upload_jobs(status, id);
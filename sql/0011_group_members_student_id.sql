@@ -0,0 +1,26 @@
+-- Integrantes de grupo passam a apontar para students.id; student_name fica como rótulo/legado.
+ALTER TABLE group_members ADD COLUMN student_id INTEGER REFERENCES students(id);
+
+-- Backfill pelo nome exato, só quando não há ambiguidade: um único aluno com o nome...
+UPDATE group_members SET student_id = (
+    SELECT CASE WHEN COUNT(*) = 1 THEN MIN(s.id) END FROM students s WHERE s.name = group_members.student_name
+) WHERE student_id IS NULL;
+-- ...ou um único com o nome na turma do grupo (homônimos em turmas diferentes).
+-- O que sobrar (acentos/maiúsculas diferentes) é resolvido por modules/groups.backfill_member_ids, logo após
+-- esta migração (post_migration passado pelo app.py ao bootstrap).
+UPDATE group_members SET student_id = (
+    SELECT CASE WHEN COUNT(*) = 1 THEN MIN(s.id) END FROM students s JOIN groups g ON g.id = group_members.group_id
+    WHERE s.name = group_members.student_name AND s.turma = g.turma
+) WHERE student_id IS NULL;
+
+-- Inserções antigas (só com o nome) continuam funcionando: resolve o id na hora, pela mesma regra
+CREATE TRIGGER IF NOT EXISTS gm_resolve_student AFTER INSERT ON group_members WHEN NEW.student_id IS NULL BEGIN
+    UPDATE group_members SET student_id = COALESCE(
+        (SELECT CASE WHEN COUNT(*) = 1 THEN MIN(s.id) END FROM students s WHERE s.name = NEW.student_name),
+        (SELECT CASE WHEN COUNT(*) = 1 THEN MIN(s.id) END FROM students s JOIN groups g ON g.id = NEW.group_id
+         WHERE s.name = NEW.student_name AND s.turma = g.turma)
+    ) WHERE id = NEW.id;
+END;
+
+CREATE INDEX IF NOT EXISTS ix_group_members_student_id ON group_members(student_id);
+CREATE INDEX IF NOT EXISTS ix_students_name ON students(name);
@@ -0,0 +1,13 @@
+-- Um tema por grupo. Antes, reservas concorrentes (e a submissão, que sobrescrevia reserved_by)
+-- podiam deixar um grupo com mais de um tema: fica o mais antigo, os demais voltam a ficar livres.
+UPDATE themes SET status = 'livre', reserved_by = NULL, reserved_at = NULL,
+                  released_by = 'migração 0012', released_at = datetime('now', 'localtime')
+WHERE status = 'reservado' AND reserved_by IS NOT NULL AND EXISTS (
+    SELECT 1 FROM themes o
+    WHERE o.status = 'reservado' AND o.reserved_by = themes.reserved_by
+      AND (COALESCE(o.reserved_at, '') < COALESCE(themes.reserved_at, '')
+           OR (COALESCE(o.reserved_at, '') = COALESCE(themes.reserved_at, '') AND o.id < themes.id))
+);
+
+-- Garantia no esquema: a reserva em modules/themes.py é compare-and-swap, e este índice é a rede de segurança
+CREATE UNIQUE INDEX IF NOT EXISTS ux_themes_reserved_by ON themes(reserved_by) WHERE status = 'reservado';
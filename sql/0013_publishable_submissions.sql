@@ -0,0 +1,2 @@
+-- Galeria (modules/gallery.py): seleção das submissões publicáveis sem varrer todas as submissões
+CREATE INDEX IF NOT EXISTS ix_submissions_publishable ON submissions(id) WHERE approved = 1 AND consent = 1;
@@ -0,0 +1,39 @@
+-- Quota de armazenamento por grupo (modules/quota.py, limite MAX_GROUP_TOTAL_MB).
+-- committed_bytes: soma dos arquivos das submissões do grupo, mantida pelos triggers abaixo.
+-- reserved_bytes: uploads em andamento; reservados em blocos ANTES de cada gravação (compare-and-swap contra a quota)
+-- e devolvidos ao fim do envio. Reserva sem renovação há mais de RESERVATION_TTL (processo que morreu) é ignorada.
+CREATE TABLE IF NOT EXISTS storage_ledger(
+    group_code TEXT PRIMARY KEY,
+    committed_bytes INTEGER NOT NULL DEFAULT 0,
+    reserved_bytes INTEGER NOT NULL DEFAULT 0,
+    reserved_at REAL NOT NULL DEFAULT 0   -- epoch da última reserva
+);
+
+INSERT INTO storage_ledger(group_code, committed_bytes)
+SELECT group_code, SUM(COALESCE(report_size, 0) + COALESCE(slides_size, 0) + COALESCE(zip_size, 0) + COALESCE(media_size, 0))
+FROM submissions WHERE group_code IS NOT NULL GROUP BY group_code;
+
+CREATE TRIGGER IF NOT EXISTS sl_sub_ins AFTER INSERT ON submissions WHEN NEW.group_code IS NOT NULL BEGIN
+    INSERT INTO storage_ledger(group_code, committed_bytes)
+    VALUES(NEW.group_code, COALESCE(NEW.report_size, 0) + COALESCE(NEW.slides_size, 0) + COALESCE(NEW.zip_size, 0) + COALESCE(NEW.media_size, 0))
+    ON CONFLICT(group_code) DO UPDATE SET committed_bytes = committed_bytes + excluded.committed_bytes;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sl_sub_del AFTER DELETE ON submissions WHEN OLD.group_code IS NOT NULL BEGIN
+    UPDATE storage_ledger
+    SET committed_bytes = committed_bytes - (COALESCE(OLD.report_size, 0) + COALESCE(OLD.slides_size, 0) + COALESCE(OLD.zip_size, 0) + COALESCE(OLD.media_size, 0))
+    WHERE group_code = OLD.group_code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sl_sub_upd AFTER UPDATE ON submissions
+WHEN OLD.group_code IS NOT NEW.group_code OR OLD.report_size IS NOT NEW.report_size OR OLD.slides_size IS NOT NEW.slides_size
+  OR OLD.zip_size IS NOT NEW.zip_size OR OLD.media_size IS NOT NEW.media_size
+BEGIN
+    UPDATE storage_ledger
+    SET committed_bytes = committed_bytes - (COALESCE(OLD.report_size, 0) + COALESCE(OLD.slides_size, 0) + COALESCE(OLD.zip_size, 0) + COALESCE(OLD.media_size, 0))
+    WHERE group_code = OLD.group_code;
+    INSERT INTO storage_ledger(group_code, committed_bytes)
+    SELECT NEW.group_code, COALESCE(NEW.report_size, 0) + COALESCE(NEW.slides_size, 0) + COALESCE(NEW.zip_size, 0) + COALESCE(NEW.media_size, 0)
+    WHERE NEW.group_code IS NOT NULL
+    ON CONFLICT(group_code) DO UPDATE SET committed_bytes = committed_bytes + excluded.committed_bytes;
+END;